@@ -1,10 +1,14 @@
 import abc
-from typing import Optional
+from typing import Iterator, Optional
 
 from api_maker.operation import Operation
 from api_maker.services.transactional_service import TransactionalService
+from api_maker.utils import metrics, tracing
+from api_maker.utils.app_exception import ApplicationException
 from api_maker.utils.logger import logger
-from api_maker.services.service import Service
+from api_maker.utils.profiler import request_profile
+from api_maker.utils.request_validator import validate
+from api_maker.services.service import Service, batch_error
 
 log = logger(__name__)
 
@@ -36,6 +40,19 @@ class Adapter(metaclass=abc.ABCMeta):
         """
         raise NotImplementedError
 
+    def unmarshal_batch(self, event) -> list[Operation]:
+        """
+        Unmarshal an event requesting a batch of operations.
+
+        Parameters:
+        - event (dict): Lambda event object.
+
+        Returns:
+        - list of Operation in request order, or the ApplicationException
+            of a request that is invalid
+        """
+        raise NotImplementedError
+
     def marshal(self, result: list[dict]):
         """
         Marshal the result into a event response
@@ -59,9 +76,69 @@ class Adapter(metaclass=abc.ABCMeta):
         Returns:
         - any: Result of the domain function.
         """
-        operation = self.unmarshal(event)
+        with metrics.timer("unmarshal"), tracing.span("unmarshal"):
+            operation = self.unmarshal(event)
+            # invalid requests are rejected before any database work
+            validate(operation)
+        metrics.set_dimensions(operation.operation_id, operation.action)
+
+        with request_profile(operation):
+            result = self.service.execute(operation)
+            log.debug(f"adapter result: {result}")
+
+            with tracing.span("marshal"):
+                return self.marshal(result)
+
+    def process_event_stream(self, event) -> Iterator[list]:
+        """
+        Process Lambda event yielding the marshalled result in batches.
 
-        result = self.service.execute(operation)
-        log.debug(f"adapter result: {result}")
+        Parameters:
+        - event (dict): Lambda event object.
 
-        return self.marshal(result)
+        Returns:
+        - Iterator of marshalled result batches.
+        """
+        with metrics.timer("unmarshal"), tracing.span("unmarshal"):
+            operation = self.unmarshal(event)
+            validate(operation)
+        metrics.set_dimensions(operation.operation_id, operation.action)
+
+        for batch in self.service.stream(operation):
+            yield self.marshal(batch)
+
+    def process_batch_event(self, event) -> list[dict]:
+        """
+        Process a Lambda event requesting a batch of operations.
+
+        Parameters:
+        - event (dict): Lambda event object.
+
+        Returns:
+        - list: The outcome of each operation, successful results are
+            marshalled.  See Service.execute_batch.
+        """
+        results: list = []
+        valid = []
+        with metrics.timer("unmarshal"), tracing.span("unmarshal"):
+            operations = self.unmarshal_batch(event)
+            for operation in operations:
+                # an invalid operation is reported in its slot, the valid
+                # operations are still executed
+                try:
+                    if isinstance(operation, ApplicationException):
+                        raise operation
+                    validate(operation)
+                    results.append(None)
+                    valid.append(operation)
+                except ApplicationException as error:
+                    results.append(batch_error(error))
+        metrics.set_dimensions("_batch", "batch")
+
+        executed = iter(self.service.execute_batch(valid) if valid else [])
+        for index, result in enumerate(results):
+            if result is None:
+                result = results[index] = next(executed)
+            if "result" in result:
+                result["result"] = self.marshal(result["result"])
+        return results
@@ -1,7 +1,6 @@
-from humps import camelize, decamelize
-
 from api_maker.adapters.adapter import Adapter
 from api_maker.utils.logger import logger
+from api_maker.utils.model_factory import ModelFactory, snake_case
 from api_maker.operation import Operation
 
 log = logger(__name__)
@@ -10,6 +9,10 @@ log = logger(__name__)
 class CaseChangeAdapter(Adapter):
     """
     Handles changing case from snake to camel and back
+
+    Parameter names are converted with the camel to snake case map of the
+    schema object.  Results are not rewritten, the operation requests camel
+    case field names which the query handlers emit as records are read.
     """
 
     def unmarshal(self, event) -> Operation:
@@ -26,19 +29,22 @@ class CaseChangeAdapter(Adapter):
 
         # determine case
         self.camel_case = (
-            operation.metadata_params.get("_case", "snake") == "camel"
+            operation.metadata_params.get("case", "snake") == "camel"
             or self.__check_camel_case(operation.store_params)
             or self.__check_camel_case(operation.query_params)
         )
         log.info(f"camel_case: {self.camel_case}")
 
         if self.camel_case:
+            snake_names = ModelFactory.get_api_object(
+                operation.operation_id, operation.action
+            ).snake_names
             return Operation(
                 operation_id=operation.operation_id,
                 action=operation.action,
-                store_params=decamelize(operation.store_params),
-                query_params=decamelize(operation.query_params),
-                metadata_params=operation.metadata_params,
+                store_params=self.__to_snake_case(operation.store_params, snake_names),
+                query_params=self.__to_snake_case(operation.query_params, snake_names),
+                metadata_params={**operation.metadata_params, "case": "camel"},
             )
 
         return operation
@@ -53,17 +59,16 @@ class CaseChangeAdapter(Adapter):
         Returns:
         - the event response
         """
-        super().marshal(result)
-
-        if not self.camel_case:
-            return result
-
-        converted_result = []
-        for item in result:
-            converted_result.append(camelize(item))
-
-        # convert back to camel case if needed
-        return converted_result
+        # records are already in the requested case
+        return super().marshal(result)
+
+    def __to_snake_case(self, params: dict, snake_names: dict) -> dict:
+        if not params:
+            return params
+        return {
+            snake_names.get(name) or snake_case(name): value
+            for name, value in params.items()
+        }
 
     def __check_camel_case(self, params: dict) -> bool:
         if params is not None:
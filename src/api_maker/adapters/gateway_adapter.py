@@ -1,7 +1,13 @@
-import json
+import base64
+import re
+from typing import Optional
 
 from api_maker.adapters.adapter import Adapter
 from api_maker.operation import Operation
+from api_maker.utils.app_exception import ApplicationException
+from api_maker.utils.compression import decompress
+from api_maker.utils.json_codec import loads
+from api_maker.utils.model_factory import ModelFactory, SchemaObjectProperty
 
 actions_map = {
     "GET": "read",
@@ -11,6 +17,106 @@ actions_map = {
 }
 
 
+# parameter values of these types are parsed into their database form by
+# the adapter, values of other types are converted by the query handlers
+PARAMETER_PATTERNS = {
+    "integer": re.compile(r"[-+]?\d+"),
+    "number": re.compile(r"[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?"),
+    "float": re.compile(r"[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?"),
+    "boolean": re.compile(r"true|false", re.IGNORECASE),
+}
+
+
+class ParameterParser:
+    """
+    Parses the request parameter values of a property.  Values with an
+    operator, such as gt::5, are left for the query handlers.
+    """
+
+    __slots__ = ("property", "pattern")
+
+    def __init__(self, property: SchemaObjectProperty):
+        self.property = property
+        self.pattern = PARAMETER_PATTERNS.get(property.api_type)
+
+    def __call__(self, value):
+        if self.pattern is None or not isinstance(value, str) or "::" in value:
+            return value
+        if not self.pattern.fullmatch(value):
+            raise ApplicationException(
+                400,
+                f"Invalid {self.property.api_type} value, "
+                + f"property: {self.property.name}, value: {value}",
+            )
+        return self.property.convert_to_db_value(value)
+
+
+class Route:
+    __slots__ = ("operation_id", "action", "parsers")
+
+    def __init__(self, operation_id: str, action: str, parsers: dict):
+        self.operation_id = operation_id
+        self.action = action
+        self.parsers = parsers
+
+
+def compile_routes() -> dict:
+    """
+    Build the routes of the model keyed by API Gateway resource and http
+    method, path operations take precedence over schema objects.
+    """
+    routes = {}
+    for name in ModelFactory.get_schema_names():
+        schema_object = ModelFactory.get_schema_object(name)
+        parsers = {
+            property_name: ParameterParser(property)
+            for property_name, property in schema_object.properties.items()
+        }
+        resources = [f"/{name}"]
+        key = schema_object.primary_key
+        if key:
+            resources.append(f"/{name}/{{{key.name}}}")
+            if schema_object.concurrency_property_name:
+                cc_name = schema_object.concurrency_property_name
+                resources.append(f"/{name}/{{{key.name}}}/{cc_name}/{{{cc_name}}}")
+        for resource in resources:
+            for method, action in actions_map.items():
+                routes[(resource, method)] = Route(name, action, parsers)
+
+    for path_operation in ModelFactory.get_path_operations().values():
+        parsers = {
+            input_name: ParameterParser(input)
+            for input_name, input in path_operation.inputs.items()
+        }
+        method = path_operation.method.upper()
+        routes[(path_operation.path, method)] = Route(
+            path_operation.path.strip("/"), actions_map.get(method, "read"), parsers
+        )
+    return routes
+
+
+# the routes and the model they were compiled from
+_routes: tuple = (None, {})
+
+
+def get_routes() -> dict:
+    global _routes
+    if _routes[0] is not ModelFactory.schema_objects:
+        _routes = (ModelFactory.schema_objects, compile_routes())
+    return _routes[1]
+
+
+def get_header(event, name: str, default: str = "") -> str:
+    """
+    Get a request header, header names are case insensitive.
+    """
+    name = name.lower()
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == name and value is not None:
+            return value
+    return default
+
+
 class GatewayAdapter(Adapter):
     def marshal(self, result: list[dict]):
         """
@@ -34,42 +140,110 @@ class GatewayAdapter(Adapter):
         Returns:
         - tuple: Tuple containing data, query and metadata parameters.
         """
-        entity = event.get("resource").split("/")[1]
-        action = actions_map.get(event.get("httpMethod").upper(), "read")
+        method = event.get("httpMethod").upper()
+        route = get_routes().get((event.get("resource"), method))
+        if route:
+            entity, action, parsers = route.operation_id, route.action, route.parsers
+        else:
+            entity = event.get("resource").split("/")[1]
+            action = actions_map.get(method, "read")
+            parsers = None
 
         event_params = {}
 
-        path_parameters = self._convert_parameters(event.get("pathParameters"))
+        path_parameters = self._convert_parameters(event.get("pathParameters"), parsers)
         if path_parameters is not None:
             event_params.update(path_parameters)
 
         queryStringParameters = self._convert_parameters(
-            event.get("queryStringParameters")
+            event.get("queryStringParameters"), parsers
         )
         if queryStringParameters is not None:
             event_params.update(queryStringParameters)
 
         query_params, metadata_params = self.split_params(event_params)
 
-        store_params = {}
-        body = event.get("body")
-        if body is not None and len(body) > 0:
-            store_params = json.loads(body)
-
         return Operation(
             operation_id=entity,
             action=action,
-            store_params=store_params,
+            store_params=self._read_body(event) or {},
             query_params=query_params,
             metadata_params=metadata_params,
         )
 
-    def _convert_parameters(self, parameters):
+    def unmarshal_batch(self, event) -> list[Operation]:
+        """
+        Get the operations of a batch request, the body is a list of
+        requests with the form;
+
+            {"method": "GET", "entity": "invoice", "params": {}, "body": {}}
+
+        Parameters:
+        - event (dict): Lambda event object.
+
+        Returns:
+        - list of Operation in request order, or the ApplicationException
+            of a request that is invalid
+
+        Raises:
+        - ApplicationException: 400 if the body is not a list of requests.
+        """
+        requests = self._read_body(event)
+        if not isinstance(requests, list):
+            raise ApplicationException(400, "Batch body must be a list of requests")
+
+        operations: list = []
+        for request in requests:
+            try:
+                operations.append(self.__batch_operation(request))
+            except ApplicationException as error:
+                operations.append(error)
+        return operations
+
+    def __batch_operation(self, request) -> Operation:
+        if not isinstance(request, dict) or not request.get("entity"):
+            raise ApplicationException(
+                400, f"Batch request requires an entity: {request}"
+            )
+        method = str(request.get("method", "GET")).upper()
+        route = get_routes().get((f"/{request['entity']}", method))
+        query_params, metadata_params = self.split_params(
+            self._convert_parameters(
+                request.get("params") or {}, route.parsers if route else None
+            )
+        )
+        return Operation(
+            operation_id=request["entity"],
+            action=actions_map.get(method, "read"),
+            store_params=request.get("body") or {},
+            query_params=query_params,
+            metadata_params=metadata_params,
+        )
+
+    def _read_body(self, event):
+        """
+        Decode the JSON request body, None if the request has no body.
+        """
+        body = event.get("body")
+        if body is None or len(body) == 0:
+            return None
+        if event.get("isBase64Encoded"):
+            body = base64.b64decode(body)
+        content_encoding = get_header(event, "content-encoding")
+        if content_encoding:
+            if isinstance(body, str):
+                body = body.encode("latin-1")
+            body = decompress(body, content_encoding)
+        return loads(body)
+
+    def _convert_parameters(self, parameters, parsers: Optional[dict] = None):
         """
         Convert parameters to appropriate types.
 
         Parameters:
         - parameters (dict): Dictionary of parameters.
+        - parsers (dict): The parsers of the route by parameter name,
+            without a route the types are inferred from the values.
 
         Returns:
         - dict: Dictionary with parameters converted to appropriate types.
@@ -77,6 +251,12 @@ class GatewayAdapter(Adapter):
         if parameters is None:
             return None
 
+        if parsers is not None:
+            return {
+                name: parsers[name](value) if name in parsers else value
+                for name, value in parameters.items()
+            }
+
         result = {}
         for parameter, value in parameters.items():
             try:
@@ -98,14 +278,16 @@ class GatewayAdapter(Adapter):
         Returns:
         - tuple: A tuple containing two dictionaries.
                 The first dictionary contains metadata_params,
-                and the second dictionary query_params.
+                and the second dictionary query_params.  Metadata
+                parameters are named without their __ prefix.
         """
         query_params = {}
         metadata_params = {}
 
         for key, value in parameters.items():
             if key.startswith("__"):
-                metadata_params[key] = value
+                # the query handlers read metadata without the prefix
+                metadata_params[key[2:]] = value
             else:
                 query_params[key] = value
 
@@ -3,6 +3,7 @@ import os
 import shutil
 import subprocess
 import sys
+from typing import Optional
 from zipfile import ZipFile
 
 from api_maker.utils.logger import logger, DEBUG
@@ -23,11 +24,18 @@ class PythonArchiveBuilder(ArchiveBuilder):
         sources: dict[str, str],
         requirements: list[str],
         working_dir: str,
+        api_spec: Optional[str] = None,
     ):
+        """
+        Args:
+            api_spec (str): Optional archive path of an API spec in the sources,
+                the precompiled model is written next to it.
+        """
         self.name = name
         self._sources = sources
         self._requirements = requirements
         self._working_dir = working_dir
+        self._api_spec = api_spec
 
         self.prepare()
 
@@ -59,6 +67,8 @@ class PythonArchiveBuilder(ArchiveBuilder):
         self.create_clean_folder(self._libs)
 
         self.install_sources()
+        if self._api_spec:
+            self.compile_api_spec()
         self.write_requirements()
 
     def build_archive(self):
@@ -110,6 +120,13 @@ class PythonArchiveBuilder(ArchiveBuilder):
                 log.error(f"Error copying {source} to {destination_path}: {e}")
                 raise
 
+    def compile_api_spec(self):
+        from api_maker.utils.model_factory import ModelFactory
+
+        spec_path = os.path.join(self._staging, self._api_spec)
+        model_path = ModelFactory.compile_model(spec_path)
+        log.info(f"Model compiled from {spec_path} to {model_path}")
+
     def write_requirements(self):
         if log.isEnabledFor(DEBUG):
             log.debug("writing requirements")
@@ -1,7 +1,4 @@
-import boto3
-import json
-import os
-import re
+from typing import Iterator, Optional
 
 from api_maker.utils.logger import logger
 from api_maker.utils.app_exception import ApplicationException
@@ -13,9 +10,22 @@ db_config_map = dict()
 
 
 class Cursor:
+    # API types the driver returns in API form, the values of columns
+    # of these types are not converted when records are marshalled
+    decoded_types: frozenset = frozenset()
+
     def execute(self, sql: str, params: dict, selection_results: dict) -> list[dict]:
         raise NotImplementedError
 
+    def stream(
+        self, sql: str, params: dict, selection_results: dict, batch_size: int
+    ) -> Iterator[list[dict]]:
+        """
+        Execute the statement returning the records in batches of at most
+        batch_size.  By default the whole result is returned as one batch.
+        """
+        yield self.execute(sql, params, selection_results)
+
     def close(self):
         raise NotImplementedError
 
@@ -31,8 +41,27 @@ class Connection:
     def cursor(self) -> Cursor:
         raise NotImplementedError
 
+    def stream_cursor(self) -> Cursor:
+        """
+        Cursor used for streaming reads, engines that support server side
+        cursors return one so records are not all held in memory.
+        """
+        return self.cursor()
+
     def commit(self):
         raise NotImplementedError
 
+    def rollback(self):
+        raise NotImplementedError
+
     def close(self):
         raise NotImplementedError
+
+    def listen(self, channels: list[str], timeout: float) -> Iterator[Optional[str]]:
+        """
+        Listen for notifications on channels, yielding the channel of each
+        notification, or None once listening and whenever no notification
+        arrives within timeout seconds.  The connection is dedicated to
+        listening.
+        """
+        raise NotImplementedError
@@ -1,8 +1,8 @@
-import boto3
 import json
 import os
 
 from api_maker.connectors.connection import Connection
+from api_maker.utils import tracing
 from api_maker.utils.app_exception import ApplicationException
 from api_maker.utils.logger import logger
 
@@ -28,7 +28,12 @@ class ConnectionFactory:
         Returns:
         - Connector: An instance of the appropriate Connector subclass.
         """
+        with tracing.span("connection") as span:
+            if span is not None:
+                span.set_attribute("db.name", database)
+            return self.__connect(database)
 
+    def __connect(self, database: str) -> Connection:
         # Get the secret name based on the engine and database from the secrets map
         log.info(f"database: {database}")
         db_config = self.db_config_map.get(database)
@@ -37,7 +42,8 @@ class ConnectionFactory:
             log.info(f"secret_name: {secret_name}")
 
             if secret_name:
-                db_config = self.__get_secret(secret_name)
+                with tracing.span("secret"):
+                    db_config = self.__get_secret(secret_name)
             else:
                 raise ValueError(f"Secret not found for database: {database}")
 
@@ -66,6 +72,10 @@ class ConnectionFactory:
         Returns:
         - dict: The database configuration obtained from the secret.
         """
+        # boto3 is only needed the first time a database is accessed, importing
+        # it lazily keeps it out of the cold start import time
+        import boto3
+
         endpoint_url = os.environ.get("AWS_ENDPOINT_URL")  # LocalStack endpoint
         sts_client = boto3.client("sts", endpoint_url=endpoint_url)
 
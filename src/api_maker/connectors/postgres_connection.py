@@ -1,3 +1,6 @@
+import uuid
+from typing import Iterator, Optional
+
 from api_maker.connectors.connection import Connection, Cursor
 from api_maker.utils.logger import logger
 
@@ -5,7 +8,44 @@ from api_maker.utils.logger import logger
 log = logger(__name__)
 
 
+def _api_number(value, cursor):
+    return float(value) if value is not None else None
+
+
+def _api_text(value, cursor):
+    return value
+
+
+# typecasters decoding values in API form, numerics are decoded as floats
+# instead of Decimals, dates and times keep the ISO text sent by the server
+API_TYPECASTERS = [
+    # (oids, name, cast)
+    ((1700,), "API_NUMERIC", _api_number),
+    ((1082,), "API_DATE", _api_text),
+    ((1083,), "API_TIME", _api_text),
+]
+
+# API types in API form once the typecasters are registered, timestamps
+# are datetimes and uuids are strings which the json codec encodes directly
+DECODED_TYPES = frozenset(
+    ["string", "number", "float", "date", "date-time", "time", "uuid"]
+)
+
+
+def register_api_typecasters(connection):
+    """
+    Register the API typecasters on a connection, cursors of other
+    connections are not affected.
+    """
+    from psycopg2.extensions import new_type, register_type
+
+    for oids, name, cast in API_TYPECASTERS:
+        register_type(new_type(oids, name, cast), connection)
+
+
 class PostgresCursor(Cursor):
+    decoded_types = DECODED_TYPES
+
     def __init__(self, cursor):
         self.__cursor = cursor
 
@@ -50,6 +90,42 @@ class PostgresCursor(Cursor):
             # Handle other database errors
             raise Exception(500, err.pgerror)
 
+    def stream(
+        self, sql: str, parameters: dict, result_columns: list[str], batch_size: int
+    ) -> Iterator[list]:
+        """
+        Execute a SQL query yielding the records in batches.
+
+        Parameters:
+        - sql (str): The SQL statement to execute.
+        - parameters (dict): Parameters to be used in the SQL statement.
+        - result_columns (list): The names of the selected columns.
+        - batch_size (int): The maximum number of records in a batch.
+
+        Returns:
+        - Iterator of record lists
+        """
+        from psycopg2 import Error, IntegrityError, ProgrammingError
+
+        log.info(f"sql: {sql}, parameters: {parameters}")
+
+        try:
+            self.__cursor.execute(sql, parameters)
+            while True:
+                records = self.__cursor.fetchmany(batch_size)
+                if not records:
+                    break
+                yield [
+                    {col: value for col, value in zip(result_columns, record)}
+                    for record in records
+                ]
+        except IntegrityError as err:
+            raise Exception(409, err.pgerror)
+        except ProgrammingError as err:
+            raise Exception(400, err.pgerror)
+        except Error as err:
+            raise Exception(500, err.pgerror)
+
     def close(self):
         self.__cursor.close()
 
@@ -62,12 +138,43 @@ class PostgresConnection(Connection):
     def cursor(self) -> Cursor:
         return PostgresCursor(self.__connection.cursor())
 
+    def stream_cursor(self) -> Cursor:
+        # named cursors are server side, rows are transferred as they are fetched
+        return PostgresCursor(
+            self.__connection.cursor(name=f"api_maker_{uuid.uuid4().hex}")
+        )
+
     def close(self):
         self.__connection.close()
 
     def commit(self):
         self.__connection.commit()
 
+    def rollback(self):
+        self.__connection.rollback()
+
+    def listen(self, channels: list[str], timeout: float) -> Iterator[Optional[str]]:
+        import select
+
+        from psycopg2 import sql
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        connection = self.__connection
+        # notifications are only delivered outside of a transaction
+        connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with connection.cursor() as cursor:
+            for channel in channels:
+                cursor.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+        yield None
+
+        while True:
+            if not select.select([connection], [], [], timeout)[0]:
+                yield None
+                continue
+            connection.poll()
+            while connection.notifies:
+                yield connection.notifies.pop(0).channel
+
     def get_connection(self):
         """
         Get a connection to the PostgreSQL database.
@@ -102,4 +209,6 @@ class PostgresConnection(Connection):
         log.info(f"connection_params: {connection_params}")
 
         # Create a connection to the PostgreSQL database
-        return connect(**connection_params)
+        connection = connect(**connection_params)
+        register_api_typecasters(connection)
+        return connection
@@ -1,9 +1,15 @@
+import os
+import time
+from datetime import date, datetime, time as time_of_day
+from typing import Iterator
+
 from api_maker.dao.sql_custom_query_handler import SQLCustomQueryHandler
 from api_maker.dao.sql_delete_query_handler import SQLDeleteSchemaQueryHandler
 from api_maker.dao.sql_insert_query_handler import SQLInsertSchemaQueryHandler
 from api_maker.dao.sql_select_query_handler import SQLSelectSchemaQueryHandler
 from api_maker.dao.sql_subselect_query_handler import SQLSubselectSchemaQueryHandler
 from api_maker.dao.sql_update_query_handler import SQLUpdateSchemaQueryHandler
+from api_maker.utils import metrics, tracing
 from api_maker.utils.app_exception import ApplicationException
 from api_maker.dao.dao import DAO
 from api_maker.connectors.connection import Cursor
@@ -11,6 +17,8 @@ from api_maker.operation import Operation
 from api_maker.utils.model_factory import ModelFactory
 from api_maker.dao.sql_query_handler import SQLQueryHandler
 
+STREAM_BATCH_SIZE = int(os.environ.get("STREAM_BATCH_SIZE", 500))
+
 
 class OperationDAO(DAO):
     """
@@ -78,6 +86,17 @@ class OperationDAO(DAO):
             list[dict]: A list of dictionaries containing the results
             of the operation.
         """
+        with tracing.span("dao.execute") as span:
+            if span is not None:
+                span.set_attribute(
+                    "api_maker.operation_id", self.operation.operation_id
+                )
+                span.set_attribute("api_maker.action", self.operation.action)
+            return self.__execute(cursor)
+
+    def __execute(self, cursor: Cursor) -> list[dict] | dict:
+        if "explain" in self.operation.metadata_params:
+            return self.__explain(self.operation.metadata_params["explain"], cursor)
 
         result = self.__fetch_record_set(self.query_handler, cursor)
 
@@ -90,50 +109,236 @@ class OperationDAO(DAO):
 
         return result
 
-    def __fetch_many(self, parent_set: list[dict], cursor: Cursor):
-        if "properties" not in self.operation.metadata_params:
+    @property
+    def streams(self) -> bool:
+        """
+        Whether stream reads the result from a single statement in batches,
+        otherwise the operation is executed and returned as one batch.  Only
+        streamed operations can use a server side cursor, which executes a
+        single statement.
+        """
+        return (
+            self.operation.action == "read"
+            and "count" not in self.operation.metadata_params
+            and "explain" not in self.operation.metadata_params
+            and not self.__array_relations()
+        )
+
+    def stream(
+        self, cursor: Cursor, batch_size: int = STREAM_BATCH_SIZE
+    ) -> Iterator[list[dict]]:
+        """
+        Execute the database operation yielding the results in batches as
+        they are read from the cursor.
+
+        Operations that need the complete result, mutations, counts, explains
+        and selections of array properties, are executed and returned as a
+        single batch.
+
+        Args:
+            cursor (Cursor): The database cursor.
+            batch_size (int): The maximum number of records in a batch.
+
+        Returns:
+            Iterator[list[dict]]: The batches of marshalled records.
+        """
+        if not self.streams:
+            result = self.execute(cursor)
+            yield result if isinstance(result, list) else [result]
             return
 
-        schema_object = ModelFactory.get_schema_object(self.operation.operation_id)
-        for name, relation in schema_object.relations.items():
-            if relation.type == "object":
-                continue
+        query_handler = self.query_handler
+        with metrics.timer("sql_build"):
+            sql = query_handler.sql
+            placeholders = query_handler.placeholders if sql else None
+        if not sql:
+            return
 
-            child_set = self.__fetch_record_set(
-                SQLSubselectSchemaQueryHandler(
-                    self.operation, relation, self.query_handler  # type: ignore
-                ),
-                cursor,
-            )
+        metrics.add_metric("statements", 1)
+        query_handler.log_query_shape()
+        record_sets = cursor.stream(
+            sql, placeholders, query_handler.selection_results, batch_size
+        )
+        while True:
+            # each batch is fetched when it is requested, the time spent by
+            # the consumer between batches is not execution time
+            with metrics.timer("execute"):
+                record_set = next(record_sets, None)
+            if record_set is None:
+                return
+            with metrics.timer("marshal"):
+                batch = [
+                    query_handler.marshal_record(record, cursor.decoded_types)
+                    for record in record_set
+                ]
+            metrics.add_metric("rows", len(batch))
+            yield batch
+
+    def __fetch_many(self, parent_set: list[dict], cursor: Cursor):
+        for name, relation, query_handler in self.__subselect_handlers():
+            child_set = self.__fetch_record_set(query_handler, cursor)
             if len(child_set) == 0:
                 continue
 
-            for parent in parent_set:
-                parent[name] = []
+            if query_handler.camel_case:
+                name = relation.camel_name
+                parent_key = relation.parent_property.camel_name
+                child_key = relation.child_property.camel_name
+            else:
+                parent_key = relation.parent_property.name
+                child_key = relation.child_property.name
 
-            parents = {}
             for parent in parent_set:
-                parents[parent[relation.parent_property.name]] = parent
+                parent[name] = []
 
+            parents = {parent[parent_key]: parent for parent in parent_set}
             for child in child_set:
-                parent_id = child[relation.child_property.name]
-                parent = parents.get(parent_id)
+                parent = parents.get(child[child_key])
                 if parent:
                     parent[name].append(child)
 
+    def __array_relations(self) -> list:
+        """
+        The relations read by a statement of their own, without building
+        their query handlers.
+        """
+        if "properties" not in self.operation.metadata_params:
+            return []
+        if getattr(self.query_handler, "is_aggregate", False):
+            return []
+
+        schema_object = ModelFactory.get_schema_object(self.operation.operation_id)
+        return [
+            (name, relation)
+            for name, relation in schema_object.relations.items()
+            if relation.cardinality != "one"
+        ]
+
+    def __subselect_handlers(self):
+        return [
+            (
+                name,
+                relation,
+                SQLSubselectSchemaQueryHandler(
+                    self.operation, relation, self.query_handler  # type: ignore
+                ),
+            )
+            for name, relation in self.__array_relations()
+        ]
+
+    def __explain(self, explain, cursor: Cursor) -> dict:
+        """
+        Explain the statements the operation would execute instead of
+        returning the records.
+
+        Args:
+            explain: The explain metadata parameter, either true or 'analyze'.
+            cursor (Cursor): The database cursor.
+
+        Returns:
+            dict: The plans, generated sql, bind values and timings (ms)
+            for the main query and each array property subselect.
+        """
+        if os.environ.get("ALLOW_EXPLAIN", "false").lower() != "true":
+            raise ApplicationException(403, "Explain is not enabled for this api")
+        if self.engine != "postgres":
+            raise ApplicationException(
+                400, f"Explain is not supported for engine: {self.engine}"
+            )
+        if self.operation.action != "read":
+            raise ApplicationException(400, "Explain is only supported for reads")
+
+        analyze = str(explain).lower() == "analyze"
+        if not analyze and str(explain).lower() not in ["true", "1", ""]:
+            raise ApplicationException(
+                400, f"Invalid explain option: {explain}, use true or analyze"
+            )
+
+        statements = [
+            self.__explain_statement(None, self.query_handler, analyze, cursor)
+        ]
+        for name, _, query_handler in self.__subselect_handlers():
+            statement = self.__explain_statement(name, query_handler, analyze, cursor)
+            if statement:
+                statements.append(statement)
+
+        return {"analyze": analyze, "statements": statements}
+
+    def __explain_statement(
+        self,
+        relation: str | None,
+        query_handler: SQLQueryHandler,
+        analyze: bool,
+        cursor: Cursor,
+    ) -> dict | None:
+        start = time.perf_counter()
+        sql = query_handler.sql
+        placeholders = query_handler.placeholders
+        timings = {"build": self.__elapsed(start)}
+        if not sql:
+            return None
+
+        options = "FORMAT JSON, ANALYZE, BUFFERS" if analyze else "FORMAT JSON"
+        start = time.perf_counter()
+        plan = cursor.execute(f"EXPLAIN ({options}) {sql}", placeholders, ["plan"])
+        timings["explain"] = self.__elapsed(start)
+
+        if analyze and plan and plan[0]["plan"]:
+            # EXPLAIN ANALYZE already runs the statement, the execution timings
+            # come from its plan rather than from running the statement again
+            analyzed = plan[0]["plan"][0]
+            timings["planning"] = analyzed.get("Planning Time")
+            timings["execute"] = analyzed.get("Execution Time")
+            timings["rows"] = analyzed.get("Plan", {}).get("Actual Rows")
+
+        return {
+            "relation": relation,
+            "sql": sql,
+            "parameters": {
+                name: (
+                    value.isoformat()
+                    if isinstance(value, (date, datetime, time_of_day))
+                    else value
+                )
+                for name, value in placeholders.items()
+            },
+            "plan": plan[0]["plan"] if plan else None,
+            "timings": timings,
+        }
+
+    def __elapsed(self, start: float) -> float:
+        return round((time.perf_counter() - start) * 1000, 3)
+
     def __fetch_record_set(
         self, query_handler: SQLQueryHandler, cursor: Cursor
     ) -> list[dict]:
-        sql = query_handler.sql
-        if not sql:
-            return []
+        with tracing.span("fetch_record_set") as span:
+            with metrics.timer("sql_build"):
+                sql = query_handler.sql
+                placeholders = query_handler.placeholders if sql else None
+            if not sql:
+                return []
+            if span is not None:
+                # the statement has placeholders, not the parameter values,
+                # it is set before executing so failed statements have it
+                span.set_attribute("db.statement", sql)
 
-        record_set = cursor.execute(
-            sql, query_handler.placeholders, query_handler.selection_results
-        )
-        result = []
-        for record in record_set:
-            object = query_handler.marshal_record(record)
-            result.append(object)
+            with metrics.timer("execute"):
+                record_set = cursor.execute(
+                    sql, placeholders, query_handler.selection_results
+                )
+            metrics.add_metric("statements", 1)
+            # logged once per statement executed, the sql property may be
+            # read several times
+            query_handler.log_query_shape()
 
-        return result
+            with metrics.timer("marshal"):
+                result = []
+                for record in record_set:
+                    object = query_handler.marshal_record(record, cursor.decoded_types)
+                    result.append(object)
+            metrics.add_metric("rows", len(result))
+
+            if span is not None:
+                span.set_attribute("db.rows", len(result))
+            return result
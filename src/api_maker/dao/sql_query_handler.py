@@ -1,6 +1,7 @@
 import re
 from typing import Optional, List, Dict
 from datetime import datetime, date
+from decimal import Decimal
 
 from api_maker.utils.app_exception import ApplicationException
 from api_maker.operation import Operation
@@ -98,6 +99,21 @@ RELATIONAL_TYPES = {
     "not-in": "not-in",
     "between": "between",
     "not-between": "not-between",
+    "like": "like",
+    "ilike": "ilike",
+    "starts": "starts",
+    "fts": "fts",
+}
+
+TEXT_SEARCH_TYPES = {"like", "ilike", "starts", "fts"}
+
+
+# python types of the values that are passed to the database as they are
+DATABASE_VALUE_TYPES = {
+    "integer": (int,),
+    "number": (int, float, Decimal),
+    "float": (int, float, Decimal),
+    "boolean": (bool,),
 }
 
 
@@ -108,7 +124,10 @@ class SQLQueryHandler:
     def __init__(self, operation: Operation, engine: str):
         self.operation = operation
         self.__select_list_columns = None
+        self.__marshallers = {}
         self.engine = engine
+        # result field names are camel case, see CaseChangeAdapter
+        self.camel_case = operation.metadata_params.get("case") == "camel"
 
     @property
     def sql(self) -> str:
@@ -118,17 +137,51 @@ class SQLQueryHandler:
     def placeholders(self) -> Dict[str, SchemaObjectProperty]:
         raise NotImplementedError("Subclasses must implement this method")
 
+    def log_query_shape(self):
+        """
+        Log the shape of the statement once it is executed, only selections
+        have a shape, see SQLSelectSchemaQueryHandler.
+        """
+
     @property
     def select_list_columns(self) -> List[str]:
         if not self.__select_list_columns:
             self.__select_list_columns = list(self.selection_results.keys())
         return self.__select_list_columns
 
-    def marshal_record(self, record: dict) -> dict:
+    def marshallers(self, decoded_types: frozenset = frozenset()) -> dict:
+        """
+        The field name and API value converter of each selected column.
+        Field names are in camel case when the operation requests it, the
+        converter is None for the columns the driver already decodes in
+        API form.
+
+        Parameters:
+        - decoded_types (frozenset): The API types decoded by the driver,
+            see Cursor.decoded_types.
+        """
+        marshallers = self.__marshallers.get(decoded_types)
+        if marshallers is None:
+            marshallers = {
+                name: (
+                    property.camel_name if self.camel_case else property.name,
+                    property.api_value_converter(decoded_types),
+                )
+                for name, property in self.selection_results.items()
+            }
+            self.__marshallers[decoded_types] = marshallers
+        return marshallers
+
+    def marshal_record(
+        self, record: dict, decoded_types: frozenset = frozenset()
+    ) -> dict:
+        marshallers = self.marshallers(decoded_types)
         result = {}
         for name, value in record.items():
-            property = self.selection_results[name]
-            result[property.name] = property.convert_to_api_value(value)
+            field, converter = marshallers[name]
+            result[field] = (
+                value if value is None or converter is None else converter(value)
+            )
         return result
 
     def placeholder(self, property: SchemaObjectProperty, param: str = "") -> str:
@@ -162,6 +215,11 @@ class SQLQueryHandler:
         column = f"{prefix}.{property.column_name}" if prefix else property.column_name
         placeholder_name = f"{prefix}_{property.name}" if prefix else property.name
 
+        if operand in TEXT_SEARCH_TYPES:
+            return self.text_search_condition(
+                property, operand, column, placeholder_name, prefix
+            )
+
         if operand in ["between", "not-between"]:
             value_set = value_str.split(",")
             sql = f"{column} {'NOT ' if operand == 'not-between' else ''}BETWEEN {self.placeholder(property, f'{placeholder_name}_1')} AND {self.placeholder(property, f'{prefix}_{property.name}_2')}"  # noqa E501
@@ -180,6 +238,11 @@ class SQLQueryHandler:
         self, property: SchemaObjectProperty, value, prefix: Optional[str] = None
     ) -> dict:
         operand = "="
+        placeholder_name = f"{prefix}_{property.name}" if prefix else property.name
+
+        if type(value) in DATABASE_VALUE_TYPES.get(property.api_type, ()):
+            # values parsed by the adapter are already in database form
+            return {placeholder_name: value}
 
         if isinstance(value, str):
             parts = value.split("::", 1)
@@ -190,7 +253,6 @@ class SQLQueryHandler:
         else:
             value_str = str(value)
 
-        placeholder_name = f"{prefix}_{property.name}" if prefix else property.name
         placeholders = {}
 
         if operand in ["between", "not-between"]:
@@ -204,11 +266,61 @@ class SQLQueryHandler:
             for index, item in enumerate(value_set):
                 item_name = f"{placeholder_name}_{index}"
                 placeholders[item_name] = property.convert_to_db_value(item)
+        elif operand == "starts":
+            placeholders = {placeholder_name: self.escape_like(value_str) + "%"}
+        elif operand in TEXT_SEARCH_TYPES:
+            placeholders = {placeholder_name: value_str}
         else:
             placeholders = {placeholder_name: property.convert_to_db_value(value_str)}
 
         return placeholders
 
+    def text_search_condition(
+        self,
+        property: SchemaObjectProperty,
+        operand: str,
+        column: str,
+        placeholder_name: str,
+        prefix: Optional[str] = None,
+    ) -> str:
+        """
+        Generate a text search condition.  The conditions are written so
+        that PostgreSQL can use a trigram (like, ilike), text_pattern_ops
+        (starts) or full text GIN index (fts) on the column.
+        """
+        if property.api_type != "string":
+            raise ApplicationException(
+                400,
+                f"Text search operator {operand} is only supported on string "
+                + f"properties. property: {property.name}",
+            )
+
+        placeholder = self.placeholder(property, placeholder_name)
+        if operand in ["like", "starts"]:
+            return f"{column} LIKE {placeholder}"
+        if operand == "ilike":
+            if self.engine == "postgres":
+                return f"{column} ILIKE {placeholder}"
+            return f"UPPER({column}) LIKE UPPER({placeholder})"
+
+        # full text search
+        if self.engine != "postgres":
+            raise ApplicationException(
+                400, f"Full text search is not supported for engine: {self.engine}"
+            )
+        query = f"plainto_tsquery('{property.search_config}', {placeholder})"
+        if property.search_vector:
+            vector = (
+                f"{prefix}.{property.search_vector}"
+                if prefix
+                else property.search_vector
+            )
+            return f"{vector} @@ {query}"
+        return f"to_tsvector('{property.search_config}', {column}) @@ {query}"
+
+    def escape_like(self, value: str) -> str:
+        return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
     def search_value_assignment(
         self, property: SchemaObjectProperty, value, prefix: Optional[str] = None
     ) -> tuple[str, dict]:
@@ -305,7 +417,9 @@ class SQLSchemaQueryHandler(SQLQueryHandler):
                 self.operation.action != "read"
                 and isinstance(value, str)
                 and re.match(
-                    r"^(lt|le|eq|ne|gt|ge|in|not-in|between|not-between)::(.+)$", value
+                    r"^(lt|le|eq|ne|gt|ge|in|not-in|between|not-between"
+                    + r"|like|ilike|starts|fts)::(.+)$",
+                    value,
                 )
                 and self.schema_object.concurrency_property
             ):
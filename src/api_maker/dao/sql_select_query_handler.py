@@ -1,18 +1,37 @@
+import json
+
 from api_maker.dao.sql_query_handler import SQLSchemaQueryHandler
 from api_maker.operation import Operation
 from api_maker.utils.app_exception import ApplicationException
+from api_maker.utils.logger import logger, INFO
 from api_maker.utils.model_factory import (
     SchemaObject,
     SchemaObjectProperty,
     ModelFactory,
 )
 
+# query shapes are logged under their own name so they can be routed
+# or silenced independently, see scripts/index_advisor.py
+shape_log = logger("api_maker.query_shape")
+
+AGGREGATE_FUNCTIONS = {
+    "count": "COUNT({column})",
+    "count_distinct": "COUNT(DISTINCT {column})",
+    "sum": "SUM({column})",
+    "avg": "AVG({column})",
+    "min": "MIN({column})",
+    "max": "MAX({column})",
+}
+
 
 class SQLSelectSchemaQueryHandler(SQLSchemaQueryHandler):
     def __init__(
         self, operation: Operation, schema_object: SchemaObject, engine: str
     ) -> None:
         super().__init__(operation, schema_object, engine)
+        self.shape_filters = []
+        self.shape_sort = []
+        self.shape_joins = []
 
     @property
     def sql(self) -> str:
@@ -20,12 +39,16 @@ class SQLSelectSchemaQueryHandler(SQLSchemaQueryHandler):
         search_condition = self.search_condition
         order_by_expression = self.order_by_expression
         select_list = self.select_list
+        group_by_expression = self.group_by_expression
+        having_condition = self.having_condition
         table_expression = self.table_expression
 
         return (
             f"SELECT {select_list}"
             + f" FROM {table_expression}"
             + search_condition
+            + group_by_expression
+            + having_condition
             + order_by_expression
             + self.limit_expression
             + self.offset_expression
@@ -35,11 +58,198 @@ class SQLSelectSchemaQueryHandler(SQLSchemaQueryHandler):
     def select_list(self) -> str:
         if self.operation.metadata_params.get("count", False):
             return "count(*)"
+        if self.is_aggregate:
+            return ", ".join(
+                expression for expression, _ in self.aggregate_columns.values()
+            )
         return super().select_list
 
+    @property
+    def is_aggregate(self) -> bool:
+        return (
+            "group_by" in self.operation.metadata_params
+            or "aggregate" in self.operation.metadata_params
+        )
+
+    @property
+    def aggregate_columns(self) -> dict[str, tuple[str, SchemaObjectProperty]]:
+        """
+        The group by columns followed by the aggregates, keyed by the
+        selection result name with the select list expression and the
+        property used to marshal the value.
+        """
+        if not hasattr(self, "_aggregate_columns"):
+            if "count" in self.operation.metadata_params:
+                raise ApplicationException(
+                    400, "Count can not be combined with group by or aggregates"
+                )
+            self._aggregate_columns = {}
+            self._aggregates = {}
+            self._group_by = []
+            default_prefix = self.prefix_map["$default$"]
+
+            for name in self.split_list(
+                self.operation.metadata_params.get("group_by", "")
+            ):
+                prefix, property = self.resolve_column(name, "group by")
+                column = f"{prefix}.{property.column_name}"
+                self._group_by.append(column)
+                self._aggregate_columns[f"{prefix}.{property.name}"] = (
+                    column,
+                    property,
+                )
+
+            for item in self.split_list(
+                self.operation.metadata_params.get("aggregate", "")
+            ):
+                parts = item.split(":", 1)
+                function = parts[0]
+                if function not in AGGREGATE_FUNCTIONS or len(parts) == 1:
+                    raise ApplicationException(
+                        400,
+                        f"Invalid aggregate: {item}, must be one of "
+                        + f"{', '.join(AGGREGATE_FUNCTIONS.keys())} "
+                        + "followed by ':' and a property",
+                    )
+                if parts[1] == "*":
+                    if function != "count":
+                        raise ApplicationException(
+                            400, f"Invalid aggregate: {item}, only count accepts *"
+                        )
+                    alias = "count"
+                    expression = "COUNT(*)"
+                    element = {"type": "integer"}
+                else:
+                    prefix, property = self.resolve_column(parts[1], "aggregate")
+                    alias = f"{function}_{parts[1].replace('.', '_')}"
+                    expression = AGGREGATE_FUNCTIONS[function].format(
+                        column=f"{prefix}.{property.column_name}"
+                    )
+                    if function in ["count", "count_distinct"]:
+                        element = {"type": "integer"}
+                    elif function in ["sum", "avg"]:
+                        element = {"type": "number"}
+                    else:
+                        element = {
+                            "type": property.type,
+                            "format": property.api_type,
+                        }
+
+                self._aggregates[alias] = (expression, element)
+                self._aggregate_columns[f"{default_prefix}.{alias}"] = (
+                    f"{expression} AS {alias}",
+                    SchemaObjectProperty(
+                        self.operation.operation_id,
+                        alias,
+                        element,
+                        spec=ModelFactory.spec,
+                    ),
+                )
+        return self._aggregate_columns
+
+    @property
+    def group_by_expression(self) -> str:
+        if not self.is_aggregate:
+            return ""
+        self.aggregate_columns
+        if len(self._group_by) == 0:
+            return ""
+        return " GROUP BY " + ", ".join(self._group_by)
+
+    @property
+    def having_condition(self) -> str:
+        having_str = self.operation.metadata_params.get("having", None)
+        if not having_str:
+            return ""
+        if not self.is_aggregate:
+            raise ApplicationException(
+                400, "Having conditions require group by or aggregates"
+            )
+
+        self.aggregate_columns
+        conditions = []
+        for item in having_str.split():
+            parts = item.split(":", 1)
+            if parts[0] not in self._aggregates or len(parts) == 1:
+                raise ApplicationException(
+                    400,
+                    f"Invalid having condition: {item}, conditions must "
+                    + "reference an aggregate, for example sum_total:gt::100",
+                )
+            expression, element = self._aggregates[parts[0]]
+            property = SchemaObjectProperty(
+                self.operation.operation_id,
+                f"having_{parts[0]}",
+                {**element, "x-am-column-name": expression},
+                spec=ModelFactory.spec,
+            )
+            assignment, holders = self.search_value_assignment(property, parts[1])
+            conditions.append(assignment)
+            self.search_placeholders.update(holders)
+        return " HAVING " + " AND ".join(conditions)
+
+    def split_list(self, value: str) -> list[str]:
+        return value.replace(",", " ").split()
+
+    def resolve_column(self, name: str, usage: str) -> tuple[str, SchemaObjectProperty]:
+        """
+        Resolve a property name, optionally prefixed with an object property,
+        to the table prefix and property.
+        """
+        parts = name.split(".")
+        if len(parts) == 1:
+            schema_object = self.schema_object
+            prefix = self.prefix_map["$default$"]
+        else:
+            relation = self.schema_object.relations.get(parts[0])
+            if not relation or relation.type == "array":
+                raise ApplicationException(
+                    400,
+                    f"Invalid {usage} property, schema object: "
+                    + f"{self.schema_object.operation_id} does not have an "
+                    + f"object property: {parts[0]}",
+                )
+            schema_object = relation.child_schema_object
+            prefix = self.prefix_map[parts[0]]
+            self.active_prefixes.add(prefix)
+
+        property = schema_object.properties.get(parts[-1])
+        if not property:
+            raise ApplicationException(
+                400,
+                f"Invalid {usage} property, schema object: "
+                + f"{schema_object.operation_id} does not have a property: "
+                + parts[-1],
+            )
+        return prefix, property
+
+    @property
+    def query_shape(self) -> dict:
+        """
+        The columns filtered, sorted and joined by the last generated
+        statement, values are omitted.
+        """
+        return {
+            "operation_id": self.schema_object.operation_id,
+            "table": self.schema_object.table_name,
+            "filters": self.shape_filters,
+            "sort": self.shape_sort,
+            "joins": self.shape_joins,
+        }
+
+    def log_query_shape(self):
+        if shape_log.isEnabledFor(INFO):
+            shape_log.info(f"query_shape: {json.dumps(self.query_shape)}")
+
+    def shape_operator(self, value) -> str:
+        if isinstance(value, str) and "::" in value:
+            return value.split("::", 1)[0]
+        return "eq"
+
     @property
     def search_condition(self) -> str:
         self.search_placeholders = {}
+        self.shape_filters = []
         conditions = []
 
         for name, value in self.operation.query_params.items():
@@ -66,9 +276,11 @@ class SQLSelectSchemaQueryHandler(SQLSchemaQueryHandler):
                         )
                     property = relation.child_schema_object.properties[parts[1]]
                     prefix = self.prefix_map[parts[0]]
+                    table_name = relation.child_schema_object.table_name
                 else:
                     property = self.schema_object.properties[parts[0]]
                     prefix = self.prefix_map["$default$"]
+                    table_name = self.schema_object.table_name
             except KeyError:
                 raise ApplicationException(
                     500,
@@ -83,6 +295,13 @@ class SQLSelectSchemaQueryHandler(SQLSchemaQueryHandler):
 
             assignment, holders = self.search_value_assignment(property, value, prefix)
             self.active_prefixes.add(prefix)
+            self.shape_filters.append(
+                {
+                    "table": table_name,
+                    "column": property.column_name,
+                    "operator": self.shape_operator(value),
+                }
+            )
             conditions.append(assignment)
             self.search_placeholders.update(holders)
 
@@ -91,24 +310,13 @@ class SQLSelectSchemaQueryHandler(SQLSchemaQueryHandler):
     @property
     def table_expression(self) -> str:
         joins = []
+        self.shape_joins = []
         parent_prefix = self.prefix_map["$default$"]
         for name, relation in self.schema_object.relations.items():
             child_prefix = self.prefix_map[relation.name]
             if child_prefix in self.active_prefixes:
-                joins.append(
-                    "INNER JOIN "
-                    + relation.child_schema_object.table_name
-                    + " AS "
-                    + child_prefix
-                    + " ON "
-                    + parent_prefix
-                    + "."
-                    + relation.parent_property.column_name
-                    + " = "
-                    + child_prefix
-                    + "."
-                    + relation.child_property.column_name
-                )
+                self.shape_joins.append(relation.join_shape)
+                joins.append(relation.join(parent_prefix, child_prefix))
 
         return (
             self.schema_object.table_name
@@ -129,6 +337,12 @@ class SQLSelectSchemaQueryHandler(SQLSchemaQueryHandler):
             }
             return self._selection_results
 
+        if self.is_aggregate:
+            self._selection_results = {
+                name: property for name, (_, property) in self.aggregate_columns.items()
+            }
+            return self._selection_results
+
         filter_str = self.operation.metadata_params.get("properties", ".*")
         self._selection_results = {}
 
@@ -183,26 +397,33 @@ class SQLSelectSchemaQueryHandler(SQLSchemaQueryHandler):
 
         return result
 
-    def marshal_record(self, record) -> dict:
+    def marshal_record(self, record, decoded_types: frozenset = frozenset()) -> dict:
+        marshallers = self.marshallers(decoded_types)
         object_set = {}
         for name, value in record.items():
-            property = self.selection_results[name]
+            field, converter = marshallers[name]
             parts = name.split(".")
             component = parts[0] if len(parts) > 1 else self.prefix_map["$default$"]
             object = object_set.get(component, {})
             if not object:
                 object_set[component] = object
-            object[property.name] = property.convert_to_api_value(value)
+            object[field] = (
+                value if value is None or converter is None else converter(value)
+            )
 
-        result = object_set[self.prefix_map["$default$"]]
+        # grouped results may only have properties of object fields
+        result = object_set.get(self.prefix_map["$default$"], {})
         for name, prefix in self.prefix_map.items():
             if name != "$default$" and prefix in object_set:
+                if self.camel_case:
+                    name = self.schema_object.relations[name].camel_name
                 result[name] = object_set[prefix]
 
         return result
 
     @property
     def order_by_expression(self) -> str:
+        self.shape_sort = []
         fields_str = self.operation.metadata_params.get("sort", None)
         if not fields_str:
             return ""
@@ -221,10 +442,17 @@ class SQLSelectSchemaQueryHandler(SQLSchemaQueryHandler):
             if order != "desc" and order != "asc":
                 raise ApplicationException(400, f"unrecognized sorting order: {field}")
 
+            if self.is_aggregate:
+                self.aggregate_columns
+                if field_name in self._aggregates:
+                    order_set.append((None, field_name, order))
+                    continue
+
             # handle entity prefix
             field_parts = field_name.split(".")
             if len(field_parts) == 1:
                 prefix = self.prefix_map["$default$"]
+                table_name = self.schema_object.table_name
                 property = self.schema_object.properties.get(field_parts[0])
                 if not property:
                     raise ApplicationException(
@@ -261,16 +489,25 @@ class SQLSelectSchemaQueryHandler(SQLSchemaQueryHandler):
                         f"Invalid order by property, schema object: {schema_object.operation_id} does not have a property: {field_parts[1]}",  # noqa E501
                     )
                 column = property.column_name
+                table_name = schema_object.table_name
                 self.active_prefixes.add(prefix)
                 use_prefixes = True
 
+            if self.is_aggregate and f"{prefix}.{column}" not in self._group_by:
+                raise ApplicationException(
+                    400,
+                    f"Invalid order by property: {field_name}, grouped results can only be sorted by group by properties or aggregates",  # noqa E501
+                )
             order_set.append((prefix, column, order))
+            self.shape_sort.append(
+                {"table": table_name, "column": column, "order": order}
+            )
 
         if len(order_set) == 0:
             return ""
         order_parts = []
         for prefix, column, order in order_set:
-            if use_prefixes:
+            if use_prefixes and prefix:
                 order_parts.append(f"{prefix}.{column} {order}")
             else:
                 order_parts.append(f"{column} {order}")
@@ -48,14 +48,19 @@ class SQLSubselectSchemaQueryHandler(SQLSelectSchemaQueryHandler):
 
         sql = (
             f"SELECT {self.select_list} "
-            + f"FROM {self.relation.child_schema_object.table_name} "
-            + f"WHERE {self.relation.child_property.column_name} "
-            + f"IN ( SELECT {self.relation.parent_property.column_name} "
+            + self.relation.subselect_condition
             + f"FROM {self.parent_generator.table_expression}"
             + f"{self.parent_generator.search_condition} "
             #            + f"{order_by} {limit} {offset})"
             + ")"
         )
         self.search_placeholders = self.parent_generator.search_placeholders
+        self.shape_filters = [
+            {
+                "table": self.relation.join_shape["table"],
+                "column": self.relation.join_shape["column"],
+                "operator": "in",
+            }
+        ]
         #        self._execute_sql(args["cursor"], sql, query_parameters)
         return sql
@@ -21,7 +21,12 @@ class GatewaySpec:
     function_invoke_arn: str
 
     def __init__(
-        self, *, function_name: str, function_invoke_arn, enable_cors: bool = False
+        self,
+        *,
+        function_name: str,
+        function_invoke_arn,
+        enable_cors: bool = False,
+        enable_batch: bool = False,
     ):
         self.function_name = function_name
         self.function_invoke_arn = function_invoke_arn
@@ -31,6 +36,11 @@ class GatewaySpec:
         self.api_spec = dict(self.remove_custom_attributes(copy.deepcopy(document)))
         if enable_cors:
             self.enable_cors()
+        if enable_batch:
+            self.enable_batch()
+
+        # compressed responses are returned base64 encoded by the function
+        self.api_spec["x-amazon-apigateway-binary-media-types"] = ["*/*"]
 
         for schema_name in ModelFactory.get_schema_names():
             self.generate_crud_operations(
@@ -97,6 +107,43 @@ class GatewaySpec:
 
         self.api_spec.setdefault("paths", {}).setdefault(path, {})[method] = operation
 
+    def enable_batch(self):
+        """
+        Add the batch operation, a list of requests executed together with
+        the requests on each database run in a single transaction.
+        """
+        self.add_operation(
+            "/_batch",
+            "post",
+            {
+                "summary": "Execute a batch of requests",
+                "requestBody": {
+                    "required": True,
+                    "content": {
+                        "application/json": {
+                            "schema": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "required": ["entity"],
+                                    "properties": {
+                                        "method": {"type": "string"},
+                                        "entity": {"type": "string"},
+                                        "params": {"type": "object"},
+                                        "body": {"type": "object"},
+                                    },
+                                },
+                            }
+                        }
+                    },
+                },
+                "responses": {
+                    "200": {"description": "All requests succeeded"},
+                    "207": {"description": "One or more requests failed"},
+                },
+            },
+        )
+
     def enable_cors(self):
         self.add_operation(
             "/{proxy+}",
@@ -195,8 +242,16 @@ class GatewaySpec:
         if len(regex_pattern) == 0:
             regex_pattern = ".*"
 
+        # text search operators only apply to strings
+        text_search = (
+            "|like::.+|ilike::.+|starts::.+|fts::.+"
+            if property.api_type == "string"
+            else ""
+        )
+
         return (
             f"^(({regex_pattern})|lt::|le::|eq::|ne::|ge::|gt::"
+            + text_search
             + f"|between::({regex_pattern}),"
             + f"|not-between::({regex_pattern}),"
             + f"|in::(({regex_pattern}),)*)$"
@@ -1,42 +1,200 @@
-import json
+import base64
+import itertools
 import logging
 import os
 
 from api_maker.utils.app_exception import ApplicationException
-from api_maker.adapters.gateway_adapter import GatewayAdapter
+from api_maker.adapters.gateway_adapter import GatewayAdapter, get_header
+from api_maker.services.notification_publisher import notification_publisher
+from api_maker.utils.compression import (
+    COMPRESSION_THRESHOLD,
+    compress,
+    select_encoding,
+)
+from api_maker.utils import metrics, tracing
+from api_maker.utils.json_codec import dumps
 from api_maker.utils.model_factory import ModelFactory
 
 log = logging.getLogger(__name__)
 
-ModelFactory.load_yaml(os.environ.get("API_SPEC", "/var/task/api_spec.yaml"))
+ModelFactory.load(os.environ.get("API_SPEC", "/var/task/api_spec.yaml"))
 adapter = GatewayAdapter()
 
+NDJSON = "application/x-ndjson"
+
+# resource of batch requests, see GatewaySpec enable_batch
+BATCH_RESOURCE = "/_batch"
+
+# separates the status and headers from the body of a streamed http response
+STREAM_PRELUDE_DELIMITER = b"\x00" * 8
+
+
+def accepts_ndjson(event) -> bool:
+    return NDJSON in get_header(event, "accept")
+
+
+def serialize(value) -> bytes:
+    with metrics.timer("serialize"):
+        body = dumps(value)
+    metrics.add_metric("payload_bytes", len(body), "Bytes")
+    return body
+
+
+def serialize_ndjson(batch: list) -> bytes:
+    with metrics.timer("serialize"):
+        chunk = b"".join(dumps(record) + b"\n" for record in batch)
+    metrics.add_metric("payload_bytes", len(chunk), "Bytes")
+    return chunk
+
+
+def http_response(event, status_code: int, content_type: str, body: bytes) -> dict:
+    """
+    Build the API Gateway response, bodies larger than the compression
+    threshold are compressed using the encoding accepted by the client
+    and returned base64 encoded.
+    """
+    response = {
+        "isBase64Encoded": False,
+        "statusCode": status_code,
+        "headers": {"Content-Type": content_type},
+        "body": None,
+    }
+
+    if len(body) < COMPRESSION_THRESHOLD:
+        response["body"] = body.decode("utf-8")
+        return response
+
+    encoding = select_encoding(get_header(event, "accept-encoding"))
+    response["headers"]["Vary"] = "Accept-Encoding"
+    if encoding:
+        response["headers"]["Content-Encoding"] = encoding
+        response["body"] = base64.b64encode(compress(body, encoding)).decode("ascii")
+        response["isBase64Encoded"] = True
+    else:
+        response["body"] = body.decode("utf-8")
+    return response
+
 
 def lambda_handler(event, _):
     log.debug(f"event: {event}")
+    notification_publisher.wait()
+    with metrics.request_metrics(), tracing.request_span(event) as span:
+        response = handle_event(event)
+        if span is not None:
+            span.set_attribute("http.status_code", response["statusCode"])
+        # mutation notifications are sent once the response is computed
+        notification_publisher.flush_pending()
+        return response
+
+
+def handle_event(event) -> dict:
     try:
+        if event.get("resource") == BATCH_RESOURCE:
+            results = adapter.process_batch_event(event)
+            # 207 Multi-Status when any operation of the batch failed
+            status_code = (
+                200 if all(result["status"] == 200 for result in results) else 207
+            )
+            return http_response(
+                event, status_code, "application/json", serialize(results)
+            )
+
+        if accepts_ndjson(event):
+            body = b"".join(
+                serialize_ndjson(batch) for batch in adapter.process_event_stream(event)
+            )
+            return http_response(event, 200, NDJSON, body)
+
         response = adapter.process_event(event)
 
         # Ensure the response conforms to API Gateway requirements
-        return {
-            "isBase64Encoded": False,
-            "statusCode": 200,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps(response),
-        }
+        return http_response(event, 200, "application/json", serialize(response))
     except ApplicationException as e:
         log.error(f"exception: {e}", exc_info=True)
-        return {
-            "isBase64Encoded": False,
-            "statusCode": e.status_code,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps({"message": f"exception: {e}"}),
-        }
+        metrics.add_metric("errors", 1)
+        return http_response(
+            event,
+            e.status_code,
+            "application/json",
+            dumps({"message": f"exception: {e}"}),
+        )
+    except Exception as e:
+        log.error(f"exception: {e}", exc_info=True)
+        metrics.add_metric("errors", 1)
+        return http_response(
+            event, 500, "application/json", dumps({"message": f"exception: {e}"})
+        )
+
+
+def write_prelude(response_stream, status_code: int, content_type: str):
+    prelude = {"statusCode": status_code, "headers": {"Content-Type": content_type}}
+    response_stream.write(dumps(prelude))
+    response_stream.write(STREAM_PRELUDE_DELIMITER)
+
+
+def stream_handler(event, response_stream):
+    """
+    Lambda handler writing the result to a response stream as the
+    records are read from the database.
+
+    Results are written as newline delimited JSON when the request
+    accepts application/x-ndjson, otherwise as a JSON array.  The status
+    line is sent with the first batch so errors raised before any records
+    are read are still reported with their status code.
+
+    Parameters:
+    - event (dict): Lambda event object.
+    - response_stream: Writable stream accepting bytes, see
+        api_maker.iac.streaming_runtime.
+    """
+    log.debug(f"event: {event}")
+    notification_publisher.wait()
+    with metrics.request_metrics(), tracing.request_span(event):
+        try:
+            stream_event(event, response_stream)
+        finally:
+            # the stream is closed so the client has the complete response,
+            # the notifications are sent inline since a background send may
+            # be lost when the instance is frozen
+            notification_publisher.flush_pending(background=False)
+
+
+def stream_event(event, response_stream):
+    ndjson = accepts_ndjson(event)
+    started = False
+    try:
+        batches = adapter.process_event_stream(event)
+        # read the first batch before sending the status so errors in
+        # the request or query are reported with their status code
+        first = next(batches, [])
+
+        write_prelude(response_stream, 200, NDJSON if ndjson else "application/json")
+        started = True
+
+        separator = b""
+        if not ndjson:
+            response_stream.write(b"[")
+        for batch in itertools.chain([first], batches):
+            if not batch:
+                continue
+            if ndjson:
+                chunk = serialize_ndjson(batch)
+            else:
+                with metrics.timer("serialize"):
+                    chunk = separator + b",".join(dumps(record) for record in batch)
+                metrics.add_metric("payload_bytes", len(chunk), "Bytes")
+                separator = b","
+            response_stream.write(chunk)
+        if not ndjson:
+            response_stream.write(b"]")
     except Exception as e:
         log.error(f"exception: {e}", exc_info=True)
-        return {
-            "isBase64Encoded": False,
-            "statusCode": 500,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps({"message": f"exception: {e}"}),
-        }
+        metrics.add_metric("errors", 1)
+        if not started:
+            status_code = e.status_code if isinstance(e, ApplicationException) else 500
+            write_prelude(response_stream, status_code, "application/json")
+            response_stream.write(dumps({"message": f"exception: {e}"}))
+        # otherwise the status has been sent, the stream ends with an
+        # incomplete body
+    finally:
+        response_stream.close()
@@ -0,0 +1,57 @@
+import json
+import logging
+import os
+from typing import Optional
+
+from api_maker.connectors.connection_factory import connection_factory
+from api_maker.services.outbox import OutboxRelay
+
+log = logging.getLogger(__name__)
+
+
+def outbox_databases() -> list[str]:
+    """
+    The databases whose outboxes are drained, the OUTBOX_DATABASES comma
+    separated list or by default the databases of the SECRETS map.
+    """
+    databases = os.environ.get("OUTBOX_DATABASES")
+    if databases:
+        return [database.strip() for database in databases.split(",") if database]
+    return list(json.loads(os.environ.get("SECRETS", "{}")).keys())
+
+
+def relay(databases: list[str], topic_arn: str, sns_client=None) -> dict[str, int]:
+    """
+    Drain the outbox of each database, returning the number of events
+    published by database.  A database that can not be drained does not
+    prevent the others from being drained.
+    """
+    published = {}
+    for database in databases:
+        try:
+            connection = connection_factory.get_connection(database)
+        except Exception as error:
+            log.error(f"outbox connection failed, database: {database}: {error}")
+            continue
+        try:
+            published[database] = OutboxRelay(
+                database, topic_arn, sns_client=sns_client
+            ).drain(connection)
+        except Exception as error:
+            log.error(f"outbox relay failed, database: {database}: {error}")
+        finally:
+            connection.close()
+    return published
+
+
+def lambda_handler(event: Optional[dict] = None, context=None) -> dict:
+    """
+    Relay entry point, invoked on a schedule such as an EventBridge rule.
+    """
+    topic_arn = os.environ.get("BROADCAST_TOPIC")
+    if not topic_arn:
+        log.error("BROADCAST_TOPIC is not set, outbox events are not relayed")
+        return {"published": {}}
+    published = relay(outbox_databases(), topic_arn)
+    log.info(f"outbox events published: {published}")
+    return {"published": published}
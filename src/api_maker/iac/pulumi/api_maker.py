@@ -44,9 +44,11 @@ class APIMaker(pulumi.ComponentResource):
             requirements=[
                 "psycopg2-binary",
                 "pyyaml",
+                "orjson",
                 #                "-e /Users/clydedanielrepik/workspace/api_maker",
             ],
             working_dir="temp",
+            api_spec="api_spec.yaml",
         )
 
         lambda_function = PythonFunctionCloudprint(
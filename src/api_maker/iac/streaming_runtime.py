@@ -0,0 +1,122 @@
+"""
+Minimal Lambda custom runtime streaming responses with the Runtime API.
+
+The managed Python runtimes buffer the handler result, this runtime
+invokes a handler with a writable response stream and forwards each
+write to the Runtime API as a chunk of the response.
+
+Used as the bootstrap of a function deployed with a custom runtime and
+a response streaming function url;
+
+    exec python3 -m api_maker.iac.streaming_runtime app.stream_handler
+"""
+
+import importlib
+import json
+import logging
+import os
+import sys
+import traceback
+from http.client import HTTPConnection
+
+log = logging.getLogger(__name__)
+
+RUNTIME_PATH = "/2018-06-01/runtime"
+HTTP_INTEGRATION = "application/vnd.awslambda.http-integration-response"
+
+
+class RuntimeResponseStream:
+    """
+    Writable stream sending a chunked streaming response for one invocation.
+    """
+
+    def __init__(self, runtime_api: str, request_id: str):
+        self.connection = HTTPConnection(runtime_api)
+        self.connection.putrequest(
+            "POST", f"{RUNTIME_PATH}/invocation/{request_id}/response"
+        )
+        self.connection.putheader("Lambda-Runtime-Function-Response-Mode", "streaming")
+        self.connection.putheader("Transfer-Encoding", "chunked")
+        self.connection.putheader("Content-Type", HTTP_INTEGRATION)
+        self.connection.endheaders()
+        self.closed = False
+
+    def write(self, data: bytes):
+        if data:
+            self.connection.send(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.connection.send(b"0\r\n\r\n")
+        response = self.connection.getresponse()
+        response.read()
+        self.connection.close()
+        if response.status >= 300:
+            log.error(f"runtime api rejected response: {response.status}")
+
+
+def post_error(runtime_api: str, path: str, error: Exception):
+    connection = HTTPConnection(runtime_api)
+    connection.request(
+        "POST",
+        path,
+        body=json.dumps(
+            {
+                "errorMessage": str(error),
+                "errorType": type(error).__name__,
+                "stackTrace": traceback.format_exc().splitlines(),
+            }
+        ),
+        headers={"Content-Type": "application/json"},
+    )
+    connection.getresponse().read()
+    connection.close()
+
+
+def load_handler(name: str):
+    module_name, function_name = name.rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def process_next_invocation(runtime_api: str, handler):
+    """
+    Fetch the next event from the Runtime API and stream the handler
+    response for it.
+
+    Parameters:
+    - runtime_api (str): host:port of the Runtime API.
+    - handler (callable): Called with the event and a RuntimeResponseStream.
+    """
+    connection = HTTPConnection(runtime_api)
+    connection.request("GET", f"{RUNTIME_PATH}/invocation/next")
+    response = connection.getresponse()
+    request_id = response.getheader("Lambda-Runtime-Aws-Request-Id")
+    event = json.loads(response.read() or b"{}")
+    connection.close()
+
+    stream = RuntimeResponseStream(runtime_api, request_id)
+    try:
+        handler(event, stream)
+    except Exception as error:
+        log.error(f"exception: {error}", exc_info=True)
+    finally:
+        stream.close()
+
+
+def main():
+    runtime_api = os.environ["AWS_LAMBDA_RUNTIME_API"]
+    handler_name = sys.argv[1] if len(sys.argv) > 1 else os.environ["_HANDLER"]
+    try:
+        handler = load_handler(handler_name)
+    except Exception as error:
+        post_error(runtime_api, f"{RUNTIME_PATH}/init/error", error)
+        raise
+
+    while True:
+        process_next_invocation(runtime_api, handler)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+import argparse
+import json
+import sys
+import yaml
+
+# planner defaults used by PostgreSQL when no statistics are available
+DEFAULT_EQ_SELECTIVITY = 0.005
+DEFAULT_RANGE_SELECTIVITY = 1.0 / 3.0
+
+EQUALITY_OPERATORS = {"eq", "in"}
+RANGE_OPERATORS = {"lt", "le", "gt", "ge", "between"}
+
+
+def read_query_shapes(lines) -> list[dict]:
+    """
+    Collect the query shapes logged by SQLSelectSchemaQueryHandler.
+
+    Parameters:
+    - lines (iterable of str): Log lines, lines without a query shape are
+        ignored so raw CloudWatch exports can be used.
+
+    Returns:
+    - list of dict: The distinct shapes, each with an 'occurrences' count.
+    """
+    shapes = {}
+    for line in lines:
+        marker = line.find("query_shape: ")
+        if marker < 0:
+            continue
+        try:
+            shape = json.loads(line[marker + len("query_shape: ") :])  # noqa E203
+        except json.JSONDecodeError:
+            continue
+        key = json.dumps(shape, sort_keys=True)
+        if key not in shapes:
+            shapes[key] = {**shape, "occurrences": 0}
+        shapes[key]["occurrences"] += 1
+    return list(shapes.values())
+
+
+class PostgresCatalog:
+    def __init__(self, host, database, user, password):
+        import psycopg2
+
+        self.connection = psycopg2.connect(
+            host=host, database=database, user=user, password=password
+        )
+
+    def split_table_name(self, table_name: str) -> tuple[str, str]:
+        parts = table_name.split(".", 1)
+        return (parts[0], parts[1]) if len(parts) > 1 else ("public", parts[0])
+
+    def get_indexes(self, table_name: str) -> list[dict]:
+        query = """
+        SELECT i.relname, pg_get_indexdef(x.indexrelid),
+               array(SELECT a.attname
+                     FROM unnest(x.indkey) WITH ORDINALITY AS k(attnum, n)
+                     JOIN pg_attribute a
+                       ON a.attrelid = x.indrelid AND a.attnum = k.attnum
+                     ORDER BY k.n)
+        FROM pg_index x
+        JOIN pg_class t ON t.oid = x.indrelid
+        JOIN pg_class i ON i.oid = x.indexrelid
+        JOIN pg_namespace n ON n.oid = t.relnamespace
+        WHERE n.nspname = %s AND t.relname = %s
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, self.split_table_name(table_name))
+            return [
+                {"name": name, "definition": definition, "columns": list(columns)}
+                for name, definition, columns in cursor.fetchall()
+            ]
+
+    def get_row_count(self, table_name: str) -> float:
+        query = """
+        SELECT c.reltuples
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = %s AND c.relname = %s
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, self.split_table_name(table_name))
+            row = cursor.fetchone()
+        return float(row[0]) if row and row[0] > 0 else 0.0
+
+    def get_column_stats(self, table_name: str) -> dict[str, dict]:
+        query = """
+        SELECT attname, n_distinct, null_frac
+        FROM pg_stats
+        WHERE schemaname = %s AND tablename = %s
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, self.split_table_name(table_name))
+            return {
+                column: {"n_distinct": n_distinct, "null_frac": null_frac}
+                for column, n_distinct, null_frac in cursor.fetchall()
+            }
+
+    def close_connection(self):
+        self.connection.close()
+
+
+class IndexAdvisor:
+    """
+    Compares observed query shapes with the existing indexes and suggests
+    indexes for the table accesses no index supports.
+
+    The catalog must provide get_indexes, get_row_count and
+    get_column_stats for a table name, see PostgresCatalog.
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self._tables = {}
+
+    def table(self, table_name: str) -> dict:
+        if table_name not in self._tables:
+            self._tables[table_name] = {
+                "indexes": self.catalog.get_indexes(table_name),
+                "rows": self.catalog.get_row_count(table_name),
+                "stats": self.catalog.get_column_stats(table_name),
+            }
+        return self._tables[table_name]
+
+    def analyze(self, shapes: list[dict]) -> list[dict]:
+        """
+        Build the report of uncovered table accesses.
+
+        Parameters:
+        - shapes (list of dict): Query shapes as returned by read_query_shapes.
+
+        Returns:
+        - list of dict: One entry per suggested index ordered by the
+            estimated benefit, shapes needing the same index are merged.
+        """
+        suggestions = {}
+        for shape in shapes:
+            for access in self.table_accesses(shape):
+                suggestion = self.suggest(access)
+                if not suggestion:
+                    continue
+                key = suggestion["create_index"]
+                if key in suggestions:
+                    existing = suggestions[key]
+                    existing["occurrences"] += suggestion["occurrences"]
+                    existing["estimated_benefit"] += suggestion["estimated_benefit"]
+                    existing["shapes"].extend(suggestion["shapes"])
+                else:
+                    suggestions[key] = suggestion
+
+        return sorted(
+            suggestions.values(),
+            key=lambda s: (s["estimated_benefit"], s["occurrences"]),
+            reverse=True,
+        )
+
+    def table_accesses(self, shape: dict) -> list[dict]:
+        """
+        Split a shape into the columns used to access each table.  Joined
+        tables are accessed through their join column.
+        """
+        accesses = {}
+
+        def access(table_name: str) -> dict:
+            return accesses.setdefault(
+                table_name,
+                {
+                    "table": table_name,
+                    "equality": [],
+                    "range": [],
+                    "sort": [],
+                    "operation_id": shape.get("operation_id"),
+                    "occurrences": shape.get("occurrences", 1),
+                },
+            )
+
+        access(shape["table"])
+        for join in shape.get("joins", []):
+            access(join["table"])["equality"].append(join["column"])
+
+        for filter in shape.get("filters", []):
+            if filter["operator"] in EQUALITY_OPERATORS:
+                access(filter["table"])["equality"].append(filter["column"])
+            elif filter["operator"] in RANGE_OPERATORS:
+                access(filter["table"])["range"].append(filter["column"])
+
+        # sorting can only use an index when every sort column is in
+        # the driving table
+        sort = shape.get("sort", [])
+        if sort and all(s["table"] == shape["table"] for s in sort):
+            access(shape["table"])["sort"] = [s["column"] for s in sort]
+
+        return list(accesses.values())
+
+    def distinct_values(self, table_name: str, column: str) -> float | None:
+        table = self.table(table_name)
+        n_distinct = table["stats"].get(column, {}).get("n_distinct")
+        if n_distinct is None or n_distinct == 0:
+            return None
+        if n_distinct < 0:
+            return -n_distinct * table["rows"]
+        return n_distinct
+
+    def selectivity(self, table_name: str, column: str) -> float:
+        distinct = self.distinct_values(table_name, column)
+        return 1.0 / distinct if distinct else DEFAULT_EQ_SELECTIVITY
+
+    def candidate_columns(self, access: dict) -> list[str]:
+        # equality columns lead, most selective first, followed by a
+        # single range column or the sort columns
+        columns = sorted(
+            dict.fromkeys(access["equality"]),
+            key=lambda c: self.selectivity(access["table"], c),
+        )
+        if access["range"]:
+            columns.append(access["range"][0])
+        elif access["sort"]:
+            columns.extend(access["sort"])
+        return list(dict.fromkeys(columns))
+
+    def is_covered(self, access: dict) -> bool:
+        filter_columns = set(access["equality"]) | set(access["range"])
+        for index in self.table(access["table"])["indexes"]:
+            columns = index["columns"]
+            if not columns:
+                continue
+            if filter_columns and columns[0] in filter_columns:
+                return True
+            if (
+                not filter_columns
+                and access["sort"]
+                and columns[: len(access["sort"])] == access["sort"]
+            ):
+                return True
+        return False
+
+    def suggest(self, access: dict) -> dict | None:
+        columns = self.candidate_columns(access)
+        if not columns or self.is_covered(access):
+            return None
+
+        table_name = access["table"]
+        rows = self.table(table_name)["rows"]
+        selectivity = 1.0
+        for column in dict.fromkeys(access["equality"]):
+            selectivity *= self.selectivity(table_name, column)
+        if access["range"]:
+            selectivity *= DEFAULT_RANGE_SELECTIVITY
+        estimated_rows = max(1.0, rows * selectivity) if rows else 0.0
+
+        # without a filter the index only saves the sort
+        rows_avoided = (
+            rows - estimated_rows if len(columns) > len(access["sort"]) else 0
+        )
+        base_name = table_name.split(".")[-1]
+        index_name = f"ix_{base_name}_{'_'.join(columns)}"[:63]
+
+        return {
+            "table": table_name,
+            "columns": columns,
+            "create_index": (
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} "
+                + f"ON {table_name} ({', '.join(columns)});"
+            ),
+            "existing_indexes": [
+                index["definition"] for index in self.table(table_name)["indexes"]
+            ],
+            "table_rows": rows,
+            "estimated_rows": round(estimated_rows, 1),
+            "avoids_sort": bool(access["sort"]) and not access["range"],
+            "occurrences": access["occurrences"],
+            "estimated_benefit": round(rows_avoided * access["occurrences"], 1),
+            "shapes": [
+                {
+                    "operation_id": access["operation_id"],
+                    "equality": access["equality"],
+                    "range": access["range"],
+                    "sort": access["sort"],
+                }
+            ],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Suggest PostgreSQL indexes for logged api-maker query shapes."
+    )
+    parser.add_argument("--host", required=True, help="PostgreSQL database host")
+    parser.add_argument("--database", required=True, help="PostgreSQL database name")
+    parser.add_argument("--user", required=True, help="PostgreSQL database user")
+    parser.add_argument(
+        "--password", required=True, help="PostgreSQL database password"
+    )
+    parser.add_argument(
+        "--shapes",
+        required=True,
+        help="Log file containing the query_shape lines, '-' for stdin",
+    )
+    parser.add_argument(
+        "--output", help="Output file path for the report (default: stdout)"
+    )
+
+    args = parser.parse_args()
+
+    if args.shapes == "-":
+        shapes = read_query_shapes(sys.stdin)
+    else:
+        with open(args.shapes, "r") as file:
+            shapes = read_query_shapes(file)
+
+    catalog = PostgresCatalog(
+        host=args.host,
+        database=args.database,
+        user=args.user,
+        password=args.password,
+    )
+    try:
+        report = IndexAdvisor(catalog).analyze(shapes)
+    finally:
+        catalog.close_connection()
+
+    if args.output:
+        with open(args.output, "w") as file:
+            yaml.dump(report, file, sort_keys=False)
+    else:
+        yaml.dump(report, sys.stdout, sort_keys=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+# statements sent to the database, each is one round trip
+ROUND_TRIP_METHODS = {
+    "cursor": ["execute", "stream"],
+    "connection": ["commit", "rollback", "get_connection"],
+}
+
+PERCENTILES = [50, 95, 99]
+
+
+def gateway_event(
+    method: str,
+    resource: str,
+    path_parameters: Optional[dict] = None,
+    query: Optional[dict] = None,
+    body: Optional[dict] = None,
+) -> dict:
+    """
+    An API Gateway proxy event, path parameters are substituted into the
+    resource to form the path.
+    """
+    path = resource
+    for name, value in (path_parameters or {}).items():
+        path = path.replace(f"{{{name}}}", str(value))
+    return {
+        "resource": resource,
+        "path": path,
+        "httpMethod": method,
+        "headers": {"Accept": "application/json"},
+        "pathParameters": (
+            {name: str(value) for name, value in path_parameters.items()}
+            if path_parameters
+            else None
+        ),
+        "queryStringParameters": query,
+        "body": json.dumps(body) if body is not None else None,
+        "isBase64Encoded": False,
+    }
+
+
+class Scenario:
+    """
+    A sequence of requests executed by one worker, each request is built
+    from the results of the previous requests of the scenario.
+    """
+
+    def __init__(self, name: str, weight: int, steps: List[tuple]):
+        self.name = name
+        self.weight = weight
+        # (label, build(rng, results) -> event)
+        self.steps = steps
+
+
+def read_scenarios() -> List[Scenario]:
+    return [
+        Scenario(
+            "invoice_filter",
+            30,
+            [
+                (
+                    "GET /invoice",
+                    lambda rng, _: gateway_event(
+                        "GET",
+                        "/invoice",
+                        query={
+                            "total": f"gt::{rng.randint(1, 10)}",
+                            "billing_country": rng.choice(["USA", "Canada", "France"]),
+                            "__sort": "invoice_date:desc",
+                            "__limit": "20",
+                        },
+                    ),
+                )
+            ],
+        ),
+        Scenario(
+            "invoice_customer",
+            25,
+            [
+                (
+                    "GET /invoice/{invoice_id}",
+                    lambda rng, _: gateway_event(
+                        "GET",
+                        "/invoice/{invoice_id}",
+                        path_parameters={"invoice_id": rng.randint(1, 412)},
+                        query={"__properties": ".* customer:.*"},
+                    ),
+                )
+            ],
+        ),
+        Scenario(
+            "customer_invoices",
+            15,
+            [
+                (
+                    "GET /customer",
+                    lambda rng, _: gateway_event(
+                        "GET",
+                        "/customer",
+                        query={
+                            "country": rng.choice(["USA", "Canada", "Brazil"]),
+                            "__properties": ".* invoice_items:.*",
+                        },
+                    ),
+                )
+            ],
+        ),
+        Scenario(
+            "track_sort",
+            20,
+            [
+                (
+                    "GET /track",
+                    lambda rng, _: gateway_event(
+                        "GET",
+                        "/track",
+                        query={
+                            "genre_id": f"in::{rng.randint(1, 12)},{rng.randint(13, 25)}",  # noqa E501
+                            "__sort": "name",
+                            "__limit": "50",
+                        },
+                    ),
+                )
+            ],
+        ),
+    ]
+
+
+def write_scenarios() -> List[Scenario]:
+    def invoice_path(results: list) -> dict:
+        invoice = results[-1][0]
+        return {
+            "invoice_id": invoice["invoice_id"],
+            "last_updated": invoice["last_updated"],
+        }
+
+    concurrency_resource = "/invoice/{invoice_id}/last_updated/{last_updated}"
+    return [
+        Scenario(
+            "invoice_lifecycle",
+            5,
+            [
+                (
+                    "POST /invoice",
+                    lambda rng, _: gateway_event(
+                        "POST",
+                        "/invoice",
+                        body={
+                            "customer_id": rng.randint(1, 59),
+                            "invoice_date": "2024-03-17T00:00:00",
+                            "billing_city": "Load Test",
+                            "total": round(rng.uniform(1, 20), 2),
+                        },
+                    ),
+                ),
+                (
+                    f"PUT {concurrency_resource}",
+                    lambda rng, results: gateway_event(
+                        "PUT",
+                        concurrency_resource,
+                        path_parameters=invoice_path(results),
+                        body={"total": round(rng.uniform(1, 20), 2)},
+                    ),
+                ),
+                (
+                    f"DELETE {concurrency_resource}",
+                    lambda rng, results: gateway_event(
+                        "DELETE",
+                        concurrency_resource,
+                        path_parameters=invoice_path(results),
+                    ),
+                ),
+            ],
+        ),
+        Scenario(
+            "media_type_lifecycle",
+            5,
+            [
+                (
+                    "POST /media_type",
+                    lambda rng, _: gateway_event(
+                        "POST", "/media_type", body={"name": "load test"}
+                    ),
+                ),
+                (
+                    "PUT /media_type/{media_type_id}",
+                    lambda rng, results: gateway_event(
+                        "PUT",
+                        "/media_type/{media_type_id}",
+                        path_parameters={
+                            "media_type_id": results[-1][0]["media_type_id"]
+                        },
+                        body={"name": "load test updated"},
+                    ),
+                ),
+                (
+                    "DELETE /media_type/{media_type_id}",
+                    lambda rng, results: gateway_event(
+                        "DELETE",
+                        "/media_type/{media_type_id}",
+                        path_parameters={
+                            "media_type_id": results[-1][0]["media_type_id"]
+                        },
+                    ),
+                ),
+            ],
+        ),
+    ]
+
+
+class RoundTripCounter:
+    """
+    Counts the database round trips of each thread.
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+
+    @property
+    def count(self) -> int:
+        return getattr(self.local, "count", 0)
+
+    def reset(self):
+        self.local.count = 0
+
+    def wrap(self, method: Callable) -> Callable:
+        counter = self
+
+        def counted(*args, **kwargs):
+            counter.local.count = counter.count + 1
+            return method(*args, **kwargs)
+
+        return counted
+
+
+@contextmanager
+def count_round_trips(cursor_class=None, connection_class=None) -> Iterator:
+    """
+    Count the calls that reach the database while the context is active,
+    by default those of the Postgres cursor and connection.
+    """
+    if cursor_class is None or connection_class is None:
+        from api_maker.connectors.postgres_connection import (
+            PostgresConnection,
+            PostgresCursor,
+        )
+
+        cursor_class = cursor_class or PostgresCursor
+        connection_class = connection_class or PostgresConnection
+
+    counter = RoundTripCounter()
+    originals = []
+    for cls, names in [
+        (cursor_class, ROUND_TRIP_METHODS["cursor"]),
+        (connection_class, ROUND_TRIP_METHODS["connection"]),
+    ]:
+        for name in names:
+            if name in cls.__dict__:
+                originals.append((cls, name, cls.__dict__[name]))
+                setattr(cls, name, counter.wrap(cls.__dict__[name]))
+    try:
+        yield counter
+    finally:
+        for cls, name, method in originals:
+            setattr(cls, name, method)
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    The nearest rank percentile of the values.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: List[dict], elapsed: float) -> dict:
+    """
+    Summarize the request samples, overall and by request label.
+
+    Parameters:
+    - samples (list of dict): The 'label', 'latency_ms', 'status' and
+        'round_trips' of each request.
+    - elapsed (float): The wall clock seconds of the run.
+    """
+
+    def summary(group: List[dict]) -> dict:
+        latencies = [sample["latency_ms"] for sample in group]
+        result = {
+            "requests": len(group),
+            "errors": sum(1 for sample in group if sample["status"] >= 400),
+            "round_trips_per_request": round(
+                sum(sample["round_trips"] for sample in group) / max(len(group), 1),
+                2,
+            ),
+        }
+        for percent in PERCENTILES:
+            result[f"p{percent}_ms"] = round(percentile(latencies, percent), 2)
+        return result
+
+    labels: Dict[str, List[dict]] = {}
+    for sample in samples:
+        labels.setdefault(sample["label"], []).append(sample)
+
+    return {
+        "elapsed_sec": round(elapsed, 2),
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        **summary(samples),
+        "requests_by_label": {
+            label: summary(group) for label, group in sorted(labels.items())
+        },
+    }
+
+
+def run_load(
+    handler: Callable,
+    scenarios: List[Scenario],
+    workers: int,
+    iterations: int,
+    counter: Optional[RoundTripCounter] = None,
+    seed: int = 0,
+) -> dict:
+    """
+    Run the scenarios against a lambda handler with concurrent workers.
+
+    Parameters:
+    - handler (callable): The lambda handler, called with (event, None).
+    - scenarios (list of Scenario): The scenarios picked by weight.
+    - workers (int): The number of concurrent workers.
+    - iterations (int): The scenarios each worker runs.
+    - counter (RoundTripCounter): Counts the round trips of each request.
+    - seed (int): Seed of the random scenario selection.
+
+    Returns:
+    - dict: The latency percentiles, throughput and round trips, see summarize.
+    """
+    weights = [scenario.weight for scenario in scenarios]
+
+    def worker(index: int) -> List[dict]:
+        rng = random.Random(seed + index)
+        samples = []
+        for _ in range(iterations):
+            scenario = rng.choices(scenarios, weights)[0]
+            results: list = []
+            for label, build in scenario.steps:
+                event = build(rng, results)
+                if counter:
+                    counter.reset()
+                start = time.perf_counter()
+                response = handler(event, None)
+                latency_ms = (time.perf_counter() - start) * 1000
+                samples.append(
+                    {
+                        "label": label,
+                        "latency_ms": latency_ms,
+                        "status": response["statusCode"],
+                        "round_trips": counter.count if counter else 0,
+                    }
+                )
+                if response["statusCode"] >= 400:
+                    # later steps depend on the result of this one
+                    break
+                results.append(json.loads(response["body"]))
+        return samples
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        samples = [
+            sample
+            for worker_samples in executor.map(worker, range(workers))
+            for sample in worker_samples
+        ]
+    return summarize(samples, time.perf_counter() - start)
+
+
+def format_summary(summary: dict) -> str:
+    header = (
+        f"{'request':<56} {'count':>7} {'errors':>6} {'p50 ms':>8} "
+        + f"{'p95 ms':>8} {'p99 ms':>8} {'trips':>6}"
+    )
+
+    def line(label: str, result: dict) -> str:
+        return (
+            f"{label:<56} {result['requests']:>7} {result['errors']:>6} "
+            + f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+            + f"{result['p99_ms']:>8.2f} {result['round_trips_per_request']:>6.2f}"
+        )
+
+    lines = [header]
+    for label, result in summary["requests_by_label"].items():
+        lines.append(line(label, result))
+    lines.append(line("all", summary))
+    lines.append(
+        f"throughput: {summary['throughput_rps']} requests/sec "
+        + f"in {summary['elapsed_sec']} sec"
+    )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a load test of the lambda handler in process against "
+        + "a local PostgreSQL Chinook database."
+    )
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=5432)
+    parser.add_argument("--database", default="chinook_auto_increment")
+    parser.add_argument("--user", default="chinook_user")
+    parser.add_argument("--password", default="chinook_password")
+    parser.add_argument("--api-spec", default="resources/chinook_api.yaml")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument(
+        "--iterations", type=int, default=100, help="Scenarios run by each worker"
+    )
+    parser.add_argument(
+        "--read-only", action="store_true", help="Only run the read scenarios"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="File the JSON summary is written to")
+    args = parser.parse_args()
+
+    # the handler loads the model when it is imported
+    os.environ["API_SPEC"] = args.api_spec
+    from api_maker.connectors.connection_factory import connection_factory
+    from api_maker.iac.handler import lambda_handler
+
+    connection_factory.db_config_map["chinook"] = {
+        "engine": "postgres",
+        "dbname": args.database,
+        "username": args.user,
+        "password": args.password,
+        "host": args.host,
+        "port": args.port,
+    }
+
+    scenarios = read_scenarios() + ([] if args.read_only else write_scenarios())
+    with count_round_trips() as counter:
+        summary = run_load(
+            lambda_handler, scenarios, args.workers, args.iterations, counter, args.seed
+        )
+
+    print(format_summary(summary))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(summary, output, indent=2)
+    if summary["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
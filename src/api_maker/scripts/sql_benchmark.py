@@ -0,0 +1,404 @@
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, time as time_of_day, timezone
+from decimal import Decimal
+from typing import Callable, Dict, Optional
+
+from api_maker.connectors.connection import Cursor
+from api_maker.dao.sql_custom_query_handler import SQLCustomQueryHandler
+from api_maker.dao.sql_delete_query_handler import SQLDeleteSchemaQueryHandler
+from api_maker.dao.sql_insert_query_handler import SQLInsertSchemaQueryHandler
+from api_maker.dao.sql_query_handler import SQLQueryHandler
+from api_maker.dao.sql_select_query_handler import SQLSelectSchemaQueryHandler
+from api_maker.dao.sql_subselect_query_handler import SQLSubselectSchemaQueryHandler
+from api_maker.dao.sql_update_query_handler import SQLUpdateSchemaQueryHandler
+from api_maker.operation import Operation
+from api_maker.utils.model_factory import ModelFactory
+
+CHINOOK_SPEC = "resources/chinook_api.yaml"
+
+# relative change allowed before a result is reported as a regression
+REGRESSION_TOLERANCE = 0.25
+
+# records returned by the benchmark cursor for each statement
+RECORDS_PER_QUERY = 100
+
+SAMPLE_VALUES = {
+    "integer": 42,
+    "number": Decimal("12.34"),
+    "float": 12.34,
+    "boolean": True,
+    "date": date(2024, 5, 17),
+    "date-time": datetime(2024, 5, 17, 12, 34, 56, tzinfo=timezone.utc),
+    "time": time_of_day(12, 34, 56),
+}
+
+# the values of the properties in a request body, as decoded from JSON
+STORE_VALUES = {
+    "integer": 42,
+    "number": 12.34,
+    "float": 12.34,
+    "boolean": "true",
+    "date": "2024-05-17",
+    "date-time": "2024-05-17T12:34:56+00:00",
+    "time": "12:34:56",
+}
+
+
+class BenchmarkCursor(Cursor):
+    """
+    A cursor returning the same synthetic record for every statement so
+    marshalling can be measured without a database.
+    """
+
+    def __init__(self, records: int = RECORDS_PER_QUERY):
+        self.records = records
+
+    def execute(self, sql: str, params: dict, selection_results: dict) -> list[dict]:
+        record = {
+            name: SAMPLE_VALUES.get(property.column_type, f"{name} value")
+            for name, property in selection_results.items()
+        }
+        return [dict(record) for _ in range(self.records)]
+
+    def close(self):
+        pass
+
+
+def synthetic_spec(tables: int = 40, columns: int = 60) -> dict:
+    """
+    A model of wide tables chained by one to one and one to many relations,
+    table_n refers to table_n-1 and lists the rows of table_n+1.
+    """
+    types = [
+        {"type": "string", "maxLength": 80},
+        {"type": "integer"},
+        {"type": "number"},
+        {"type": "string", "format": "date-time"},
+        {"type": "string", "format": "date"},
+        {"type": "boolean"},
+    ]
+    schemas = {}
+    for table in range(tables):
+        properties = {
+            "id": {"type": "integer", "x-am-primary-key": "auto"},
+            "parent_id": {"type": "integer"},
+        }
+        for column in range(columns):
+            properties[f"column_{column}"] = dict(types[column % len(types)])
+        if table > 0:
+            properties["parent"] = {
+                "$ref": f"#/components/schemas/table_{table - 1}",
+                "x-am-parent-property": "parent_id",
+            }
+        if table < tables - 1:
+            properties["children"] = {
+                "type": "array",
+                "items": {
+                    "$ref": f"#/components/schemas/table_{table + 1}",
+                    "x-am-child-property": "parent_id",
+                },
+            }
+        schemas[f"table_{table}"] = {
+            "type": "object",
+            "x-am-database": "synthetic",
+            "properties": properties,
+        }
+    return {"openapi": "3.0.0", "components": {"schemas": schemas}}
+
+
+def chinook_cases() -> Dict[str, Callable[[], SQLQueryHandler]]:
+    def schema_handler(handler_class, action: str, **params):
+        return lambda: handler_class(
+            Operation(operation_id="invoice", action=action, **params),
+            ModelFactory.get_schema_object("invoice"),
+            "postgres",
+        )
+
+    def subselect_handler():
+        operation = Operation(
+            operation_id="invoice",
+            action="read",
+            query_params={"billing_country": "USA"},
+            metadata_params={"properties": ".* invoice_line_items:.*"},
+        )
+        schema_object = ModelFactory.get_schema_object("invoice")
+        return SQLSubselectSchemaQueryHandler(
+            operation,
+            schema_object.relations["invoice_line_items"],
+            SQLSelectSchemaQueryHandler(operation, schema_object, "postgres"),
+        )
+
+    def custom_handler():
+        return SQLCustomQueryHandler(
+            Operation(
+                operation_id="top_selling_albums",
+                action="read",
+                query_params={
+                    "start": "2021-01-01T00:00:00",
+                    "end": "2021-12-31T23:59:59",
+                },
+            ),
+            ModelFactory.get_path_operation("top_selling_albums", "read"),
+            "postgres",
+        )
+
+    return {
+        "select": schema_handler(
+            SQLSelectSchemaQueryHandler,
+            "read",
+            query_params={"total": "gt::5", "billing_country": "in::USA,Canada"},
+            metadata_params={
+                "properties": ".* customer:.*",
+                "sort": "invoice_date:desc",
+                "limit": "50",
+            },
+        ),
+        "subselect": subselect_handler,
+        "insert": schema_handler(
+            SQLInsertSchemaQueryHandler,
+            "create",
+            store_params={
+                "customer_id": 2,
+                "invoice_date": "2024-03-17T00:00:00",
+                "billing_address": "Theodor-Heuss-Straße 34",
+                "billing_city": "Stuttgart",
+                "billing_country": "Germany",
+                "billing_postal_code": "70174",
+                "total": "1.98",
+            },
+        ),
+        "update": schema_handler(
+            SQLUpdateSchemaQueryHandler,
+            "update",
+            query_params={"invoice_id": "2", "last_updated": "2024-03-17T00:00:00"},
+            store_params={"billing_city": "Berlin", "total": "2.98"},
+        ),
+        "delete": schema_handler(
+            SQLDeleteSchemaQueryHandler,
+            "delete",
+            query_params={"invoice_id": "2", "last_updated": "2024-03-17T00:00:00"},
+        ),
+        "custom": custom_handler,
+    }
+
+
+def synthetic_cases() -> Dict[str, Callable[[], SQLQueryHandler]]:
+    def select_handler():
+        return SQLSelectSchemaQueryHandler(
+            Operation(
+                operation_id="table_1",
+                action="read",
+                query_params={"column_1": "gt::5", "parent.column_0": "name"},
+                metadata_params={"properties": ".* parent:.*", "sort": "column_3"},
+            ),
+            ModelFactory.get_schema_object("table_1"),
+            "postgres",
+        )
+
+    def insert_handler():
+        schema_object = ModelFactory.get_schema_object("table_1")
+        return SQLInsertSchemaQueryHandler(
+            Operation(
+                operation_id="table_1",
+                action="create",
+                store_params={
+                    name: STORE_VALUES.get(property.api_type, "value")
+                    for name, property in schema_object.properties.items()
+                    if name != "id"
+                },
+            ),
+            schema_object,
+            "postgres",
+        )
+
+    return {"wide_select": select_handler, "wide_insert": insert_handler}
+
+
+def measure(function: Callable, min_time: float) -> dict:
+    """
+    Measure the throughput and peak memory of a function.
+
+    Parameters:
+    - function (callable): The function to measure.
+    - min_time (float): The minimum time in seconds to run the function for.
+
+    Returns:
+    - dict: The 'ops_per_sec' and the 'peak_bytes' allocated by one call.
+    """
+    function()  # warm up, memoized model state is not part of the measure
+
+    iterations = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time or iterations == 0:
+        function()
+        iterations += 1
+        elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ops_per_sec": round(iterations / elapsed, 1),
+        "peak_bytes": peak - baseline,
+    }
+
+
+def benchmark_cases(
+    prefix: str, cases: Dict[str, Callable[[], SQLQueryHandler]], min_time: float
+) -> dict:
+    results = {}
+    cursor = BenchmarkCursor()
+    for name, create_handler in cases.items():
+
+        def build():
+            query_handler = create_handler()
+            return query_handler.sql, query_handler.placeholders
+
+        query_handler = create_handler()
+        record_set = cursor.execute(
+            query_handler.sql,
+            query_handler.placeholders,
+            query_handler.selection_results,
+        )
+
+        def marshal():
+            return [
+                query_handler.marshal_record(record, cursor.decoded_types)
+                for record in record_set
+            ]
+
+        results[f"{prefix}.{name}.build"] = measure(build, min_time)
+        results[f"{prefix}.{name}.marshal"] = measure(marshal, min_time)
+    return results
+
+
+def run_benchmarks(min_time: float = 0.5, api_spec: str = CHINOOK_SPEC) -> dict:
+    """
+    Run the benchmarks of every query handler against the chinook model and
+    the synthetic model.  The model is restored when the benchmarks finish.
+
+    Returns:
+    - dict: The measures keyed by '<model>.<case>.<phase>'.
+    """
+    # the model in use may have been loaded from a compiled model without
+    # its spec, so it is restored as is rather than rebuilt from the spec
+    model = (
+        ModelFactory.spec,
+        ModelFactory.schema_objects,
+        ModelFactory.path_operations,
+    )
+    try:
+        ModelFactory.load_yaml(api_spec)
+        results = benchmark_cases("chinook", chinook_cases(), min_time)
+        ModelFactory.set_spec(synthetic_spec())
+        results.update(benchmark_cases("synthetic", synthetic_cases(), min_time))
+    finally:
+        (
+            ModelFactory.spec,
+            ModelFactory.schema_objects,
+            ModelFactory.path_operations,
+        ) = model
+    return results
+
+
+def find_regressions(
+    results: dict, baseline: dict, tolerance: float = REGRESSION_TOLERANCE
+) -> list[str]:
+    """
+    Compare results to a baseline, a benchmark regresses when its throughput
+    falls or its peak memory grows by more than the tolerance.  Benchmarks
+    missing from either side are ignored.
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        if result["ops_per_sec"] < expected["ops_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {result['ops_per_sec']} ops/sec, "
+                + f"baseline {expected['ops_per_sec']} ops/sec"
+            )
+        if result["peak_bytes"] > expected["peak_bytes"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: {result['peak_bytes']} peak bytes, "
+                + f"baseline {expected['peak_bytes']} peak bytes"
+            )
+    return regressions
+
+
+def format_results(results: dict, baseline: Optional[dict] = None) -> str:
+    lines = [f"{'benchmark':<36} {'ops/sec':>12} {'peak KiB':>10} {'change':>8}"]
+    for name, result in results.items():
+        expected = (baseline or {}).get(name)
+        change = (
+            f"{result['ops_per_sec'] / expected['ops_per_sec'] - 1:+.0%}"
+            if expected
+            else ""
+        )
+        lines.append(
+            f"{name:<36} {result['ops_per_sec']:>12,.0f} "
+            + f"{result['peak_bytes'] / 1024:>10.1f} {change:>8}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the SQL generation and marshalling of the query "
+        + "handlers, comparing the results to a stored baseline."
+    )
+    parser.add_argument("--api-spec", default=CHINOOK_SPEC)
+    parser.add_argument(
+        "--baseline",
+        default="sql_benchmark_baseline.json",
+        help="Baseline file the results are compared to",
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="Store the results as the baseline"
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.5,
+        help="Minimum seconds each benchmark runs for",
+    )
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.min_time, args.api_spec)
+
+    if args.save:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+        print(format_results(results))
+        print(f"baseline saved to {args.baseline}")
+        return
+
+    try:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    except FileNotFoundError:
+        baseline = {}
+
+    print(format_results(results, baseline))
+    regressions = find_regressions(results, baseline, args.tolerance)
+    if regressions:
+        print("regressions:")
+        print("\n".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+from api_maker.utils.logger import logger
+
+log = logger(__name__)
+
+# the maximum entries of an SNS PublishBatch request
+PUBLISH_BATCH_SIZE = 10
+PUBLISH_MAX_ATTEMPTS = int(os.environ.get("PUBLISH_MAX_ATTEMPTS", 3))
+PUBLISH_RETRY_DELAY = float(os.environ.get("PUBLISH_RETRY_DELAY", 0.1))
+# send the notifications of a request from a background thread instead of
+# before the handler returns, notifications not sent when Lambda reclaims a
+# frozen instance are lost
+PUBLISH_BACKGROUND = os.environ.get("PUBLISH_BACKGROUND", "false").lower() == "true"
+
+# AWS clients by type and region, clients are thread safe and reused
+_clients: dict = {}
+
+
+def get_client(client_type: str, region: Optional[str] = None):
+    region = region or os.environ.get("AWS_REGION", "us-east-1")
+    client = _clients.get((client_type, region))
+    if client is None:
+        # boto3 is only imported when the first notification is sent
+        import boto3
+
+        client = boto3.session.Session().client(client_type, region_name=region)
+        _clients[(client_type, region)] = client
+    return client
+
+
+class NotificationPublisher:
+    """
+    Buffers the notifications of an invocation and sends them to their SNS
+    topics with PublishBatch.
+
+    Entries that fail with a service fault, or whose request fails, are
+    retried with an exponential backoff.  Entries that can not be published
+    are sent to the NOTIFICATION_DEAD_LETTER_QUEUE SQS queue, or logged when
+    no queue is configured or the queue can not be reached.
+    """
+
+    def __init__(
+        self,
+        sns_client=None,
+        sqs_client=None,
+        dead_letter_queue: Optional[str] = None,
+        max_attempts: int = PUBLISH_MAX_ATTEMPTS,
+        retry_delay: float = PUBLISH_RETRY_DELAY,
+    ):
+        self.sns_client = sns_client
+        self.sqs_client = sqs_client
+        self.dead_letter_queue = dead_letter_queue
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.pending: list[tuple[str, dict]] = []
+        self.lock = threading.Lock()
+        self.flushing: Optional[threading.Thread] = None
+
+    @property
+    def sns(self):
+        return self.sns_client or get_client("sns")
+
+    @property
+    def sqs(self):
+        return self.sqs_client or get_client("sqs")
+
+    def add(self, topic_arn: str, entry: dict):
+        """
+        Buffer a notification, the entry has the PublishBatch request entry
+        attributes other than 'Id'.
+        """
+        with self.lock:
+            self.pending.append((topic_arn, entry))
+
+    def flush(self):
+        """
+        Send the buffered notifications.
+        """
+        with self.lock:
+            pending, self.pending = self.pending, []
+
+        topics: dict[str, list[dict]] = {}
+        for topic_arn, entry in pending:
+            topics.setdefault(topic_arn, []).append(entry)
+        for topic_arn, entries in topics.items():
+            for start in range(0, len(entries), PUBLISH_BATCH_SIZE):
+                self.publish_batch(
+                    topic_arn, entries[start : start + PUBLISH_BATCH_SIZE]  # noqa E203
+                )
+
+    def flush_pending(self, background: bool = PUBLISH_BACKGROUND):
+        """
+        Send the buffered notifications once the response of an invocation
+        has been computed, either before returning or from a background
+        thread.  A background flush is completed by wait at the start of the
+        next invocation, since Lambda freezes the instance between
+        invocations, and is lost if the instance is reclaimed instead.
+        """
+        if not self.pending:
+            return
+        if not background:
+            self.flush()
+            return
+        self.wait()
+        self.flushing = threading.Thread(target=self.flush, daemon=True)
+        self.flushing.start()
+
+    def wait(self):
+        """
+        Wait for the background flush of the previous invocation.
+        """
+        flushing, self.flushing = self.flushing, None
+        if flushing is not None:
+            flushing.join()
+
+    def publish_batch(self, topic_arn: str, entries: list[dict]):
+        remaining = {str(index): entry for index, entry in enumerate(entries)}
+        errors: dict[str, str] = {}
+        for attempt in range(self.max_attempts):
+            if attempt > 0:
+                time.sleep(self.retry_delay * 2 ** (attempt - 1))
+            try:
+                response = self.sns.publish_batch(
+                    TopicArn=topic_arn,
+                    PublishBatchRequestEntries=[
+                        {"Id": id, **entry} for id, entry in remaining.items()
+                    ],
+                )
+            except Exception as error:
+                log.warning(f"publish batch failed, attempt: {attempt + 1}: {error}")
+                errors = {id: str(error) for id in remaining}
+                continue
+
+            failed = {}
+            for failure in response.get("Failed", []):
+                id = failure["Id"]
+                errors[id] = f"{failure.get('Code')}: {failure.get('Message')}"
+                if failure.get("SenderFault"):
+                    # the entry is invalid, retrying will not succeed
+                    self.dead_letter(topic_arn, remaining[id], errors[id])
+                else:
+                    failed[id] = remaining[id]
+            remaining = failed
+            if not remaining:
+                return
+
+        for id, entry in remaining.items():
+            self.dead_letter(topic_arn, entry, errors.get(id, "unknown error"))
+
+    def dead_letter(self, topic_arn: str, entry: dict, error: str):
+        message = json.dumps({"topic_arn": topic_arn, "entry": entry, "error": error})
+        if self.dead_letter_queue:
+            try:
+                self.sqs.send_message(
+                    QueueUrl=self.dead_letter_queue, MessageBody=message
+                )
+                return
+            except Exception as send_error:
+                log.error(f"dead letter queue failed: {send_error}")
+        log.error(f"notification not published: {message}")
+
+
+notification_publisher = NotificationPublisher(
+    dead_letter_queue=os.environ.get("NOTIFICATION_DEAD_LETTER_QUEUE")
+)
@@ -0,0 +1,186 @@
+import json
+import os
+from typing import Optional
+
+from api_maker.connectors.connection import Connection, Cursor
+from api_maker.operation import Operation
+from api_maker.services.notification_publisher import PUBLISH_BATCH_SIZE, get_client
+from api_maker.utils.logger import logger
+
+log = logger(__name__)
+
+# outbox table the mutation events are written to in the transaction of the
+# mutation, events are published directly when not set
+OUTBOX_TABLE = os.environ.get("OUTBOX_TABLE")
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 500))
+
+
+def outbox_enabled() -> bool:
+    return bool(OUTBOX_TABLE)
+
+
+def mutation_event(operation: Operation) -> dict:
+    """
+    The event of a mutation, the message published by MutationPublisher.
+    """
+    return {
+        "entity": operation.operation_id,
+        "action": operation.action,
+        "store_params": operation.store_params,
+        "query_params": operation.query_params,
+    }
+
+
+def write_event(cursor: Cursor, operation: Operation, table: Optional[str] = None):
+    """
+    Write the event of a mutation to the outbox table, the caller commits
+    it with the mutation.  Nothing is written when outbox mode is disabled
+    or the operation is a read.
+    """
+    table = table or OUTBOX_TABLE
+    if not table or operation.action == "read":
+        return
+    cursor.execute(
+        f"INSERT INTO {table} (operation_id, action, payload) "
+        + "VALUES (%(operation_id)s, %(action)s, %(payload)s) RETURNING id",
+        {
+            "operation_id": operation.operation_id,
+            "action": operation.action,
+            "payload": json.dumps(mutation_event(operation), default=str),
+        },
+        ["id"],
+    )
+
+
+class OutboxRelay:
+    """
+    Drains the outbox table of a database to an SNS topic.
+
+    Events are read in the order they were written, under a row lock so
+    concurrent relays do not publish the same events, and deleted in the
+    transaction that read them once they are published.  When an event can
+    not be published the events of its operation_id in the following
+    PublishBatch requests are held back and retried by the next run, see
+    publish.  For FIFO topics the deduplication id is the
+    event id, republished events are discarded by SNS.
+    """
+
+    def __init__(
+        self,
+        database: str,
+        topic_arn: str,
+        table: Optional[str] = None,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        sns_client=None,
+    ):
+        self.database = database
+        self.topic_arn = topic_arn
+        self.table = table or OUTBOX_TABLE
+        self.batch_size = batch_size
+        self.sns_client = sns_client
+
+    @property
+    def sns(self):
+        return self.sns_client or get_client("sns")
+
+    def drain(self, connection: Connection) -> int:
+        """
+        Publish the events of the outbox until it is empty or an event
+        fails, returning the number of events published.
+        """
+        published = 0
+        while True:
+            count, complete = self.relay_batch(connection)
+            published += count
+            if not complete or count < self.batch_size:
+                return published
+
+    def relay_batch(self, connection: Connection) -> tuple[int, bool]:
+        """
+        Publish one batch of events in a transaction.
+
+        Returns:
+        - tuple: The number of events published and whether all the events
+            read were published.
+        """
+        cursor = connection.cursor()
+        try:
+            events = cursor.execute(
+                f"SELECT id, operation_id, payload FROM {self.table} "
+                + "ORDER BY id LIMIT %(limit)s FOR UPDATE",
+                {"limit": self.batch_size},
+                ["id", "operation_id", "payload"],
+            )
+            published = self.publish(events)
+            if published:
+                cursor.execute(
+                    f"DELETE FROM {self.table} WHERE id = ANY(%(ids)s) RETURNING id",
+                    {"ids": published},
+                    ["id"],
+                )
+            connection.commit()
+            return len(published), len(published) == len(events)
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def publish(self, events: list[dict]) -> list[int]:
+        """
+        Publish events in order, returning the ids of the events published.
+
+        Events are sent in id order in PublishBatch requests of up to
+        PUBLISH_BATCH_SIZE entries, which may hold several events of an
+        operation_id.  When an event fails the events of its operation_id
+        in the following requests are held back, the entries of the failed
+        request after it may already have been published.
+        """
+        fifo = self.topic_arn.endswith(".fifo")
+        held: set[str] = set()
+        published = []
+        remaining = iter(events)
+        while True:
+            batch = []
+            for event in remaining:
+                if event["operation_id"] not in held:
+                    batch.append(event)
+                    if len(batch) == PUBLISH_BATCH_SIZE:
+                        break
+            if not batch:
+                break
+
+            entries = []
+            for event in batch:
+                payload = event["payload"]
+                if not isinstance(payload, str):
+                    payload = json.dumps(payload)
+                entry = {
+                    "Id": str(event["id"]),
+                    "Message": json.dumps({"default": payload}),
+                    "MessageStructure": "json",
+                }
+                if fifo:
+                    entry["MessageGroupId"] = event["operation_id"]
+                    entry["MessageDeduplicationId"] = f"{self.database}-{event['id']}"
+                entries.append(entry)
+
+            try:
+                response = self.sns.publish_batch(
+                    TopicArn=self.topic_arn, PublishBatchRequestEntries=entries
+                )
+                failed = {failure["Id"] for failure in response.get("Failed", [])}
+            except Exception as error:
+                log.warning(f"outbox publish failed: {error}")
+                failed = {entry["Id"] for entry in entries}
+
+            for event in batch:
+                if str(event["id"]) in failed:
+                    log.warning(
+                        f"outbox event not published, database: {self.database}, "
+                        + f"id: {event['id']}"
+                    )
+                    held.add(event["operation_id"])
+                else:
+                    published.append(event["id"])
+        return sorted(published)
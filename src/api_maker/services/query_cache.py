@@ -0,0 +1,277 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Union
+
+from api_maker.connectors.connection import Cursor
+from api_maker.connectors.connection_factory import connection_factory
+from api_maker.operation import Operation
+from api_maker.utils import metrics
+from api_maker.utils.logger import logger
+from api_maker.utils.model_factory import ModelFactory, PathOperation, SchemaObject
+
+log = logger(__name__)
+
+# seconds read results are cached, caching is disabled when 0
+QUERY_CACHE_TTL = float(os.environ.get("QUERY_CACHE_TTL", 0))
+QUERY_CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", 1024))
+# notify the invalidation channels of mutations when they are committed
+CACHE_NOTIFY = os.environ.get("CACHE_NOTIFY", "false").lower() == "true"
+# channel of the schema object is '<prefix>_<operation_id>', a notification
+# on the prefix channel itself clears the cache
+CACHE_CHANNEL_PREFIX = os.environ.get("CACHE_CHANNEL_PREFIX", "api_maker")
+CACHE_LISTEN_TIMEOUT = 1.0
+CACHE_RECONNECT_DELAY = float(os.environ.get("CACHE_RECONNECT_DELAY", 5))
+
+# postgres truncates identifiers to 63 bytes
+_MAX_CHANNEL_LENGTH = 63
+
+
+def channel(operation_id: Optional[str] = None) -> str:
+    name = f"{CACHE_CHANNEL_PREFIX}_{operation_id}" if operation_id else None
+    return (name or CACHE_CHANNEL_PREFIX)[:_MAX_CHANNEL_LENGTH]
+
+
+def dependencies(schema_object: SchemaObject, operation: Operation) -> frozenset:
+    """
+    The schema objects whose mutations may change a read, the schema object
+    and the schema objects of the relations the read filters, selects, sorts
+    or groups on.
+    """
+    text = " ".join(str(value) for value in operation.metadata_params.values())
+    # relation query parameters are '<relation>.<property>'
+    filtered = {name.split(".", 1)[0] for name in operation.query_params if "." in name}
+    names = {schema_object.operation_id}
+    for name, relation in schema_object.relations.items():
+        if name in filtered or re.search(rf"(^|[\s,]){re.escape(name)}[:.]", text):
+            names.add(relation.child_schema_object.operation_id)
+    return frozenset(names)
+
+
+def cacheable(operation: Operation) -> bool:
+    """
+    Whether the result of an operation may be cached, explains are not
+    since their plans and timings describe one execution.  Counts are
+    cached under their own key, the metadata parameters are part of it.
+    """
+    return operation.action == "read" and "explain" not in operation.metadata_params
+
+
+class QueryCache:
+    """
+    In-process LRU cache of read results with a time to live.
+
+    Entries are evicted by the schema objects they depend on, when this
+    process commits a mutation and, in hosts running an
+    InvalidationListener, when any process commits one.  Reads that were
+    executing while an eviction happened are not cached, since their result
+    may predate the mutation.
+    """
+
+    def __init__(self, ttl: float = QUERY_CACHE_TTL, size: int = QUERY_CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self.entries: OrderedDict = OrderedDict()
+        self.dependents: dict[str, set] = {}
+        # incremented by each eviction, see put
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def key(self, operation: Operation) -> tuple:
+        return (
+            operation.operation_id,
+            json.dumps(
+                [operation.query_params, operation.metadata_params],
+                sort_keys=True,
+                default=str,
+            ),
+        )
+
+    def get(self, operation: Operation) -> Optional[list]:
+        if not self.enabled or not cacheable(operation):
+            return None
+        key = self.key(operation)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self.entries.move_to_end(key)
+        metrics.add_metric("cache_hits" if entry else "cache_misses", 1)
+        return entry[1] if entry else None
+
+    def put(
+        self,
+        operation: Operation,
+        api_object: Union[SchemaObject, PathOperation],
+        result: list,
+        generation: int,
+    ):
+        """
+        Cache the result of a read of a schema object.
+
+        Parameters:
+        - generation (int): The generation when the read started, the
+            result is not cached if entries were evicted since.
+        """
+        if (
+            not self.enabled
+            or not cacheable(operation)
+            or not isinstance(api_object, SchemaObject)
+        ):
+            return
+        key = self.key(operation)
+        names = dependencies(api_object, operation)
+        with self.lock:
+            if generation != self.generation:
+                return
+            self._remove(key)
+            self.entries[key] = (time.monotonic() + self.ttl, result, names)
+            for name in names:
+                self.dependents.setdefault(name, set()).add(key)
+            while len(self.entries) > self.size:
+                self._remove(next(iter(self.entries)))
+
+    def evict(self, api_object: Union[SchemaObject, PathOperation]):
+        """
+        Evict the entries a mutation may have changed, path operations may
+        change any schema object so they clear the cache.
+        """
+        if isinstance(api_object, SchemaObject):
+            self.invalidate(api_object.operation_id)
+        else:
+            self.clear()
+
+    def invalidate(self, operation_id: str):
+        with self.lock:
+            self.generation += 1
+            for key in list(self.dependents.get(operation_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+            self.dependents.clear()
+
+    def _remove(self, key: tuple):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for name in entry[2]:
+            keys = self.dependents.get(name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.dependents[name]
+
+
+query_cache = QueryCache()
+
+
+def notify_mutation(
+    cursor: Cursor, operation: Operation, api_object: Union[SchemaObject, PathOperation]
+):
+    """
+    Notify the invalidation channel of a mutation, postgres delivers the
+    notification when the transaction of the cursor commits.
+    """
+    if not CACHE_NOTIFY or operation.action == "read":
+        return
+    name = api_object.operation_id if isinstance(api_object, SchemaObject) else None
+    cursor.execute(
+        "SELECT pg_notify(%(channel)s, %(action)s)",
+        {"channel": channel(name), "action": operation.action},
+        ["pg_notify"],
+    )
+
+
+class InvalidationListener:
+    """
+    Listens on a dedicated connection for the invalidation notifications of
+    the schema objects of a database, evicting the entries of the cache
+    that depend on them.
+
+    The cache is cleared whenever listening starts, since notifications
+    sent while the listener was not connected are lost.
+    """
+
+    def __init__(
+        self,
+        database: str,
+        cache: Optional[QueryCache] = None,
+        reconnect_delay: float = CACHE_RECONNECT_DELAY,
+    ):
+        self.database = database
+        self.cache = cache or query_cache
+        self.reconnect_delay = reconnect_delay
+        self.channels: dict[str, Optional[str]] = {channel(): None}
+        for name, schema_object in ModelFactory.schema_objects.items():
+            if schema_object.database == database:
+                self.channels[channel(name)] = name
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                connection = connection_factory.get_connection(self.database)
+                try:
+                    self.listen(connection)
+                finally:
+                    connection.close()
+            except Exception as error:
+                log.warning(
+                    f"invalidation listener failed, database: {self.database}: {error}"
+                )
+                self.stopped.wait(self.reconnect_delay)
+
+    def listen(self, connection):
+        listening = False
+        for notified in connection.listen(list(self.channels), CACHE_LISTEN_TIMEOUT):
+            if self.stopped.is_set():
+                return
+            if not listening:
+                listening = True
+                self.cache.clear()
+            if notified is None:
+                continue
+            operation_id = self.channels.get(notified)
+            if operation_id:
+                self.cache.invalidate(operation_id)
+            else:
+                self.cache.clear()
+
+
+def start_listeners(databases: Optional[list[str]] = None) -> list:
+    """
+    Start an invalidation listener for each database, by default the
+    databases of the schema objects of the model.
+    """
+    if databases is None:
+        databases = sorted(
+            {
+                schema_object.database
+                for schema_object in ModelFactory.schema_objects.values()
+                if schema_object.database
+            }
+        )
+    listeners = [InvalidationListener(database) for database in databases]
+    for listener in listeners:
+        listener.start()
+    return listeners
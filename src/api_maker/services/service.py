@@ -1,17 +1,56 @@
-import hashlib
 import json
 import os
+from typing import Iterator
 
+from api_maker.services import outbox
+from api_maker.services.notification_publisher import notification_publisher
+from api_maker.utils import tracing
+from api_maker.utils.app_exception import ApplicationException
 from api_maker.utils.logger import logger
 from api_maker.operation import Operation
 
 log = logger(__name__)
 
 
+def batch_result(result) -> dict:
+    return {"status": 200, "result": result}
+
+
+def batch_error(error: Exception) -> dict:
+    if isinstance(error, ApplicationException):
+        return {"status": error.status_code, "message": error.message}
+    return {"status": 500, "message": str(error)}
+
+
 class Service:
     def execute(self, operation: Operation) -> list[dict]:
         raise NotImplementedError
 
+    def execute_batch(self, operations: list[Operation]) -> list[dict]:
+        """
+        Execute a batch of operations, a failed operation does not prevent
+        the remaining operations from being executed.
+
+        Returns:
+        - list: The outcome of each operation in request order, either
+            {"status": 200, "result": ...} or {"status": ..., "message": ...}
+        """
+        results = []
+        for operation in operations:
+            try:
+                results.append(batch_result(self.execute(operation)))
+            except Exception as error:
+                results.append(batch_error(error))
+        return results
+
+    def stream(self, operation: Operation) -> Iterator[list[dict]]:
+        """
+        Execute the operation yielding the result in batches, by default
+        the complete result is a single batch.
+        """
+        result = self.execute(operation)
+        yield result if isinstance(result, list) else [result]
+
 
 class ServiceAdapter(Service):
     def execute(self, operation):
@@ -24,37 +63,42 @@ class MutationPublisher(ServiceAdapter):
         self.publish_notification(operation)
         return result
 
+    def execute_batch(self, operations):
+        results = super().execute_batch(operations)
+        for operation, result in zip(operations, results):
+            if result["status"] == 200:
+                self.publish_notification(operation)
+        return results
+
     def publish_notification(self, operation):
+        with tracing.span("publish_notification") as span:
+            if span is not None:
+                span.set_attribute("api_maker.operation_id", operation.operation_id)
+                span.set_attribute("api_maker.action", operation.action)
+            self.__publish(operation)
+
+    def __publish(self, operation):
         topic_arn = os.environ.get("BROADCAST_TOPIC", None)
         log.debug(f"Topic ARN: {topic_arn}")
 
+        if outbox.outbox_enabled():
+            # the event was written to the outbox in the transaction of the
+            # mutation and is published by the outbox relay
+            return
+
         if topic_arn is not None:
-            log.debug("Sending message")
-            message = {
-                "entity": operation.operation_id,
-                "action": operation.action,
-                "store_params": operation.store_params,
-                "query_params": operation.query_params,
-            }
+            message = outbox.mutation_event(operation)
 
             message_str = json.dumps({"default": json.dumps(message)})
             log.debug(f"message_str: {message_str}")
-            hash_object = hashlib.sha256(message_str.encode("utf-8"))
-            hex_dig = hash_object.hexdigest()
-
-            msg_id = self.__client("sns").publish(
-                TopicArn=topic_arn,
-                MessageStructure="json",
-                MessageDeduplicationId=hex_dig,
-                MessageGroupId=operation.operation_id,
-                Message=message_str,
-            )
-            log.info(f"publish msg id {msg_id}")
-
-    def __client(client_type, region: str = os.environ.get("AWS_REGION", "us-east-1")):
-        import boto3
-
-        session = boto3.session.Session()
-        if session:
-            return session.client(client_type, region_name=region)
-        return boto3.client(client_type, region_name=region)
+            entry = {"Message": message_str, "MessageStructure": "json"}
+            if topic_arn.endswith(".fifo"):
+                import hashlib
+
+                hash_object = hashlib.sha256(message_str.encode("utf-8"))
+                entry["MessageDeduplicationId"] = hash_object.hexdigest()
+                entry["MessageGroupId"] = operation.operation_id
+
+            # sent in batches once the response is computed, see
+            # NotificationPublisher.flush_pending
+            notification_publisher.add(topic_arn, entry)
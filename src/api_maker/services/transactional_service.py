@@ -1,31 +1,52 @@
+import os
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 
+from api_maker.utils import metrics
 from api_maker.utils.logger import logger
 from api_maker.operation import Operation
-from api_maker.services.service import ServiceAdapter
+from api_maker.services import outbox
+from api_maker.services.query_cache import notify_mutation, query_cache
+from api_maker.services.service import ServiceAdapter, batch_error, batch_result
 from api_maker.connectors.connection_factory import connection_factory
 from api_maker.dao.operation_dao import OperationDAO
 from api_maker.utils.model_factory import ModelFactory
 
 log = logger(__name__)
 
+# the maximum number of databases a batch accesses concurrently
+BATCH_MAX_WORKERS = int(os.environ.get("BATCH_MAX_WORKERS", 4))
+
 
 class TransactionalService(ServiceAdapter):
     def execute(self, operation: Operation):
         api_object = ModelFactory.get_api_object(
             operation.operation_id, operation.action
         )
-        connection = connection_factory.get_connection(api_object.database)
+        result = query_cache.get(operation)
+        if result is not None:
+            return result
+        generation = query_cache.generation
+
+        with metrics.timer("connection"):
+            connection = connection_factory.get_connection(api_object.database)
 
         try:
             result = None
             cursor = connection.cursor()
             try:
                 result = OperationDAO(operation, connection.engine()).execute(cursor)
+                # in outbox mode the event is committed with the mutation
+                outbox.write_event(cursor, operation)
+                notify_mutation(cursor, operation, api_object)
             finally:
                 cursor.close()
             if operation.action != "read":
                 connection.commit()
+                query_cache.evict(api_object)
+            else:
+                query_cache.put(operation, api_object, result, generation)
             return result
         except Exception as error:
             log.error(f"transaction exception: {error}")
@@ -33,3 +54,136 @@ class TransactionalService(ServiceAdapter):
             raise error
         finally:
             connection.close()
+
+    def stream(self, operation: Operation):
+        api_object = ModelFactory.get_api_object(
+            operation.operation_id, operation.action
+        )
+        with metrics.timer("connection"):
+            connection = connection_factory.get_connection(api_object.database)
+
+        try:
+            dao = OperationDAO(operation, connection.engine())
+            cursor = connection.stream_cursor() if dao.streams else connection.cursor()
+            try:
+                yield from dao.stream(cursor)
+                outbox.write_event(cursor, operation)
+                notify_mutation(cursor, operation, api_object)
+            finally:
+                cursor.close()
+            if operation.action != "read":
+                connection.commit()
+                query_cache.evict(api_object)
+        except Exception as error:
+            log.error(f"transaction exception: {error}")
+            log.error(f"traceback: {traceback.format_exc()}")
+            raise error
+        finally:
+            connection.close()
+
+    def execute_batch(self, operations: list[Operation]) -> list[dict]:
+        """
+        Execute a batch of operations that may span databases.
+
+        The operations are grouped by database, each group is executed in
+        order within a single transaction on its own connection and the
+        groups are executed concurrently.  A group is committed when all
+        of its operations succeed, otherwise it is rolled back without
+        affecting the groups of the other databases.
+
+        Returns:
+        - list: The outcome of each operation in request order, see
+            Service.execute_batch.
+        """
+        results: list = [None] * len(operations)
+        groups: dict[str, list[int]] = {}
+        for index, operation in enumerate(operations):
+            try:
+                api_object = ModelFactory.get_api_object(
+                    operation.operation_id, operation.action
+                )
+            except Exception as error:
+                results[index] = batch_error(error)
+                continue
+            groups.setdefault(api_object.database, []).append(index)
+
+        if groups:
+            with ThreadPoolExecutor(
+                max_workers=min(BATCH_MAX_WORKERS, len(groups))
+            ) as executor:
+                # the groups record their metrics on the metrics of the request
+                futures = [
+                    (
+                        indexes,
+                        executor.submit(
+                            copy_context().run,
+                            self.execute_group,
+                            database,
+                            [operations[index] for index in indexes],
+                        ),
+                    )
+                    for database, indexes in groups.items()
+                ]
+                for indexes, future in futures:
+                    for index, result in zip(indexes, future.result()):
+                        results[index] = result
+        return results
+
+    def execute_group(self, database: str, operations: list[Operation]) -> list[dict]:
+        """
+        Execute the operations of a batch on one database in a single
+        transaction.  When an operation fails the transaction is rolled
+        back, the failed operation reports its error and the other
+        operations of the group are reported as 424 Failed Dependency.
+        """
+        try:
+            with metrics.timer("connection"):
+                connection = connection_factory.get_connection(database)
+        except Exception as error:
+            log.error(f"connection exception: {error}")
+            return [batch_error(error) for _ in operations]
+
+        results = []
+        mutated = []
+        try:
+            cursor = connection.cursor()
+            try:
+                for operation in operations:
+                    results.append(
+                        batch_result(
+                            OperationDAO(operation, connection.engine()).execute(cursor)
+                        )
+                    )
+                    if operation.action != "read":
+                        api_object = ModelFactory.get_api_object(
+                            operation.operation_id, operation.action
+                        )
+                        outbox.write_event(cursor, operation)
+                        notify_mutation(cursor, operation, api_object)
+                        mutated.append(api_object)
+            finally:
+                cursor.close()
+            if mutated:
+                connection.commit()
+                for api_object in mutated:
+                    query_cache.evict(api_object)
+            return results
+        except Exception as error:
+            log.error(f"transaction exception: {error}")
+            log.error(f"traceback: {traceback.format_exc()}")
+            connection.rollback()
+            failed = len(results)
+            if failed == len(operations):
+                # the commit failed
+                return [batch_error(error) for _ in operations]
+            dependency = {
+                "status": 424,
+                "message": f"Transaction on database {database} was rolled back",
+            }
+            return (
+                [dict(dependency) for _ in range(failed)]
+                + [batch_error(error)]
+                + [dict(dependency) for _ in range(len(operations) - failed - 1)]
+            )
+        finally:
+            connection.close()
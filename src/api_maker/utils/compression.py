@@ -0,0 +1,114 @@
+import gzip
+import os
+import zlib
+from typing import Optional
+
+from api_maker.utils.app_exception import ApplicationException
+from api_maker.utils.logger import logger
+
+log = logger(__name__)
+
+# bodies smaller than this are returned uncompressed
+COMPRESSION_THRESHOLD = int(os.environ.get("COMPRESSION_THRESHOLD", 1024))
+COMPRESSION_LEVEL = int(os.environ.get("COMPRESSION_LEVEL", 5))
+
+
+# whether the optional brotli package is installed, None until first checked
+_brotli_available: Optional[bool] = None
+
+
+def brotli_available() -> bool:
+    global _brotli_available
+    if _brotli_available is None:
+        try:
+            import brotli  # noqa F401
+
+            _brotli_available = True
+        except ImportError:
+            _brotli_available = False
+    return _brotli_available
+
+
+def supported_encodings() -> list[str]:
+    """
+    The response encodings in order of preference, brotli is only
+    offered when the optional brotli package is installed.
+    """
+    return ["br", "gzip"] if brotli_available() else ["gzip"]
+
+
+def select_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Select the response encoding from an Accept-Encoding header.
+
+    Parameters:
+    - accept_encoding (str): The Accept-Encoding header value.
+
+    Returns:
+    - str: The encoding with the highest quality value, ties are resolved
+        by the server preference. None if no supported encoding is acceptable.
+    """
+    if not accept_encoding:
+        return None
+
+    qualities = {}
+    for item in accept_encoding.split(","):
+        parts = item.strip().split(";")
+        coding = parts[0].strip().lower()
+        quality = 1.0
+        for parameter in parts[1:]:
+            name, _, value = parameter.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding] = quality
+
+    encodings = supported_encodings()
+    candidates = [
+        (qualities.get(encoding, qualities.get("*", 0.0)), -position, encoding)
+        for position, encoding in enumerate(encodings)
+    ]
+    quality, _, encoding = max(candidates)
+    return encoding if quality > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=COMPRESSION_LEVEL)
+    if encoding == "br":
+        import brotli
+
+        return brotli.compress(body, quality=COMPRESSION_LEVEL)
+    raise ApplicationException(500, f"Unsupported response encoding: {encoding}")
+
+
+def decompress(body: bytes, encoding: str) -> bytes:
+    """
+    Decompress a request body.
+
+    Parameters:
+    - body (bytes): The encoded body.
+    - encoding (str): The Content-Encoding header value.
+
+    Returns:
+    - bytes: The decoded body.
+    """
+    encoding = encoding.strip().lower()
+    if encoding in ("", "identity"):
+        return body
+    try:
+        if encoding in ("gzip", "x-gzip"):
+            return gzip.decompress(body)
+        if encoding == "deflate":
+            return zlib.decompress(body)
+        if encoding == "br" and brotli_available():
+            import brotli
+
+            return brotli.decompress(body)
+    except Exception as error:
+        log.error(f"decompression failed: {error}")
+        raise ApplicationException(400, f"Invalid {encoding} request body")
+    raise ApplicationException(415, f"Unsupported content encoding: {encoding}")
@@ -0,0 +1,103 @@
+import json
+import os
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Union
+
+from api_maker.utils.logger import logger
+
+log = logger(__name__)
+
+
+def default(value: Any) -> Any:
+    """
+    Convert the values returned by the database drivers that are not
+    native JSON types.
+    """
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).decode("utf-8")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class JSONCodec:
+    """
+    Codec using the standard library json module.
+    """
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(
+            obj, default=default, separators=(",", ":"), ensure_ascii=False
+        ).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    Codec using orjson, datetime, date, time and UUID values are encoded
+    natively by orjson.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self.orjson = orjson
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.orjson.dumps(
+            obj, default=default, option=self.orjson.OPT_NON_STR_KEYS
+        )
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self.orjson.loads(data)
+
+
+def get_codec(name: str = None) -> JSONCodec:
+    """
+    Get a codec by name, by default orjson is used when it is installed.
+
+    Parameters:
+    - name (str): 'orjson' or 'json', defaults to the JSON_CODEC
+        environment variable.
+
+    Returns:
+    - JSONCodec
+    """
+    name = name or os.environ.get("JSON_CODEC", "orjson")
+    if name == "orjson":
+        try:
+            return OrjsonCodec()
+        except ImportError:
+            log.debug("orjson is not installed, using json")
+            return JSONCodec()
+    if name == "json":
+        return JSONCodec()
+    raise ValueError(f"Unknown JSON codec: {name}")
+
+
+codec = get_codec()
+
+
+def set_codec(value: JSONCodec):
+    global codec
+    codec = value
+
+
+def dumps(obj: Any) -> bytes:
+    return codec.dumps(obj)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    return codec.loads(data)
@@ -0,0 +1,174 @@
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from api_maker.utils.json_codec import dumps
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "false").lower() == "true"
+METRICS_NAMESPACE = os.environ.get("METRICS_NAMESPACE", "api_maker")
+
+DIMENSIONS = ["operation_id", "action"]
+
+# returned by timer when no request is measured, so instrumented code costs
+# one context variable lookup
+_NO_TIMER = nullcontext()
+
+
+class MetricsSink:
+    """
+    Receives the metrics of each request in CloudWatch Embedded Metric
+    Format.  The default sink writes one JSON line to stdout, which Lambda
+    forwards to CloudWatch Logs where the metrics are extracted.
+    """
+
+    def emit(self, record: dict):
+        sys.stdout.write(dumps(record).decode("utf-8") + "\n")
+
+
+class RequestMetrics:
+    """
+    The metrics of one request, values of the same metric are summed.
+    Metrics may be added from the threads of a batch.
+    """
+
+    def __init__(self):
+        self.dimensions = {name: "unknown" for name in DIMENSIONS}
+        self.values: dict = {}
+        self.units: dict = {}
+        self.lock = threading.Lock()
+
+    def set_dimensions(self, operation_id: str, action: str):
+        self.dimensions = {"operation_id": operation_id, "action": action}
+
+    def add(self, name: str, value: float, unit: str = "Count"):
+        with self.lock:
+            self.values[name] = self.values.get(name, 0) + value
+            self.units[name] = unit
+
+    def timer(self, phase: str) -> "PhaseTimer":
+        return PhaseTimer(self, phase)
+
+    def to_emf(self, namespace: str = METRICS_NAMESPACE) -> dict:
+        return {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": namespace,
+                        "Dimensions": [DIMENSIONS],
+                        "Metrics": [
+                            {"Name": name, "Unit": self.units[name]}
+                            for name in self.values
+                        ],
+                    }
+                ],
+            },
+            **self.dimensions,
+            **{
+                name: round(value, 3) if isinstance(value, float) else value
+                for name, value in self.values.items()
+            },
+        }
+
+
+class PhaseTimer:
+    __slots__ = ("metrics", "phase", "start")
+
+    def __init__(self, metrics: RequestMetrics, phase: str):
+        self.metrics = metrics
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self.metrics.add(
+            self.phase, (time.perf_counter() - self.start) * 1000, "Milliseconds"
+        )
+
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar(
+    "api_maker_metrics", default=None
+)
+_sink: MetricsSink = MetricsSink()
+
+
+def set_sink(sink: MetricsSink) -> MetricsSink:
+    """
+    Replace the sink the request metrics are emitted to, returning the
+    previous sink.
+    """
+    global _sink
+    previous, _sink = _sink, sink
+    return previous
+
+
+def peak_memory_kb() -> Optional[int]:
+    """
+    The peak resident memory of the process since it started, the instance
+    serves many requests so it is not the peak of one request.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    # kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+@contextmanager
+def request_metrics(enabled: Optional[bool] = None) -> Iterator:
+    """
+    Measure a request, the phases timed while the context is active are
+    emitted to the sink as one record when it exits.
+
+    Parameters:
+    - enabled (bool): Whether to measure the request, by default the
+        METRICS_ENABLED environment variable.
+    """
+    if not (METRICS_ENABLED if enabled is None else enabled):
+        yield None
+        return
+
+    metrics = RequestMetrics()
+    start_peak = peak_memory_kb()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+        peak_memory = peak_memory_kb()
+        if peak_memory is not None:
+            metrics.add("process_peak_memory", peak_memory, "Kilobytes")
+            # the process peak only grows when the request exceeds it
+            metrics.add("peak_memory_growth", peak_memory - start_peak, "Kilobytes")
+        _sink.emit(metrics.to_emf())
+
+
+def current() -> Optional[RequestMetrics]:
+    return _current.get()
+
+
+def timer(phase: str):
+    """
+    Context manager timing a phase of the current request in milliseconds.
+    """
+    metrics = _current.get()
+    return metrics.timer(phase) if metrics else _NO_TIMER
+
+
+def add_metric(name: str, value: float, unit: str = "Count"):
+    metrics = _current.get()
+    if metrics:
+        metrics.add(name, value, unit)
+
+
+def set_dimensions(operation_id: str, action: str):
+    metrics = _current.get()
+    if metrics:
+        metrics.set_dimensions(operation_id, action)
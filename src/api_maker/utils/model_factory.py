@@ -1,13 +1,44 @@
+import os
+import pickle
 import re
-import yaml
-from typing import Any, Dict, Optional, List, Union
+import zlib
+from typing import Any, Callable, Dict, Optional, List, Union
 from datetime import datetime
+from decimal import Decimal
 from api_maker.utils.app_exception import ApplicationException
-from api_maker.utils.spec_handler import SpecificationHandler
+from api_maker.utils.spec_handler import SpecificationHandler, release_resolver
 from api_maker.utils.logger import logger
 
 log = logger(__name__)
 
+# increment when the pickled model classes change incompatibly
+MODEL_ARTIFACT_VERSION = 6
+
+# pickle protocol 5 is available in every supported python version
+MODEL_ARTIFACT_PROTOCOL = 5
+
+
+def model_artifact_path(api_spec_path: str) -> str:
+    """
+    The location of the precompiled model for an API spec,
+    api_spec.yaml is compiled to api_spec.model.pickle.
+    """
+    return os.path.splitext(api_spec_path)[0] + ".model.pickle"
+
+
+def spec_checksum(api_spec_path: str) -> Optional[int]:
+    """
+    The checksum of an API spec file, None when the file is missing.  A
+    model artifact is only loaded for the spec it was compiled from, crc32
+    detects changes without importing hashlib at cold start.
+    """
+    try:
+        with open(api_spec_path, "rb") as spec_file:
+            return zlib.crc32(spec_file.read())
+    except FileNotFoundError:
+        return None
+
+
 methods_to_actions = {
     "get": "read",
     "post": "create",
@@ -16,44 +47,172 @@ methods_to_actions = {
 }
 
 
+def _identity(value):
+    return value
+
+
+def _to_bool(value):
+    return value.lower() == "true"
+
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+
+def _parse_datetime(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def _parse_time(value):
+    return datetime.strptime(value, "%H:%M:%S").time() if value else None
+
+
+def _api_number(value):
+    return value if isinstance(value, (float, Decimal)) else float(value)
+
+
+def _api_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _api_time(value):
+    return value.time() if isinstance(value, datetime) else value
+
+
+# API types whose converter narrows the value of a wider column, a date
+# property may be a timestamp column the driver decodes as a datetime, so
+# they are converted even when the driver decodes the API type
+NARROWING_TYPES = frozenset(["date", "time"])
+
+# converters are module functions so the model objects can be pickled
+DB_CONVERTERS = {
+    "string": _identity,
+    "number": float,
+    "float": float,
+    "integer": int,
+    "boolean": _to_bool,
+    "date": _parse_date,
+    "date-time": _parse_datetime,
+    "time": _parse_time,
+}
+
+# datetime, date, time, Decimal and UUID values are encoded by
+# the json codec, see api_maker.utils.json_codec
+API_CONVERTERS = {
+    "string": _identity,
+    "number": _api_number,
+    "float": _api_number,
+    "integer": int,
+    "boolean": str,
+    "date": _api_date,
+    "date-time": _identity,
+    "time": _api_time,
+}
+
+
+def camel_case(name: str) -> str:
+    """
+    Convert a snake case name to camel case, invoice_id is invoiceId.
+    """
+    stripped = name.lstrip("_")
+    head, *tail = stripped.split("_")
+    return (
+        name[: len(name) - len(stripped)]
+        + head
+        + "".join(part[:1].upper() + part[1:] for part in tail)
+    )
+
+
+def snake_case(name: str) -> str:
+    """
+    Convert a camel case name to snake case, invoiceId is invoice_id.
+    """
+    return re.sub(r"(?<=[a-z0-9])([A-Z])", r"_\1", name).lower()
+
+
+def resolve_element(element: Dict[str, Any], spec: Optional[Dict[str, Any]]) -> dict:
+    """
+    Get the element with its $ref merged in, elements without a spec are
+    returned as they are.
+    """
+    if spec is None:
+        return element
+    return SpecificationHandler(spec).resolver.resolve(element)
+
+
+def get_value(element: Dict[str, Any], key: str, default: Any = None) -> Any:
+    value = element.get(key)
+    return value if value else default
+
+
 class OpenAPIElement:
-    def __init__(self, element: Dict[str, Any], spec: Dict[str, Any]):
-        self.element = element
-        self.spec = spec
-        self.spec_handler = SpecificationHandler(spec)
-        self.title = self.element.get("title", None)
-        self.description = self.element.get("description", None)
-        self.required = self.element.get("required", None)
-        self.type = self.element.get("type", None)
-
-    def get(
-        self, key: Union[List[str], str], element=None, default: Optional[str] = None
-    ) -> Optional[Any]:
-        result = self.spec_handler.get(element if element else self.element, key)
-        return result if result else default
+    """
+    Base of the model objects.  Attributes are resolved from the spec
+    element when the object is built, neither the element nor the spec
+    are referenced afterwards.
+    """
+
+    __slots__ = ("title", "description", "required", "type")
+
+    def __init__(self, element: Dict[str, Any], spec: Optional[Dict[str, Any]]):
+        self.title = element.get("title", None)
+        self.description = element.get("description", None)
+        self.required = element.get("required", None)
+        self.type = element.get("type", None)
 
 
 class SchemaObjectProperty(OpenAPIElement):
+    __slots__ = (
+        "operation_id",
+        "name",
+        "camel_name",
+        "column_name",
+        "api_type",
+        "column_type",
+        "is_primary_key",
+        "min_length",
+        "max_length",
+        "pattern",
+        "default",
+        "search_vector",
+        "search_config",
+        "concurrency_control",
+        "db_converter",
+        "api_converter",
+    )
+
     def __init__(
         self,
         operation_id: str,
         name: str,
         properties: Dict[str, Any],
-        spec: Dict[str, Any],
+        spec: Optional[Dict[str, Any]],
     ):
+        properties = resolve_element(properties, spec)
         super().__init__(properties, spec)
         self.operation_id = operation_id
         self.name = name
-        self.column_name = self.get("x-am-column-name") or name
-        self.type = self.get("type") or "string"
-        self.api_type = self.get("format") or self.type
-        self.column_type = self.get("x-am-column-type") or self.api_type
-        self.is_primary_key = self.get("x-am-primary-key") or False
-        self.min_length = self.get("minLength")
-        self.max_length = self.get("maxLength")
-        self.pattern = self.get("pattern")
-
-        self.concurrency_control = self.get("x-am-concurrency-control")
+        self.camel_name = camel_case(name)
+        self.column_name = get_value(properties, "x-am-column-name", name)
+        self.type = get_value(properties, "type", "string")
+        self.api_type = get_value(properties, "format", self.type)
+        self.column_type = get_value(properties, "x-am-column-type", self.api_type)
+        self.is_primary_key = get_value(properties, "x-am-primary-key", False)
+        self.min_length = get_value(properties, "minLength")
+        self.max_length = get_value(properties, "maxLength")
+        self.pattern = get_value(properties, "pattern")
+        self.default = get_value(properties, "default")
+        self.search_vector = get_value(properties, "x-am-search-vector")
+        self.search_config = get_value(properties, "x-am-search-config", "english")
+        if not re.fullmatch(r"\w+", self.search_config):
+            raise ApplicationException(
+                500,
+                "Invalid text search configuration, schema object: "
+                + f"{self.operation_id}, property: {name}, "
+                + f"config: {self.search_config}",
+            )
+
+        self.concurrency_control = get_value(properties, "x-am-concurrency-control")
         if self.concurrency_control:
             self.concurrency_control = self.concurrency_control.lower()
             assert self.concurrency_control in [
@@ -65,53 +224,46 @@ class SchemaObjectProperty(OpenAPIElement):
                 + f"property: {name}, version_type: {self.concurrency_control}"
             )
 
-    @property
-    def default(self):
-        return self.get("default")
+        self.db_converter = DB_CONVERTERS.get(self.column_type, _identity)
+        self.api_converter = API_CONVERTERS.get(self.api_type, _identity)
 
     def convert_to_db_value(self, value: str) -> Optional[Any]:
         if value is None:
             return None
-        conversion_mapping = {
-            "string": lambda x: x,
-            "number": float,
-            "float": float,
-            "integer": int,
-            "boolean": lambda x: x.lower() == "true",
-            "date": lambda x: datetime.strptime(x, "%Y-%m-%d").date() if x else None,
-            "date-time": lambda x: datetime.fromisoformat(x) if x else None,
-            "time": lambda x: datetime.strptime(x, "%H:%M:%S").time() if x else None,
-        }
-        conversion_func = conversion_mapping.get(self.column_type, lambda x: x)
-        return conversion_func(value)
+        return self.db_converter(value)
 
     def convert_to_api_value(self, value) -> Optional[Any]:
         if value is None:
             return None
-        conversion_mapping = {
-            "string": lambda x: x,
-            "number": float,
-            "float": float,
-            "integer": int,
-            "boolean": str,
-            "date": lambda x: x.date().isoformat() if x else None,
-            "date-time": lambda x: x.isoformat() if x else None,
-            "time": lambda x: x.time().isoformat() if x else None,
-        }
-        conversion_func = conversion_mapping.get(self.api_type, lambda x: x)
-        return conversion_func(value)
+        return self.api_converter(value)
+
+    def api_value_converter(self, decoded_types: frozenset) -> Optional[Callable]:
+        """
+        The converter for values of the property read from a database, None
+        when the driver already decodes the column type in API form.
+        """
+        if (
+            self.column_type == self.api_type
+            and self.api_type in decoded_types
+            and self.api_type not in NARROWING_TYPES
+        ):
+            return None
+        return self.api_converter
 
 
 class SchemaObjectKey(SchemaObjectProperty):
+    __slots__ = ("key_type", "sequence_name")
+
     def __init__(
         self,
         operation_id: str,
         name: str,
         properties: Dict[str, Any],
-        spec: Dict[str, Any],
+        spec: Optional[Dict[str, Any]],
     ):
+        properties = resolve_element(properties, spec)
         super().__init__(operation_id, name, properties, spec)
-        self.key_type = self.get("x-am-primary-key", default="auto")
+        self.key_type = get_value(properties, "x-am-primary-key", "auto")
         if self.key_type not in ["required", "auto", "sequence"]:
             raise ApplicationException(
                 500,
@@ -121,7 +273,9 @@ class SchemaObjectKey(SchemaObjectProperty):
             )
 
         self.sequence_name = (
-            self.get("x-am-sequence-name") if self.key_type == "sequence" else None
+            get_value(properties, "x-am-sequence-name")
+            if self.key_type == "sequence"
+            else None
         )
         if self.key_type == "sequence" and not self.sequence_name:
             raise ApplicationException(
@@ -132,97 +286,178 @@ class SchemaObjectKey(SchemaObjectProperty):
 
 
 class SchemaObjectAssociation(OpenAPIElement):
+    """
+    A relation from a parent schema object to a child schema object.
+
+    The schema objects, key properties and join text are linked once by
+    ModelFactory.set_spec, see link.  Object relations have a cardinality
+    of one and join the parent property to the child primary key, array
+    relations have a cardinality of many and join the parent primary key
+    to the child property.
+    """
+
+    __slots__ = (
+        "operation_id",
+        "name",
+        "camel_name",
+        "ref",
+        "cardinality",
+        "child_property_name",
+        "parent_property_name",
+        "parent_schema_object",
+        "child_schema_object",
+        "parent_property",
+        "child_property",
+        "join_shape",
+        "subselect_condition",
+    )
+
     def __init__(
         self,
         operation_id: str,
         name: str,
         properties: Dict[str, Any],
-        spec: Dict[str, Any],
+        spec: Optional[Dict[str, Any]],
     ):
+        properties = resolve_element(properties, spec)
         super().__init__(properties, spec)
         self.operation_id = operation_id
         self.name = name
+        self.camel_name = camel_case(name)
+        self.ref = properties.get("$ref")
+        self.cardinality = "many" if self.type == "array" else "one"
+        self.child_property_name = get_value(properties, "x-am-child-property")
+        self.parent_property_name = get_value(properties, "x-am-parent-property")
 
-    @property
-    def child_property(self) -> "SchemaObjectProperty":
-        child_property = self.get("x-am-child-property", None)
-        if not child_property:
-            return self.child_schema_object.primary_key
-        return self.child_schema_object.get_property(child_property)
+    def link(
+        self,
+        parent_schema_object: "SchemaObject",
+        schema_objects: Dict[str, "SchemaObject"],
+    ):
+        """
+        Resolve the schema objects and key properties of the relation.
+
+        Raises:
+        - ApplicationException: 500 if the $ref or a key property of the
+            relation can not be resolved.
+        """
+        if not self.ref:
+            raise ApplicationException(
+                500,
+                f"Missing $ref, operation_id: {self.operation_id}, "
+                + f"attribute: {self.name}",
+            )
+        child_schema_object = schema_objects.get(self.ref.split("/")[-1].lower())
+        if not isinstance(child_schema_object, SchemaObject):
+            raise ApplicationException(
+                500,
+                f"Unresolved $ref, operation_id: {self.operation_id}, "
+                + f"attribute: {self.name}, $ref: {self.ref}",
+            )
 
-    @property
-    def parent_property(self) -> "SchemaObjectProperty":
-        parent_schema_object = ModelFactory.get_schema_object(self.operation_id)
-        if not parent_schema_object:
+        self.parent_schema_object = parent_schema_object
+        self.child_schema_object = child_schema_object
+        self.parent_property = self._key_property(
+            parent_schema_object, self.parent_property_name, "parent"
+        )
+        self.child_property = self._key_property(
+            child_schema_object, self.child_property_name, "child"
+        )
+
+        self.join_shape = {
+            "table": child_schema_object.table_name,
+            "column": self.child_property.column_name,
+            "parent_table": parent_schema_object.table_name,
+            "parent_column": self.parent_property.column_name,
+        }
+        self.subselect_condition = (
+            f"FROM {child_schema_object.table_name} "
+            + f"WHERE {self.child_property.column_name} "
+            + f"IN ( SELECT {self.parent_property.column_name} "
+        )
+
+    def _key_property(
+        self, schema_object: "SchemaObject", property_name: Optional[str], role: str
+    ) -> "SchemaObjectProperty":
+        key_property = (
+            schema_object.get_property(property_name)
+            if property_name
+            else schema_object.primary_key
+        )
+        if not key_property:
             raise ApplicationException(
                 500,
-                (
-                    "Parent schema object not found for relation"
-                    + f"operation_id: {self.operation_id}, "
-                    f"attribute: {self.name}"
-                ),
+                f"Cannot resolve {role} property, operation_id: "
+                + f"{self.operation_id}, attribute: {self.name}, "
+                + f"property: {property_name or 'primary key'}",
             )
-        parent = self.get("x-am-parent-property")
-        if parent:
-            return parent_schema_object.get_property(parent)
-        return parent_schema_object.primary_key
+        return key_property
 
-    @property
-    def child_schema_object(self) -> "SchemaObject":
-        if not hasattr(self, "_child_schema_object"):
-            if "$ref" not in self.element:
-                raise ApplicationException(
-                    500,
-                    f"Missing $ref, operation_id: {self.operation_id}, "
-                    + f"attrbute: {self.name}",
-                )
-            schema_name = self.element["$ref"].split("/")[-1]
-            self._child_schema_object = ModelFactory.get_schema_object(schema_name)
-        return self._child_schema_object
+    def join(self, parent_prefix: str, child_prefix: str) -> str:
+        return (
+            f"INNER JOIN {self.child_schema_object.table_name} AS {child_prefix} "
+            + f"ON {parent_prefix}.{self.parent_property.column_name} = "
+            + f"{child_prefix}.{self.child_property.column_name}"
+        )
 
 
 class SchemaObject(OpenAPIElement):
-    _properties: Dict[str, SchemaObjectProperty]
-    _relations: Dict[str, SchemaObjectAssociation]
-    _concurrency_property: Optional[SchemaObjectProperty]
+    __slots__ = (
+        "operation_id",
+        "schema_object",
+        "database",
+        "table_name",
+        "primary_key",
+        "properties",
+        "relations",
+        "snake_names",
+        "concurrency_property_name",
+        "_concurrency_property",
+    )
 
     def __init__(
-        self, operation_id: str, schema_object: Dict[str, Any], spec: Dict[str, Any]
+        self,
+        operation_id: str,
+        schema_object: Dict[str, Any],
+        spec: Optional[Dict[str, Any]],
     ):
-        super().__init__(schema_object, spec)
+        element = resolve_element(schema_object, spec)
+        super().__init__(element, spec)
         self.operation_id = operation_id
+        # the raw schema is only kept while the spec is loaded, see
+        # ModelFactory.release_spec
         self.schema_object = schema_object
-        database = schema_object.get("x-am-database")
-        if database:
-            self.database = database.lower()
+        database = element.get("x-am-database")
+        self.database = database.lower() if database else None
+        schema = element.get("x-am-schema")
+        self.table_name = (
+            f"{schema}." if schema else ""
+        ) + f"{element.get('x-am-table', self.operation_id)}"
+        self.concurrency_property_name = element.get("x-am-concurrency-control", None)
         self.primary_key = None
-
-    @property
-    def properties(self) -> Dict[str, SchemaObjectProperty]:
-        if not hasattr(self, "_properties"):
-            self._resolve_properties()
-        return self._properties
-
-    @property
-    def relations(self) -> Dict[str, SchemaObjectAssociation]:
-        if not hasattr(self, "_relations"):
-            self._resolve_properties()
-        return self._relations
-
-    def _resolve_properties(self):
-        self._properties = dict()
-        self._relations = dict()
-        for property_name, prop in self.get("properties").items():
+        self.properties: Dict[str, SchemaObjectProperty] = dict()
+        self.relations: Dict[str, SchemaObjectAssociation] = dict()
+        for property_name, prop in (get_value(element, "properties") or {}).items():
             assert prop is not None, (
                 f"Property is none operation_id: {self.operation_id}, "
                 + f"property: {property_name}"
             )  # noqa E501
-            object_property = self._resolve_property(property_name, prop)
+            object_property = self._resolve_property(property_name, prop, spec)
             if object_property:
-                self._properties[property_name] = object_property
+                self.properties[property_name] = object_property
 
-    def _resolve_property(self, property_name: str, prop: Dict[str, Any]):
-        type = self.get("type", prop, None)
+        # camel case names of the properties and relations, see CaseChangeAdapter
+        self.snake_names = {
+            element.camel_name: name
+            for elements in (self.properties, self.relations)
+            for name, element in elements.items()
+        }
+
+    def _resolve_property(
+        self, property_name: str, prop: Dict[str, Any], spec: Optional[Dict[str, Any]]
+    ):
+        prop = resolve_element(prop, spec)
+        type = get_value(prop, "type")
 
         if not type:
             raise ApplicationException(
@@ -231,22 +466,22 @@ class SchemaObject(OpenAPIElement):
             )
 
         if type in ["object", "array"]:
-            self._relations[property_name] = SchemaObjectAssociation(
+            self.relations[property_name] = SchemaObjectAssociation(
                 self.operation_id,
                 property_name,
                 {
-                    **(prop if type == "object" else self.get("items", prop)),
+                    **(prop if type == "object" else get_value(prop, "items", {})),
                     "type": type,
                 },
-                self.spec,
+                spec,
             )
         else:
             object_property = SchemaObjectProperty(
-                self.operation_id, property_name, prop, self.spec
+                self.operation_id, property_name, prop, spec
             )
             if object_property.is_primary_key:
                 self.primary_key = SchemaObjectKey(
-                    self.operation_id, property_name, prop, self.spec
+                    self.operation_id, property_name, prop, spec
                 )
             return object_property
 
@@ -255,30 +490,22 @@ class SchemaObject(OpenAPIElement):
     @property
     def concurrency_property(self) -> Optional[SchemaObjectProperty]:
         if not hasattr(self, "_concurrency_property"):
-            concurrency_prop_name = self.schema_object.get(
-                "x-am-concurrency-control", None
-            )
-            if concurrency_prop_name:
+            if self.concurrency_property_name:
                 try:
-                    self._concurrency_property = self.properties[concurrency_prop_name]
+                    self._concurrency_property = self.properties[
+                        self.concurrency_property_name
+                    ]
                 except KeyError:
                     raise ApplicationException(
                         500,
                         "Concurrency control property does not exist. "
                         + f"operation_id: {self.operation_id}, "
-                        + f"property: {concurrency_prop_name}",
+                        + f"property: {self.concurrency_property_name}",
                     )
             else:
                 self._concurrency_property = None
         return self._concurrency_property
 
-    @property
-    def table_name(self) -> str:
-        schema = self.schema_object.get("x-am-schema")
-        return (
-            f"{schema}." if schema else ""
-        ) + f"{self.schema_object.get('x-am-table', self.operation_id)}"
-
     def get_property(self, property_name: str) -> Optional[SchemaObjectProperty]:
         return self.properties.get(property_name)
 
@@ -292,115 +519,199 @@ class SchemaObject(OpenAPIElement):
 
 
 class PathOperation(OpenAPIElement):
+    __slots__ = (
+        "path",
+        "method",
+        "database",
+        "sql",
+        "inputs",
+        "outputs",
+        "snake_names",
+    )
+
     def __init__(
         self,
         path: str,
         method: str,
         path_operation: Dict[str, Any],
-        spec: Dict[str, Any],
+        spec: Optional[Dict[str, Any]],
     ):
-        super().__init__(path_operation, spec)
+        element = resolve_element(path_operation, spec)
+        super().__init__(element, spec)
         self.path = path
         self.method = method
-        self.path_operation = path_operation
-        self.spec = spec
-
-    @property
-    def database(self) -> str:
-        return self.path_operation["x-am-database"]
-
-    @property
-    def sql(self) -> str:
-        return self.path_operation["x-am-sql"]
-
-    @property
-    def inputs(self) -> Dict[str, SchemaObjectProperty]:
-        if not hasattr(self, "_inputs"):
-            self._inputs = dict()
-            self._inputs.update(
-                self._extract_properties(self.path_operation, "requestBody")
-            )
-            self._inputs.update(
-                self._extract_properties(self.path_operation, "parameters")
-            )
-        return self._inputs
-
-    @property
-    def outputs(self) -> Dict[str, SchemaObjectProperty]:
-        if not hasattr(self, "_outputs"):
-            self._outputs = self._extract_properties(self.path_operation, "responses")
-        return self._outputs
+        self.database = element["x-am-database"]
+        self.sql = element["x-am-sql"]
+        self.inputs: Dict[str, SchemaObjectProperty] = dict()
+        self.inputs.update(self._extract_properties(element, "requestBody", spec))
+        self.inputs.update(self._extract_properties(element, "parameters", spec))
+        self.outputs = self._extract_properties(element, "responses", spec)
+        self.snake_names = {
+            input.camel_name: name for name, input in self.inputs.items()
+        }
 
     def _extract_properties(
-        self, operation: Dict[str, Any], section: str
+        self,
+        operation: Dict[str, Any],
+        section: str,
+        spec: Optional[Dict[str, Any]],
     ) -> Dict[str, SchemaObjectProperty]:
         properties = {}
         if section == "requestBody":
-            for name, property in (self.get(["requestBody", "content"]) or {}).items():
-                properties[name] = SchemaObjectProperty(
-                    self.path, name, property, self.spec
-                )
+            content = (operation.get("requestBody") or {}).get("content") or {}
+            for name, property in content.items():
+                properties[name] = SchemaObjectProperty(self.path, name, property, spec)
         elif section == "parameters":
-            for property in self.get("parameters") or {}:
+            for property in operation.get("parameters") or {}:
                 properties[property["name"]] = SchemaObjectProperty(
-                    self.path, property["name"], property, self.spec
+                    self.path, property["name"], property, spec
                 )
         elif section == "responses":
-            responses = self.get("responses")
+            responses = operation.get("responses")
             if responses:
                 pattern = re.compile(r"2\d{2}|2xx")
                 for status_code, response in responses.items():
                     if pattern.fullmatch(status_code):
                         log.info(f"response: {response}")
-                        content = (
-                            self.get(
-                                [
-                                    "content",
-                                    "application/json",
-                                    "schema",
-                                    "items",
-                                    "properties",
-                                ],
-                                response,
+                        content = response
+                        for key in [
+                            "content",
+                            "application/json",
+                            "schema",
+                            "items",
+                            "properties",
+                        ]:
+                            content = resolve_element(content, spec)
+                            content = (
+                                content.get(key) if isinstance(content, dict) else None
                             )
-                            or {}
-                        )
                         log.info(f"content: {content}")
-                        for name, property in content.items():
+                        for name, property in (content or {}).items():
                             properties[name] = SchemaObjectProperty(
-                                self.path, name, property, self.spec
+                                self.path, name, property, spec
                             )
         return properties
 
-    def _get_schema_properties(
-        self, schema: Dict[str, Any], param_name: str = None
-    ) -> Dict[str, SchemaObjectProperty]:
-        properties = {}
-        schema_ref = schema.get("$ref")
-        if schema_ref:
-            schema = self.resolve_reference(schema_ref)
-        if "properties" in schema:
-            for prop_name, prop_spec in schema["properties"].items():
-                properties[prop_name] = SchemaObjectProperty(
-                    self.path, prop_name, prop_spec, self.spec
-                )
-        elif param_name:
-            properties[param_name] = SchemaObjectProperty(self.path, param_name, schema)
-        return properties
-
 
 class ModelFactory:
-    spec: dict
+    spec: Optional[dict] = None
     schema_objects: Dict[str, SchemaObject] = {}
-    path_operations: Dict[str, PathOperation] = []
+    path_operations: Dict[str, PathOperation] = {}
+
+    @classmethod
+    def load(cls, api_spec_path: str):
+        """
+        Load the precompiled model for the API spec, the YAML spec is only
+        parsed when the model artifact is missing, was written by an
+        incompatible version or was compiled from a different spec.
+        """
+        if not cls.load_model(
+            model_artifact_path(api_spec_path), spec_checksum(api_spec_path)
+        ):
+            cls.load_yaml(api_spec_path)
+            cls.release_spec()
 
     @classmethod
     def load_yaml(cls, api_spec_path: str):
+        # yaml is imported lazily, it is not needed when the model is precompiled
+        import yaml
+
         if api_spec_path:
             with open(api_spec_path, "r") as yaml_file:
-                spec = yaml.safe_load(yaml_file)
+                # the libyaml loader is much faster when it is available
+                spec = yaml.load(
+                    yaml_file, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+                )
         cls.set_spec(spec)
 
+    @classmethod
+    def load_model(cls, model_path: str, checksum: Optional[int] = None) -> bool:
+        """
+        Load a model written by compile_model.
+
+        Parameters:
+        - model_path (str): The model artifact.
+        - checksum (int): The spec_checksum of the deployed spec, the model
+            is not loaded if it was compiled from another spec.
+
+        Returns:
+        - bool: True if the model was loaded.
+        """
+        try:
+            with open(model_path, "rb") as model_file:
+                # the version is a separate leading record so the model of an
+                # incompatible version is never unpickled
+                version = pickle.load(model_file)
+                if version != MODEL_ARTIFACT_VERSION:
+                    log.warning(
+                        f"Ignoring model artifact {model_path}, version: "
+                        + f"{version}, expected: {MODEL_ARTIFACT_VERSION}"
+                    )
+                    return False
+                model = pickle.load(model_file)
+        except FileNotFoundError:
+            return False
+        except (pickle.UnpicklingError, AttributeError, ImportError, EOFError) as err:
+            log.warning(f"Ignoring model artifact {model_path}, error: {err}")
+            return False
+
+        if checksum is not None and model.get("spec_checksum") != checksum:
+            log.warning(
+                f"Ignoring model artifact {model_path}, "
+                + "it was compiled from a different API spec"
+            )
+            return False
+
+        cls.spec = model["spec"]
+        cls.schema_objects = model["schema_objects"]
+        cls.path_operations = model["path_operations"]
+        return True
+
+    @classmethod
+    def compile_model(cls, api_spec_path: str, model_path: Optional[str] = None):
+        """
+        Build the model for an API spec and write it as a pickle that can be
+        loaded without parsing the spec.  The raw spec is not included.
+
+        Parameters:
+        - api_spec_path (str): The YAML API spec.
+        - model_path (str): The artifact to write, defaults to the
+            model_artifact_path of the spec.
+
+        Returns:
+        - str: The path of the artifact written.
+        """
+        cls.load_yaml(api_spec_path)
+        cls.release_spec()
+
+        model_path = model_path or model_artifact_path(api_spec_path)
+        with open(model_path, "wb") as model_file:
+            pickle.dump(MODEL_ARTIFACT_VERSION, model_file)
+            pickle.dump(
+                {
+                    "spec_checksum": spec_checksum(api_spec_path),
+                    "spec": cls.spec,
+                    "schema_objects": cls.schema_objects,
+                    "path_operations": cls.path_operations,
+                },
+                model_file,
+                protocol=MODEL_ARTIFACT_PROTOCOL,
+            )
+        return model_path
+
+    @classmethod
+    def release_spec(cls):
+        """
+        Drop the references to the raw spec once the model is built, the
+        model objects hold everything needed to process requests.  The spec
+        is required to generate the gateway spec, see GatewaySpec.
+        """
+        if cls.spec is not None:
+            release_resolver(cls.spec)
+        cls.spec = None
+        for schema_object in cls.schema_objects.values():
+            schema_object.schema_object = None
+
     @classmethod
     def set_spec(cls, spec: dict):
         cls.spec = spec
@@ -412,6 +723,7 @@ class ModelFactory:
                 cls.schema_objects[name.lower()] = schema
 
         cls.initialize_schema_objects()
+        cls.initialize_relations()
         cls.initialize_path_operations()
 
     @classmethod
@@ -419,6 +731,14 @@ class ModelFactory:
         for name, schema in cls.schema_objects.items():
             cls.schema_objects[name] = SchemaObject(name, schema, cls.spec)
 
+    @classmethod
+    def initialize_relations(cls):
+        # relations are linked once the schema objects exist, errors in the
+        # spec are raised when it is loaded instead of by requests
+        for schema_object in cls.schema_objects.values():
+            for relation in schema_object.relations.values():
+                relation.link(schema_object, cls.schema_objects)
+
     @classmethod
     def initialize_path_operations(cls):
         paths = cls.spec.get("paths", {})
@@ -0,0 +1,227 @@
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from typing import Optional
+
+from api_maker.operation import Operation
+from api_maker.utils.app_exception import ApplicationException
+from api_maker.utils.json_codec import dumps
+from api_maker.utils.logger import logger
+
+# fraction of requests profiled without being requested
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+# directory the profiles are written to, they are logged when not set
+PROFILE_DIR = os.environ.get("PROFILE_DIR")
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", 2))
+PROFILE_TOP_ALLOCATIONS = int(os.environ.get("PROFILE_TOP_ALLOCATIONS", 20))
+
+profile_log = logger("api_maker.profile")
+
+_NOT_PROFILED = nullcontext()
+
+
+def profile_requested(operation: Operation) -> bool:
+    """
+    Whether to profile an operation, either requested by the profile
+    metadata parameter, which is removed from the operation, or sampled.
+
+    Raises:
+    - ApplicationException: 403 if profiling is requested but not allowed.
+    """
+    flag = operation.metadata_params.pop("profile", None)
+    if flag is not None and str(flag).lower() not in ["false", "0"]:
+        if os.environ.get("ALLOW_PROFILE", "false").lower() != "true":
+            raise ApplicationException(403, "Profiling is not enabled for this api")
+        return True
+    if PROFILE_SAMPLE_RATE <= 0:
+        return False
+
+    import random
+
+    return random.random() < PROFILE_SAMPLE_RATE
+
+
+def operation_shape(operation: Operation) -> dict:
+    """
+    The operation and the names of its parameters, values are omitted.
+    """
+    return {
+        "operation_id": operation.operation_id,
+        "action": operation.action,
+        "query_params": sorted(operation.query_params),
+        "metadata_params": sorted(operation.metadata_params),
+    }
+
+
+class StackSampler:
+    """
+    Samples the call stack of a thread at a fixed interval, counting the
+    samples of each stack in the collapsed format used by flame graph tools.
+    """
+
+    def __init__(self, thread_id: int, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.thread_id = thread_id
+        self.interval = interval_ms / 1000
+        self.stacks: dict[str, int] = {}
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(
+                f"{frame.f_globals.get('__name__', code.co_filename)}:{code.co_name}"
+            )
+            frame = frame.f_back
+        if names:
+            stack = ";".join(reversed(names))
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def collapsed(self) -> str:
+        return "\n".join(
+            f"{stack} {count}"
+            for stack, count in sorted(
+                self.stacks.items(), key=lambda item: item[1], reverse=True
+            )
+        )
+
+
+# profiles in progress, tracemalloc is stopped when the last profile that
+# needed it to be started exits
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_profiles = 0
+_tracemalloc_started = False
+
+
+class RequestProfile:
+    """
+    Profiles the processing of an operation with a stack sampler and
+    tracemalloc, the profile is written when the context exits.  Profiling
+    failures are logged, they never fail the request.
+
+    Concurrent profiles share tracemalloc, so their peaks include the
+    allocations of the other profiles.
+    """
+
+    def __init__(self, operation: Operation):
+        self.shape = operation_shape(operation)
+        self.sampler = StackSampler(threading.get_ident())
+        self.tracing = False
+
+    def __enter__(self):
+        global _tracemalloc_profiles, _tracemalloc_started
+
+        # tracemalloc is only imported when a request is profiled
+        import tracemalloc
+
+        try:
+            with _tracemalloc_lock:
+                if _tracemalloc_profiles == 0 and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    _tracemalloc_started = True
+                _tracemalloc_profiles += 1
+                self.tracing = True
+                # the peak of the request, not of the whole tracing session
+                tracemalloc.reset_peak()
+            self.sampler.start()
+        except Exception as error:
+            profile_log.warning(f"profiling failed to start: {error}")
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        global _tracemalloc_profiles, _tracemalloc_started
+
+        import tracemalloc
+
+        elapsed_ms = (time.perf_counter() - self.start) * 1000
+        try:
+            if self.sampler.thread.is_alive():
+                self.sampler.stop()
+            with _tracemalloc_lock:
+                if not self.tracing:
+                    return
+                try:
+                    snapshot = tracemalloc.take_snapshot()
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    self.tracing = False
+                    _tracemalloc_profiles -= 1
+                    if _tracemalloc_profiles == 0 and _tracemalloc_started:
+                        tracemalloc.stop()
+                        _tracemalloc_started = False
+
+            snapshot = snapshot.filter_traces(
+                [
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, __file__),
+                ]
+            )
+            write_profile(
+                {
+                    "shape": self.shape,
+                    "elapsed_ms": round(elapsed_ms, 3),
+                    "peak_bytes": peak,
+                    "collapsed": self.sampler.collapsed(),
+                    "allocations": [
+                        {
+                            "site": f"{statistic.traceback[0].filename}:"
+                            + f"{statistic.traceback[0].lineno}",
+                            "bytes": statistic.size,
+                            "count": statistic.count,
+                        }
+                        for statistic in snapshot.statistics("lineno")[
+                            :PROFILE_TOP_ALLOCATIONS
+                        ]
+                    ],
+                }
+            )
+        except Exception as error:
+            profile_log.warning(f"profile not written: {error}")
+
+
+def write_profile(profile: dict, directory: Optional[str] = None):
+    """
+    Write a profile to the profile directory, as a collapsed stack file and
+    a JSON file with the shape and allocations, or to the profile log.
+    """
+    directory = directory or PROFILE_DIR
+    if not directory:
+        profile_log.info(f"profile: {dumps(profile).decode('utf-8')}")
+        return
+
+    os.makedirs(directory, exist_ok=True)
+    shape = profile["shape"]
+    name = os.path.join(
+        directory,
+        f"{int(time.time() * 1000)}-{shape['operation_id']}-{shape['action']}",
+    )
+    with open(f"{name}.collapsed", "w") as collapsed_file:
+        collapsed_file.write(profile["collapsed"] + "\n")
+    with open(f"{name}.json", "wb") as profile_file:
+        profile_file.write(
+            dumps({key: value for key, value in profile.items() if key != "collapsed"})
+        )
+
+
+def request_profile(operation: Operation):
+    """
+    Context manager profiling the processing of an operation when profiling
+    is requested or the request is sampled, see profile_requested.
+    """
+    return RequestProfile(operation) if profile_requested(operation) else _NOT_PROFILED
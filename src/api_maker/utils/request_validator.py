@@ -0,0 +1,235 @@
+import re
+from typing import Dict, Optional
+
+from api_maker.dao.sql_query_handler import RELATIONAL_TYPES, TEXT_SEARCH_TYPES
+from api_maker.operation import Operation
+from api_maker.utils.app_exception import ApplicationException
+from api_maker.utils.logger import logger
+from api_maker.utils.model_factory import (
+    ModelFactory,
+    SchemaObject,
+    SchemaObjectProperty,
+)
+
+log = logger(__name__)
+
+# the patterns of filter and store values by API type, values of other
+# types are only checked by the query handlers
+VALUE_PATTERNS = {
+    "integer": re.compile(r"[-+]?\d+"),
+    "number": re.compile(r"[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?"),
+    "float": re.compile(r"[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?"),
+    "boolean": re.compile(r"true|false", re.IGNORECASE),
+    "date": re.compile(r"\d{4}-\d{2}-\d{2}"),
+    "date-time": re.compile(
+        r"\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}:?\d{2})?"
+    ),
+    "time": re.compile(r"\d{2}:\d{2}(:\d{2}(\.\d+)?)?"),
+}
+
+TEXT_SEARCH_OPERATORS = frozenset(TEXT_SEARCH_TYPES)
+RELATIONAL_OPERATORS = frozenset(RELATIONAL_TYPES) - TEXT_SEARCH_OPERATORS
+LIST_OPERATORS = frozenset(["in", "not-in"])
+RANGE_OPERATORS = frozenset(["between", "not-between"])
+
+INTEGER_METADATA = ("limit", "offset")
+
+
+class PropertyValidator:
+    """
+    Validates the filter and store values of a property.
+    """
+
+    __slots__ = ("name", "property", "type_pattern", "pattern", "operators")
+
+    def __init__(self, name: str, property: SchemaObjectProperty):
+        self.name = name
+        self.property = property
+        self.type_pattern = VALUE_PATTERNS.get(property.api_type)
+        is_string = property.api_type == "string"
+        self.pattern = None
+        if is_string and property.pattern:
+            try:
+                self.pattern = re.compile(property.pattern)
+            except re.error as error:
+                log.warning(f"Pattern of {name} is not validated: {error}")
+        self.operators = (
+            RELATIONAL_OPERATORS | TEXT_SEARCH_OPERATORS
+            if is_string
+            else RELATIONAL_OPERATORS
+        )
+
+    def validate_filter(self, value):
+        if not isinstance(value, str):
+            return
+
+        parts = value.split("::", 1)
+        if len(parts) == 1:
+            self.validate_value(value)
+            return
+
+        operator, value = parts
+        if operator not in self.operators:
+            raise ApplicationException(
+                400,
+                f"Unsupported operator, property: {self.name}, operator: {operator}",
+            )
+        if operator in TEXT_SEARCH_OPERATORS:
+            # text search values are patterns or words, not property values
+            return
+
+        if operator in LIST_OPERATORS or operator in RANGE_OPERATORS:
+            values = value.split(",")
+            if operator in RANGE_OPERATORS and len(values) != 2:
+                raise ApplicationException(
+                    400,
+                    f"Range requires two values, property: {self.name}, "
+                    + f"value: {value}",
+                )
+        else:
+            values = [value]
+        for item in values:
+            self.validate_value(item)
+
+    def validate_value(self, value):
+        if not isinstance(value, str):
+            return
+
+        if self.type_pattern and not self.type_pattern.fullmatch(value):
+            raise ApplicationException(
+                400,
+                f"Invalid {self.property.api_type} value, property: {self.name}, "
+                + f"value: {value}",
+            )
+        if self.property.api_type != "string":
+            return
+
+        if self.property.max_length is not None and len(value) > int(
+            self.property.max_length
+        ):
+            raise ApplicationException(
+                400,
+                f"Value exceeds the maximum length of {self.property.max_length}, "
+                + f"property: {self.name}",
+            )
+        if self.property.min_length is not None and len(value) < int(
+            self.property.min_length
+        ):
+            raise ApplicationException(
+                400,
+                "Value is shorter than the minimum length of "
+                + f"{self.property.min_length}, property: {self.name}",
+            )
+        if self.pattern and not self.pattern.search(value):
+            raise ApplicationException(
+                400,
+                f"Value does not match the pattern of property: {self.name}",
+            )
+
+
+class SchemaObjectValidator:
+    """
+    Validates the operations on a schema object before any database work.
+    Filters may select on the properties of the schema object and of the
+    objects it relates to, sorting is limited to object relations.
+    """
+
+    def __init__(self, schema_object: SchemaObject):
+        self.operation_id = schema_object.operation_id
+        self.properties: Dict[str, PropertyValidator] = {
+            name: PropertyValidator(name, property)
+            for name, property in schema_object.properties.items()
+        }
+        self.filters = dict(self.properties)
+        self.sortable = set(self.properties)
+        for relation_name, relation in schema_object.relations.items():
+            for name, property in relation.child_schema_object.properties.items():
+                field = f"{relation_name}.{name}"
+                self.filters[field] = PropertyValidator(field, property)
+                if relation.cardinality == "one":
+                    self.sortable.add(field)
+
+    def validate(self, operation: Operation):
+        for name, value in operation.query_params.items():
+            validator = self.filters.get(name)
+            if not validator:
+                raise ApplicationException(
+                    400,
+                    f"Invalid query parameter, schema object: {self.operation_id}, "
+                    + f"property: {name}",
+                )
+            validator.validate_filter(value)
+
+        if operation.action in ("create", "update"):
+            for name, value in (operation.store_params or {}).items():
+                validator = self.properties.get(name)
+                if not validator:
+                    raise ApplicationException(
+                        400,
+                        f"Invalid property, schema object: {self.operation_id}, "
+                        + f"property: {name}",
+                    )
+                validator.validate_value(value)
+
+        self.validate_metadata(operation.metadata_params)
+
+    def validate_metadata(self, metadata_params: dict):
+        for name in INTEGER_METADATA:
+            value = metadata_params.get(name)
+            if isinstance(value, str) and value and not value.isdigit():
+                raise ApplicationException(
+                    400, f"Invalid {name}, value must be an integer: {value}"
+                )
+
+        sort = metadata_params.get("sort")
+        if not isinstance(sort, str) or (
+            "aggregate" in metadata_params or "group_by" in metadata_params
+        ):
+            # aggregate aliases are validated by the query handler
+            return
+        for field in sort.replace(",", " ").split():
+            name, _, order = field.partition(":")
+            if order and order not in ("asc", "desc"):
+                raise ApplicationException(400, f"Unrecognized sorting order: {field}")
+            if name not in self.sortable:
+                raise ApplicationException(
+                    400,
+                    f"Invalid sort property, schema object: {self.operation_id}, "
+                    + f"property: {name}",
+                )
+
+
+def compile_validators() -> Dict[str, SchemaObjectValidator]:
+    return {
+        name: SchemaObjectValidator(ModelFactory.get_schema_object(name))
+        for name in ModelFactory.get_schema_names()
+    }
+
+
+# the validators and the model they were compiled from
+_validators: tuple = (None, {})
+
+
+def get_validator(operation: Operation) -> Optional[SchemaObjectValidator]:
+    """
+    The validator of the schema object an operation is on, None for path
+    operations and entities that are not in the model.
+    """
+    global _validators
+    if _validators[0] is not ModelFactory.schema_objects:
+        _validators = (ModelFactory.schema_objects, compile_validators())
+    if ModelFactory.get_path_operation(operation.operation_id, operation.action):
+        return None
+    return _validators[1].get(operation.operation_id)
+
+
+def validate(operation: Operation):
+    """
+    Validate an operation against the model.
+
+    Raises:
+    - ApplicationException: 400 if the operation is invalid.
+    """
+    validator = get_validator(operation)
+    if validator:
+        validator.validate(operation)
@@ -1,10 +1,152 @@
+from collections import OrderedDict
 from typing import Any, List, Dict, Optional, Union
 
+from api_maker.utils.app_exception import ApplicationException
+
+
+class ResolvedElement(dict):
+    """
+    A specification element with its $ref merged in.  The keys of the
+    element take precedence over the keys of the referenced element, the
+    $ref itself is kept so the reference target can still be identified.
+    """
+
+
+class SpecificationResolver:
+    """
+    Builds the resolved graph of a specification in one pass.
+
+    Every object in the specification is copied once into a ResolvedElement
+    and $ref targets are memoized, elements referencing the same component
+    share the resolved component so recursive schemas become cycles in the
+    graph.  A $ref chain that refers back to itself raises an exception.
+
+    The specification must not be modified after it has been resolved.
+    """
+
+    def __init__(self, spec: Dict):
+        self.spec = spec
+        self.elements: Dict[int, ResolvedElement] = {}
+        self.references: Dict[str, Optional[Any]] = {}
+        self.root = self.build(spec)
+
+        merged = set()
+        for element in list(self.elements.values()):
+            self.merge(element, merged, [])
+
+    def build(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            element = self.elements.get(id(value))
+            if element is None:
+                element = ResolvedElement()
+                self.elements[id(value)] = element
+                for key, item in value.items():
+                    element[key] = self.build(item)
+            return element
+        if isinstance(value, list):
+            return [self.build(item) for item in value]
+        return value
+
+    def merge(self, element: ResolvedElement, merged: set, chain: List[str]):
+        if id(element) in merged or "$ref" not in element:
+            return
+        reference = element["$ref"]
+        if reference in chain:
+            raise ApplicationException(
+                500, f"Circular $ref: {' -> '.join(chain + [reference])}"
+            )
+
+        target = self.reference(reference)
+        if isinstance(target, ResolvedElement):
+            self.merge(target, merged, chain + [reference])
+            for key, value in target.items():
+                if key not in element:
+                    element[key] = value
+        merged.add(id(element))
+
+    def reference(self, reference: str) -> Optional[Any]:
+        if reference not in self.references:
+            target = None
+            if isinstance(reference, str) and reference.startswith("#/"):
+                target = self.root
+                for key in reference[2:].split("/"):
+                    key = key.replace("~1", "/").replace("~0", "~")
+                    if not isinstance(target, dict) or key not in target:
+                        target = None
+                        break
+                    target = target[key]
+            self.references[reference] = target
+        return self.references[reference]
+
+    def resolve(self, value: Any) -> Any:
+        """
+        Get the resolved form of a value, values that are not part of the
+        specification are resolved without being memoized.
+        """
+        if isinstance(value, ResolvedElement):
+            return value
+        if isinstance(value, dict):
+            element = self.elements.get(id(value))
+            if element is not None:
+                return element
+            element = ResolvedElement(
+                (key, self.resolve(item)) for key, item in value.items()
+            )
+            if "$ref" in element:
+                target = self.reference(element["$ref"])
+                if isinstance(target, dict):
+                    for key, item in target.items():
+                        if key not in element:
+                            element[key] = item
+            return element
+        if isinstance(value, list):
+            return [self.resolve(item) for item in value]
+        return value
+
+
+# resolvers by specification, a spec is normally resolved once per process
+_resolvers: "OrderedDict[int, SpecificationResolver]" = OrderedDict()
+_RESOLVER_CACHE_SIZE = 8
+
+
+def get_resolver(spec: Dict) -> SpecificationResolver:
+    resolver = _resolvers.get(id(spec))
+    if resolver is None or resolver.spec is not spec:
+        resolver = SpecificationResolver(spec)
+        _resolvers[id(spec)] = resolver
+        while len(_resolvers) > _RESOLVER_CACHE_SIZE:
+            _resolvers.popitem(last=False)
+    else:
+        _resolvers.move_to_end(id(spec))
+    return resolver
+
+
+def release_resolver(spec: Dict):
+    """
+    Drop the cached resolver of a specification, releasing its resolved
+    element graph.
+    """
+    resolver = _resolvers.get(id(spec))
+    if resolver is not None and resolver.spec is spec:
+        del _resolvers[id(spec)]
+
 
 class SpecificationHandler:
     def __init__(self, spec: Dict):
         self.spec = spec
 
+    @property
+    def resolver(self) -> SpecificationResolver:
+        if not hasattr(self, "_resolver"):
+            self._resolver = get_resolver(self.spec)
+        return self._resolver
+
+    def __getstate__(self):
+        # the resolver is rebuilt on demand after unpickling
+        state = dict(self.__dict__)
+        state.pop("_resolver", None)
+        return state
+
     def resolve_reference(self, reference: str) -> Optional[Any]:
         """
         Resolve a $ref reference in an OpenAPI specification.
@@ -15,11 +157,7 @@ class SpecificationHandler:
         Returns:
             Optional[Any]: The resolved reference or None if not found.
         """
-        if not reference.startswith("#/"):
-            return None
-
-        parts = reference[2:].split("/")
-        return self.traverse_spec(self.spec, parts)
+        return self.resolver.reference(reference)
 
     def traverse_spec(
         self, spec: Dict[str, Any], keys: List[str]
@@ -35,16 +173,8 @@ class SpecificationHandler:
             Optional[Any]: The value found at the specified path or None if any key
                 is not found.
         """
-        current_element = spec
+        current_element = self.resolver.resolve(spec)
         for key in keys:
-            while isinstance(current_element, dict) and "$ref" in current_element:
-                resolved_reference = self.resolve_reference(current_element["$ref"])
-                if resolved_reference:
-                    current_element = {**current_element, **resolved_reference}
-                    current_element.pop("$ref")
-                if current_element is None:
-                    return None
-
             if not isinstance(current_element, dict) or key not in current_element:
                 return None
             current_element = current_element[key]
@@ -57,18 +187,11 @@ class SpecificationHandler:
         key: Union[List[str], str],
         default: Optional[Any] = None,
     ) -> Optional[Any]:
-        current_element = spec
-
         if isinstance(key, list):
             return self.traverse_spec(spec, key) or default
 
+        current_element = self.resolver.resolve(spec)
         if isinstance(current_element, dict):
-            if key in current_element:
-                return current_element[key]
-
-            if "$ref" in current_element:
-                resolved_reference = self.resolve_reference(current_element["$ref"])
-                if resolved_reference:
-                    return self.get(resolved_reference, key, default)
+            return current_element.get(key, default)
 
         return default
@@ -0,0 +1,76 @@
+import os
+from contextlib import nullcontext
+
+from api_maker.utils.logger import logger
+
+log = logger(__name__)
+
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "false").lower() == "true"
+
+# returned by span when tracing is disabled, its value is None so callers
+# only build span attributes when a span is recorded
+_NO_SPAN = nullcontext()
+
+# the opentelemetry tracer, False when tracing is disabled or the optional
+# opentelemetry package is not installed, None until first used
+_tracer = None
+
+
+def get_tracer():
+    global _tracer
+    if _tracer is None:
+        _tracer = False
+        if TRACING_ENABLED:
+            try:
+                # opentelemetry is optional and imported on first use
+                from opentelemetry import trace
+
+                _tracer = trace.get_tracer("api_maker")
+            except ImportError:
+                log.warning("Tracing is enabled but opentelemetry is not installed")
+    return _tracer
+
+
+def reset_tracer():
+    """
+    Resolve the tracer again on the next span, after TRACING_ENABLED or the
+    tracer provider changed.
+    """
+    global _tracer
+    _tracer = None
+
+
+def span(name: str):
+    """
+    Context manager recording a span as a child of the current span.  The
+    value of the context is the span, or None when tracing is disabled.
+    """
+    tracer = _tracer if _tracer is not None else get_tracer()
+    if not tracer:
+        return _NO_SPAN
+    return tracer.start_as_current_span(name)
+
+
+def request_span(event: dict):
+    """
+    Context manager recording the server span of an API Gateway request,
+    continuing the trace of the trace context headers of the request.
+    """
+    tracer = _tracer if _tracer is not None else get_tracer()
+    if not tracer:
+        return _NO_SPAN
+
+    from opentelemetry import propagate
+    from opentelemetry.trace import SpanKind
+
+    headers = {
+        name.lower(): value for name, value in (event.get("headers") or {}).items()
+    }
+    method = event.get("httpMethod")
+    resource = event.get("resource")
+    return tracer.start_as_current_span(
+        f"{method} {resource}",
+        context=propagate.extract(headers),
+        kind=SpanKind.SERVER,
+        attributes={"http.method": method, "http.route": resource},
+    )
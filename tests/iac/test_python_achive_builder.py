@@ -142,3 +142,17 @@ def test_hash_comparison(working_dir):
         builder.hash()
         == "3d57a25d98473971cfc17b0ca68376e8adae9b531ae50f0d1d62660d2129e1a0"
     )
+
+
+def test_compile_api_spec(working_dir):
+    builder = PythonArchiveBuilder(
+        name="test",
+        sources={"api_spec.yaml": "resources/chinook_api.yaml"},
+        requirements=[],
+        working_dir=working_dir,
+        api_spec="api_spec.yaml",
+    )
+
+    builder.build_archive()
+    with ZipFile(builder._location, "r") as zipf:
+        assert "api_spec.model.pickle" in zipf.namelist()
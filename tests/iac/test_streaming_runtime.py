@@ -0,0 +1,83 @@
+import json
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from api_maker.iac.streaming_runtime import process_next_invocation
+
+
+class FakeRuntimeApi(BaseHTTPRequestHandler):
+    event = {"resource": "/album"}
+    responses = []
+
+    def do_GET(self):
+        body = json.dumps(self.event).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Lambda-Runtime-Aws-Request-Id", "request-1")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().strip(), 16)
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+            if size == 0:
+                break
+        self.responses.append(
+            {
+                "path": self.path,
+                "mode": self.headers.get("Lambda-Runtime-Function-Response-Mode"),
+                "chunks": chunks[:-1],
+            }
+        )
+        self.send_response(202)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def runtime_api():
+    server = HTTPServer(("127.0.0.1", 0), FakeRuntimeApi)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    FakeRuntimeApi.responses.clear()
+    yield f"127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.unit
+class TestStreamingRuntime:
+    def test_process_next_invocation(self, runtime_api):
+        received = []
+
+        def handler(event, response_stream):
+            received.append(event)
+            response_stream.write(b"first")
+            response_stream.write(b"second")
+            response_stream.close()
+
+        process_next_invocation(runtime_api, handler)
+
+        assert received == [{"resource": "/album"}]
+        assert FakeRuntimeApi.responses == [
+            {
+                "path": "/2018-06-01/runtime/invocation/request-1/response",
+                "mode": "streaming",
+                "chunks": [b"first", b"second"],
+            }
+        ]
+
+    def test_handler_error_closes_stream(self, runtime_api):
+        def handler(event, response_stream):
+            raise Exception("failed")
+
+        process_next_invocation(runtime_api, handler)
+
+        assert FakeRuntimeApi.responses[0]["chunks"] == []
@@ -1,7 +1,11 @@
 from api_maker.services.service import Service
 from api_maker.adapters.adapter import Adapter
+from api_maker.adapters.case_change_adapter import CaseChangeAdapter
+from api_maker.adapters.gateway_adapter import GatewayAdapter
 from api_maker.operation import Operation
 
+from test_fixtures import load_model  # noqa F401
+
 
 class MockService(Service):
     def execute(self, operation):
@@ -40,3 +44,53 @@ class TestAdapter:
 
         # Asserting the result
         assert result == [{"key": "value"}]
+
+
+class RecordingService(Service):
+    def execute(self, operation):
+        self.operation = operation
+        return [{"invoiceId": 1}]
+
+
+class CamelCaseGatewayAdapter(CaseChangeAdapter, GatewayAdapter):
+    pass
+
+
+class TestCaseChangeAdapter:
+    def test_camel_case_parameters(self, load_model):  # noqa F811
+        service = RecordingService()
+        adapter = CamelCaseGatewayAdapter(service)
+
+        result = adapter.process_event(
+            {
+                "resource": "/invoice",
+                "httpMethod": "GET",
+                "queryStringParameters": {"billingCountry": "USA", "customerId": 2},
+                "pathParameters": None,
+                "body": None,
+            }
+        )
+
+        assert result == [{"invoiceId": 1}]
+        assert service.operation.query_params == {
+            "billing_country": "USA",
+            "customer_id": 2,
+        }
+        assert service.operation.metadata_params == {"case": "camel"}
+
+    def test_snake_case_parameters(self, load_model):  # noqa F811
+        service = RecordingService()
+        adapter = CamelCaseGatewayAdapter(service)
+
+        adapter.process_event(
+            {
+                "resource": "/invoice",
+                "httpMethod": "GET",
+                "queryStringParameters": {"billing_country": "USA"},
+                "pathParameters": None,
+                "body": None,
+            }
+        )
+
+        assert service.operation.query_params == {"billing_country": "USA"}
+        assert "case" not in service.operation.metadata_params
@@ -0,0 +1,207 @@
+import pytest
+
+from api_maker.adapters.gateway_adapter import GatewayAdapter
+from api_maker.connectors.connection import Connection, Cursor
+from api_maker.iac import handler
+from api_maker.services import transactional_service
+from api_maker.services.transactional_service import TransactionalService
+from api_maker.utils.app_exception import ApplicationException
+from api_maker.utils.json_codec import dumps, loads
+from api_maker.utils.model_factory import ModelFactory
+
+
+def schema(database: str) -> dict:
+    return {
+        "type": "object",
+        "x-am-database": database,
+        "properties": {
+            "id": {"type": "integer", "x-am-primary-key": "auto"},
+            "name": {"type": "string"},
+        },
+    }
+
+
+@pytest.fixture
+def batch_model():
+    ModelFactory.set_spec(
+        {
+            "openapi": "3.0.0",
+            "components": {
+                "schemas": {
+                    "album": schema("music"),
+                    "artist": schema("music"),
+                    "invoice": schema("billing"),
+                }
+            },
+        }
+    )
+    yield
+    ModelFactory.set_spec({"openapi": "3.0.0"})
+
+
+class RecordingCursor(Cursor):
+    def close(self):
+        pass
+
+
+class RecordingConnection(Connection):
+    def __init__(self, database: str, events: list):
+        super().__init__({"engine": "postgres"})
+        self.database = database
+        self.events = events
+
+    def cursor(self) -> Cursor:
+        return RecordingCursor()
+
+    def commit(self):
+        self.events.append((self.database, "commit"))
+
+    def rollback(self):
+        self.events.append((self.database, "rollback"))
+
+    def close(self):
+        self.events.append((self.database, "close"))
+
+
+class FakeDAO:
+    def __init__(self, operation, engine: str):
+        self.operation = operation
+
+    def execute(self, cursor):
+        if self.operation.store_params.get("name") == "fail":
+            raise ApplicationException(409, "duplicate key")
+        return [{"entity": self.operation.operation_id}]
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    events = []
+    monkeypatch.setattr(
+        transactional_service.connection_factory,
+        "get_connection",
+        lambda database: RecordingConnection(database, events),
+    )
+    monkeypatch.setattr(transactional_service, "OperationDAO", FakeDAO)
+    return events
+
+
+def batch_event(requests: list) -> dict:
+    return {
+        "resource": "/_batch",
+        "httpMethod": "POST",
+        "headers": {},
+        "body": dumps(requests).decode("utf-8"),
+    }
+
+
+@pytest.mark.unit
+class TestBatch:
+    def test_unmarshal_batch(self):
+        operations = GatewayAdapter().unmarshal_batch(
+            batch_event(
+                [
+                    {"entity": "album", "params": {"album_id": "5", "__sort": "title"}},
+                    {"method": "post", "entity": "invoice", "body": {"total": 1}},
+                ]
+            )
+        )
+        assert [(op.operation_id, op.action) for op in operations] == [
+            ("album", "read"),
+            ("invoice", "create"),
+        ]
+        assert operations[0].query_params == {"album_id": 5}
+        assert operations[0].metadata_params == {"sort": "title"}
+        assert operations[1].store_params == {"total": 1}
+
+    def test_unmarshal_batch_invalid(self):
+        with pytest.raises(ApplicationException) as error:
+            GatewayAdapter().unmarshal_batch(batch_event({"entity": "album"}))
+        assert error.value.status_code == 400
+
+        operations = GatewayAdapter().unmarshal_batch(
+            batch_event([{"method": "GET"}, {"entity": "album"}])
+        )
+        assert isinstance(operations[0], ApplicationException)
+        assert operations[0].status_code == 400
+        assert operations[1].operation_id == "album"
+
+    def test_execute_batch_per_database(self, batch_model, connections):
+        adapter = GatewayAdapter(TransactionalService())
+        results = adapter.process_batch_event(
+            batch_event(
+                [
+                    {"entity": "album"},
+                    {"method": "POST", "entity": "invoice", "body": {}},
+                    {"entity": "artist"},
+                ]
+            )
+        )
+
+        assert results == [
+            {"status": 200, "result": [{"entity": "album"}]},
+            {"status": 200, "result": [{"entity": "invoice"}]},
+            {"status": 200, "result": [{"entity": "artist"}]},
+        ]
+        # one connection per database, only the database with a mutation commits
+        assert sorted(connections) == [
+            ("billing", "close"),
+            ("billing", "commit"),
+            ("music", "close"),
+        ]
+
+    def test_execute_batch_partial_failure(self, batch_model, connections):
+        results = TransactionalService().execute_batch(
+            GatewayAdapter().unmarshal_batch(
+                batch_event(
+                    [
+                        {"method": "POST", "entity": "album", "body": {}},
+                        {
+                            "method": "POST",
+                            "entity": "artist",
+                            "body": {"name": "fail"},
+                        },
+                        {"method": "POST", "entity": "invoice", "body": {}},
+                        {"entity": "unknown"},
+                    ]
+                )
+            )
+        )
+
+        assert [result["status"] for result in results] == [424, 409, 200, 500]
+        assert results[1]["message"] == "duplicate key"
+        assert ("music", "rollback") in connections
+        assert ("music", "commit") not in connections
+        assert ("billing", "commit") in connections
+
+    def test_batch_handler_multi_status(self, batch_model, connections, monkeypatch):
+        monkeypatch.setattr(handler, "adapter", GatewayAdapter(TransactionalService()))
+        response = handler.lambda_handler(
+            batch_event(
+                [
+                    {"method": "POST", "entity": "album", "body": {"name": "fail"}},
+                    {"entity": "invoice"},
+                ]
+            ),
+            None,
+        )
+
+        assert response["statusCode"] == 207
+        assert [result["status"] for result in loads(response["body"])] == [409, 200]
+
+    def test_batch_reports_invalid_operation(self, batch_model, connections):
+        results = GatewayAdapter(TransactionalService()).process_batch_event(
+            batch_event(
+                [
+                    {"method": "POST", "entity": "album", "body": {}},
+                    {"entity": "invoice", "params": {"id": "abc"}},
+                    {"entity": "artist"},
+                ]
+            )
+        )
+
+        assert [result["status"] for result in results] == [200, 400, 200]
+        assert "message" in results[1]
+        assert results[2]["result"] == [{"entity": "artist"}]
+        # the invalid operation was not executed
+        assert ("billing", "commit") not in connections
+        assert ("billing", "close") not in connections
@@ -0,0 +1,116 @@
+import base64
+import gzip
+import json
+import sys
+import pytest
+
+from api_maker.adapters.gateway_adapter import GatewayAdapter
+from api_maker.iac import handler
+from api_maker.services.service import Service
+from api_maker.utils import compression
+from api_maker.utils.app_exception import ApplicationException
+from api_maker.utils.compression import decompress, select_encoding
+
+
+class MockService(Service):
+    def __init__(self, result):
+        self.result = result
+        self.operations = []
+
+    def execute(self, operation):
+        self.operations.append(operation)
+        return self.result
+
+
+def gateway_event(headers: dict, body: str = "", method: str = "GET") -> dict:
+    return {
+        "resource": "/album",
+        "httpMethod": method,
+        "headers": headers,
+        "queryStringParameters": None,
+        "pathParameters": {},
+        "body": body,
+    }
+
+
+@pytest.mark.unit
+class TestCompression:
+    def test_select_encoding(self, monkeypatch):
+        monkeypatch.setattr(
+            "api_maker.utils.compression.brotli_available", lambda: False
+        )
+        assert select_encoding(None) is None
+        assert select_encoding("identity") is None
+        assert select_encoding("gzip, deflate") == "gzip"
+        assert select_encoding("br, gzip") == "gzip"
+        assert select_encoding("gzip;q=0") is None
+        assert select_encoding("*") == "gzip"
+
+        monkeypatch.setattr(
+            "api_maker.utils.compression.brotli_available", lambda: True
+        )
+        assert select_encoding("gzip, deflate, br") == "br"
+        assert select_encoding("gzip;q=1.0, br;q=0.5") == "gzip"
+
+    def test_brotli_available_cached(self, monkeypatch):
+        monkeypatch.setattr(compression, "_brotli_available", None)
+        # a None module makes the import fail
+        monkeypatch.setitem(sys.modules, "brotli", None)
+        assert compression.brotli_available() is False
+
+        # the import is not attempted again
+        monkeypatch.setitem(sys.modules, "brotli", object())
+        assert compression.brotli_available() is False
+
+    def test_decompress(self):
+        body = json.dumps({"title": "album"}).encode("utf-8")
+        assert decompress(gzip.compress(body), "gzip") == body
+        assert decompress(body, "identity") == body
+
+        with pytest.raises(ApplicationException) as ae:
+            decompress(body, "gzip")
+        assert ae.value.status_code == 400
+
+        with pytest.raises(ApplicationException) as ae:
+            decompress(body, "compress")
+        assert ae.value.status_code == 415
+
+    def test_compressed_response(self, monkeypatch):
+        result = [{"album_id": i, "title": f"album {i}"} for i in range(200)]
+        monkeypatch.setattr(handler, "adapter", GatewayAdapter(MockService(result)))
+
+        response = handler.lambda_handler(
+            gateway_event({"Accept-Encoding": "gzip, deflate"}), None
+        )
+
+        assert response["isBase64Encoded"] is True
+        assert response["headers"]["Content-Encoding"] == "gzip"
+        assert response["headers"]["Vary"] == "Accept-Encoding"
+        body = gzip.decompress(base64.b64decode(response["body"]))
+        assert json.loads(body) == result
+
+    def test_small_response_not_compressed(self, monkeypatch):
+        monkeypatch.setattr(
+            handler, "adapter", GatewayAdapter(MockService([{"album_id": 1}]))
+        )
+
+        response = handler.lambda_handler(
+            gateway_event({"accept-encoding": "gzip"}), None
+        )
+
+        assert response["isBase64Encoded"] is False
+        assert "Content-Encoding" not in response["headers"]
+        assert json.loads(response["body"]) == [{"album_id": 1}]
+
+    def test_unmarshal_gzip_body(self):
+        store_params = {"title": "album", "artist_id": 1}
+        body = base64.b64encode(gzip.compress(json.dumps(store_params).encode()))
+        event = gateway_event(
+            {"Content-Encoding": "gzip"}, body.decode("ascii"), method="POST"
+        )
+        event["isBase64Encoded"] = True
+
+        operation = GatewayAdapter(MockService([])).unmarshal(event)
+
+        assert operation.action == "create"
+        assert operation.store_params == store_params
@@ -16,3 +16,15 @@ class TestPostgresConnection:
         log.info(f"connection: {connection}")
 
         assert connection is not None
+
+
+@pytest.mark.unit
+def test_postgres_api_typecasters():
+    from psycopg2.extensions import new_type
+    from api_maker.connectors.postgres_connection import API_TYPECASTERS
+
+    casts = {name: new_type(oids, name, cast) for oids, name, cast in API_TYPECASTERS}
+    assert casts["API_NUMERIC"]("12.50", None) == 12.5
+    assert casts["API_NUMERIC"](None, None) is None
+    assert casts["API_DATE"]("2024-02-29", None) == "2024-02-29"
+    assert casts["API_TIME"]("10:15:00", None) == "10:15:00"
@@ -0,0 +1,133 @@
+import pytest
+
+from api_maker.connectors.connection import Cursor
+from api_maker.dao.operation_dao import OperationDAO
+from api_maker.operation import Operation
+from api_maker.utils.app_exception import ApplicationException
+from api_maker.utils.logger import logger
+
+from test_fixtures import load_model  # noqa F401
+
+log = logger(__name__)
+
+
+class RecordingCursor(Cursor):
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql: str, params: dict, selection_results) -> list[dict]:
+        self.statements.append((sql, params))
+        if sql.startswith("EXPLAIN (FORMAT JSON, ANALYZE"):
+            return [
+                {
+                    "plan": [
+                        {
+                            "Plan": {"Node Type": "Seq Scan", "Actual Rows": 9},
+                            "Planning Time": 0.1,
+                            "Execution Time": 0.5,
+                        }
+                    ]
+                }
+            ]
+        if sql.startswith("EXPLAIN"):
+            return [{"plan": [{"Plan": {"Node Type": "Seq Scan"}}]}]
+        return []
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def allow_explain(monkeypatch):
+    monkeypatch.setenv("ALLOW_EXPLAIN", "true")
+
+
+@pytest.mark.unit
+class TestExplainOperations:
+    def test_explain(self, load_model, allow_explain):  # noqa F811
+        cursor = RecordingCursor()
+        result = OperationDAO(
+            Operation(
+                operation_id="invoice",
+                action="read",
+                query_params={"invoice_id": "24"},
+                metadata_params={"explain": "true"},
+            ),
+            "postgres",
+        ).execute(cursor)
+
+        log.info(f"result: {result}")
+        assert result["analyze"] is False
+        assert len(result["statements"]) == 1
+        statement = result["statements"][0]
+        assert statement["relation"] is None
+        assert statement["parameters"] == {"i_invoice_id": 24}
+        assert statement["plan"] == [{"Plan": {"Node Type": "Seq Scan"}}]
+        assert set(statement["timings"].keys()) == {"build", "explain"}
+        assert len(cursor.statements) == 1
+        assert cursor.statements[0][0] == "EXPLAIN (FORMAT JSON) " + statement["sql"]
+
+    def test_explain_analyze_with_subselect(
+        self, load_model, allow_explain  # noqa F811
+    ):
+        cursor = RecordingCursor()
+        result = OperationDAO(
+            Operation(
+                operation_id="invoice",
+                action="read",
+                query_params={"invoice_id": "lt::10"},
+                metadata_params={
+                    "explain": "analyze",
+                    "properties": ".* invoice_line_items:.*",
+                },
+            ),
+            "postgres",
+        ).execute(cursor)
+
+        assert result["analyze"] is True
+        assert [s["relation"] for s in result["statements"]] == [
+            None,
+            "invoice_line_items",
+        ]
+        for statement in result["statements"]:
+            timings = statement["timings"]
+            assert set(timings.keys()) == {
+                "build",
+                "explain",
+                "planning",
+                "execute",
+                "rows",
+            }
+            assert timings["planning"] == 0.1
+            assert timings["execute"] == 0.5
+            assert timings["rows"] == 9
+        # each statement is executed once, by EXPLAIN ANALYZE
+        assert len(cursor.statements) == 2
+        for sql, _ in cursor.statements:
+            assert sql.startswith("EXPLAIN (FORMAT JSON, ANALYZE, BUFFERS) SELECT")
+
+    def test_explain_not_allowed(self, load_model, monkeypatch):  # noqa F811
+        monkeypatch.delenv("ALLOW_EXPLAIN", raising=False)
+        with pytest.raises(ApplicationException) as ae:
+            OperationDAO(
+                Operation(
+                    operation_id="invoice",
+                    action="read",
+                    metadata_params={"explain": "true"},
+                ),
+                "postgres",
+            ).execute(RecordingCursor())
+        assert ae.value.status_code == 403
+
+    def test_explain_mutation(self, load_model, allow_explain):  # noqa F811
+        with pytest.raises(ApplicationException) as ae:
+            OperationDAO(
+                Operation(
+                    operation_id="invoice",
+                    action="delete",
+                    query_params={"invoice_id": "24"},
+                    metadata_params={"explain": "analyze"},
+                ),
+                "postgres",
+            ).execute(RecordingCursor())
+        assert ae.value.status_code == 400
@@ -3,6 +3,9 @@ import pytest
 from api_maker.services.service import Service
 from api_maker.adapters.gateway_adapter import GatewayAdapter
 from api_maker.operation import Operation
+from api_maker.utils.app_exception import ApplicationException
+
+from test_fixtures import load_model  # noqa F401
 
 
 def proto_event(
@@ -37,6 +40,12 @@ class MockService(Service):
         return [{"account_id": 123}]
 
 
+class RecordingService(Service):
+    def execute(self, operation: Operation):
+        self.operation = operation
+        return []
+
+
 @pytest.mark.unit
 class TestGatewayAdapter:
     def test_gateway_adapter_path_params(self):
@@ -77,3 +86,55 @@ class TestGatewayAdapter:
 
         # Asserting the result
         assert result == [{"accountId": 123}]
+
+    def test_gateway_adapter_route_parameters(self, load_model):  # noqa F811
+        service = RecordingService()
+        adapter = GatewayAdapter(service=service)
+
+        event = proto_event("GET", "/invoice/{invoice_id}", "/invoice/5")
+        event["pathParameters"] = {"invoice_id": "5"}
+        event["queryStringParameters"] = {
+            "billing_postal_code": "02134",
+            "total": "gt::5",
+            "__sort": "invoice_date",
+        }
+        adapter.process_event(event)
+
+        operation = service.operation
+        assert operation.operation_id == "invoice"
+        assert operation.action == "read"
+        # parsed by the declared property type, not the look of the value
+        assert operation.query_params == {
+            "invoice_id": 5,
+            "billing_postal_code": "02134",
+            "total": "gt::5",
+        }
+        assert operation.metadata_params == {"sort": "invoice_date"}
+
+    def test_gateway_adapter_invalid_parameter(self, load_model):  # noqa F811
+        event = proto_event("GET", "/invoice", "/invoice?total=abc")
+        event["queryStringParameters"] = {"total": "abc"}
+
+        with pytest.raises(ApplicationException) as error:
+            GatewayAdapter(service=RecordingService()).process_event(event)
+        assert error.value.status_code == 400
+
+    def test_gateway_adapter_metadata_params(self):
+        service = RecordingService()
+        event = proto_event("GET", "/accounts", "/accounts")
+        event["queryStringParameters"] = {
+            "account_id": "123",
+            "__properties": "account_id name",
+            "__sort": "name:desc",
+            "__case": "camel",
+        }
+
+        GatewayAdapter(service=service).process_event(event)
+
+        # metadata parameters are passed without their prefix
+        assert service.operation.query_params == {"account_id": 123}
+        assert service.operation.metadata_params == {
+            "properties": "account_id name",
+            "sort": "name:desc",
+            "case": "camel",
+        }
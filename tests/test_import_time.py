@@ -0,0 +1,73 @@
+import os
+import shutil
+import subprocess
+import sys
+import pytest
+
+from api_maker.utils.logger import logger
+from api_maker.utils.model_factory import ModelFactory
+
+log = logger(__name__)
+
+# cumulative import time allowed for the handler module in milliseconds,
+# including loading the precompiled model
+IMPORT_TIME_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", 60))
+
+# modules that are only needed after the first request has started
+DEFERRED_MODULES = ["boto3", "botocore", "yaml", "psycopg2", "humps", "hashlib"]
+
+
+def import_times(module: str, env: dict) -> dict[str, tuple[int, int]]:
+    """
+    Import a module in a new interpreter returning the self and cumulative
+    import time in microseconds of every module imported.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")  # noqa E203
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+@pytest.fixture
+def handler_env(tmp_path):
+    api_spec = tmp_path / "api_spec.yaml"
+    shutil.copy("resources/chinook_api.yaml", api_spec)
+    ModelFactory.compile_model(str(api_spec))
+
+    src = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+    return {
+        **os.environ,
+        "API_SPEC": str(api_spec),
+        "PYTHONPATH": os.path.abspath(src),
+        "LOGGING_LEVEL": "WARNING",
+    }
+
+
+@pytest.mark.unit
+class TestImportTime:
+    def test_handler_import_time(self, handler_env):
+        # the first import warms the file system and byte code caches
+        import_times("api_maker.iac.handler", handler_env)
+        times = import_times("api_maker.iac.handler", handler_env)
+
+        _, cumulative_us = times["api_maker.iac.handler"]
+        slowest = sorted(times.items(), key=lambda item: item[1][0], reverse=True)
+        log.info(f"handler import: {cumulative_us / 1000:.1f} ms")
+        log.info(f"slowest imports: {slowest[:10]}")
+
+        deferred = [name for name in times if name.split(".")[0] in DEFERRED_MODULES]
+        assert deferred == []
+        assert cumulative_us / 1000 <= IMPORT_TIME_BUDGET_MS, (
+            f"handler import took {cumulative_us / 1000:.1f} ms, "
+            + f"budget is {IMPORT_TIME_BUDGET_MS} ms, slowest: {slowest[:10]}"
+        )
@@ -0,0 +1,178 @@
+import json
+import logging
+import pytest
+
+from api_maker.connectors.connection import Cursor
+from api_maker.dao.operation_dao import OperationDAO
+from api_maker.dao.sql_select_query_handler import SQLSelectSchemaQueryHandler
+from api_maker.operation import Operation
+from api_maker.scripts.index_advisor import IndexAdvisor, read_query_shapes
+from api_maker.utils.model_factory import ModelFactory
+
+from test_fixtures import load_model  # noqa F401
+
+
+class EmptyCursor(Cursor):
+    def execute(self, sql: str, params: dict, selection_results) -> list[dict]:
+        return []
+
+    def close(self):
+        pass
+
+
+class MockCatalog:
+    def get_indexes(self, table_name: str) -> list[dict]:
+        return {
+            "invoice": [
+                {
+                    "name": "invoice_pkey",
+                    "definition": "CREATE UNIQUE INDEX invoice_pkey ON public.invoice USING btree (invoice_id)",  # noqa E501
+                    "columns": ["invoice_id"],
+                }
+            ],
+        }.get(table_name, [])
+
+    def get_row_count(self, table_name: str) -> float:
+        return {"invoice": 10000.0, "customer": 500.0}.get(table_name, 0.0)
+
+    def get_column_stats(self, table_name: str) -> dict[str, dict]:
+        return {
+            "invoice": {
+                "customer_id": {"n_distinct": 500, "null_frac": 0},
+                "billing_country": {"n_distinct": 24, "null_frac": 0},
+            },
+        }.get(table_name, {})
+
+
+@pytest.mark.unit
+class TestIndexAdvisor:
+    def test_query_shape(self, load_model):  # noqa F811
+        sql_handler = SQLSelectSchemaQueryHandler(
+            Operation(
+                operation_id="invoice",
+                action="read",
+                query_params={"total": "gt::5", "customer.country": "USA"},
+                metadata_params={"sort": "invoice_date:desc"},
+            ),
+            ModelFactory.get_schema_object("invoice"),
+            "postgres",
+        )
+        sql_handler.sql
+
+        assert sql_handler.query_shape == {
+            "operation_id": "invoice",
+            "table": "invoice",
+            "filters": [
+                {"table": "invoice", "column": "total", "operator": "gt"},
+                {"table": "customer", "column": "country", "operator": "eq"},
+            ],
+            "sort": [{"table": "invoice", "column": "invoice_date", "order": "desc"}],
+            "joins": [
+                {
+                    "table": "customer",
+                    "column": "customer_id",
+                    "parent_table": "invoice",
+                    "parent_column": "customer_id",
+                }
+            ],
+        }
+
+    def test_query_shape_logged_per_statement(self, load_model, caplog):  # noqa F811
+        caplog.set_level(logging.INFO, logger="api_maker.query_shape")
+        dao = OperationDAO(
+            Operation(
+                operation_id="invoice",
+                action="read",
+                query_params={"total": "gt::5"},
+                metadata_params={"properties": ".* invoice_line_items:.*"},
+            ),
+            "postgres",
+        )
+        # the statements are generated without being executed
+        dao.query_handler.sql
+        dao.query_handler.sql
+        assert caplog.records == []
+
+        dao.execute(EmptyCursor())
+
+        # one shape for the select and one for the subselect of the relation
+        shapes = read_query_shapes(caplog.text.splitlines())
+        assert [shape["table"] for shape in shapes] == ["invoice", "invoice_line"]
+        assert len(caplog.records) == 2
+
+    def test_read_query_shapes(self):
+        shape = {"operation_id": "invoice", "table": "invoice", "filters": []}
+        lines = [
+            "api_maker.query_shape:97 - INFO - query_shape: " + json.dumps(shape),
+            "some other log line",
+            "query_shape: " + json.dumps(shape),
+        ]
+        shapes = read_query_shapes(lines)
+        assert len(shapes) == 1
+        assert shapes[0]["occurrences"] == 2
+
+    def test_uncovered_shape(self):
+        shapes = [
+            {
+                "operation_id": "invoice",
+                "table": "invoice",
+                "filters": [
+                    {"table": "invoice", "column": "billing_country", "operator": "eq"},
+                    {"table": "invoice", "column": "customer_id", "operator": "eq"},
+                    {"table": "invoice", "column": "total", "operator": "gt"},
+                ],
+                "sort": [],
+                "joins": [],
+                "occurrences": 3,
+            }
+        ]
+        report = IndexAdvisor(MockCatalog()).analyze(shapes)
+
+        assert len(report) == 1
+        assert report[0]["columns"] == ["customer_id", "billing_country", "total"]
+        assert report[0]["create_index"] == (
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+            + "ix_invoice_customer_id_billing_country_total "
+            + "ON invoice (customer_id, billing_country, total);"
+        )
+        assert report[0]["estimated_rows"] == 1.0
+        assert report[0]["estimated_benefit"] == (10000.0 - 1.0) * 3
+
+    def test_covered_shape(self):
+        shapes = [
+            {
+                "operation_id": "invoice",
+                "table": "invoice",
+                "filters": [
+                    {"table": "invoice", "column": "invoice_id", "operator": "in"}
+                ],
+                "sort": [{"table": "invoice", "column": "total", "order": "asc"}],
+                "joins": [],
+            }
+        ]
+        assert IndexAdvisor(MockCatalog()).analyze(shapes) == []
+
+    def test_sort_and_join_shape(self):
+        shapes = [
+            {
+                "operation_id": "invoice",
+                "table": "invoice",
+                "filters": [],
+                "sort": [{"table": "invoice", "column": "total", "order": "asc"}],
+                "joins": [
+                    {
+                        "table": "invoice_line",
+                        "column": "invoice_id",
+                        "parent_table": "invoice",
+                        "parent_column": "invoice_id",
+                    }
+                ],
+            }
+        ]
+        report = IndexAdvisor(MockCatalog()).analyze(shapes)
+
+        assert [r["table"] for r in report] == ["invoice", "invoice_line"]
+        assert report[0]["columns"] == ["total"]
+        assert report[0]["avoids_sort"] is True
+        assert report[0]["estimated_benefit"] == 0
+        assert report[1]["columns"] == ["invoice_id"]
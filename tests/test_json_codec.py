@@ -0,0 +1,77 @@
+import pytest
+import sys
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from api_maker.utils.json_codec import JSONCodec, OrjsonCodec, get_codec
+from api_maker.utils.model_factory import SchemaObjectProperty
+
+RECORD = {
+    "invoice_id": 1,
+    "invoice_date": date(2024, 3, 18),
+    "last_updated": datetime(2024, 4, 20, 16, 20, 0, 125000),
+    "delivery_time": time(9, 30),
+    "total": Decimal("3.96"),
+    "version_stamp": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "billing_city": "Zürich",
+    "lines": [{"quantity": 2}],
+    "note": None,
+}
+
+EXPECTED = (
+    '{"invoice_id":1,"invoice_date":"2024-03-18",'
+    + '"last_updated":"2024-04-20T16:20:00.125000","delivery_time":"09:30:00",'
+    + '"total":3.96,"version_stamp":"12345678-1234-5678-1234-567812345678",'
+    + '"billing_city":"Zürich","lines":[{"quantity":2}],"note":null}'
+)
+
+
+@pytest.mark.unit
+class TestJSONCodec:
+    def test_json_codec(self):
+        codec = JSONCodec()
+        encoded = codec.dumps(RECORD)
+        assert isinstance(encoded, bytes)
+        assert encoded.decode("utf-8") == EXPECTED
+        assert codec.loads(encoded)["total"] == 3.96
+
+    def test_orjson_codec(self):
+        pytest.importorskip("orjson")
+        codec = OrjsonCodec()
+        encoded = codec.dumps(RECORD)
+        assert isinstance(encoded, bytes)
+        assert encoded.decode("utf-8") == EXPECTED
+        assert codec.loads(encoded) == JSONCodec().loads(EXPECTED)
+
+    def test_get_codec(self, monkeypatch):
+        assert get_codec("json").name == "json"
+
+        monkeypatch.setitem(sys.modules, "orjson", None)
+        assert get_codec("orjson").name == "json"
+
+        with pytest.raises(ValueError):
+            get_codec("yaml")
+
+    def test_unsupported_type(self):
+        with pytest.raises(TypeError):
+            JSONCodec().dumps({"value": object()})
+
+    def test_api_values_not_converted(self):
+        property = SchemaObjectProperty(
+            operation_id="invoice",
+            name="invoice_date",
+            properties={"type": "string", "format": "date"},
+            spec={},
+        )
+        assert property.convert_to_api_value(datetime(2024, 3, 18, 0, 0)) == date(
+            2024, 3, 18
+        )
+
+        property = SchemaObjectProperty(
+            operation_id="invoice",
+            name="total",
+            properties={"type": "number"},
+            spec={},
+        )
+        assert property.convert_to_api_value(Decimal("3.96")) == Decimal("3.96")
@@ -0,0 +1,91 @@
+import pytest
+
+from api_maker.adapters.gateway_adapter import GatewayAdapter
+from api_maker.connectors.connection import Connection, Cursor
+from api_maker.scripts.load_test import (
+    count_round_trips,
+    format_summary,
+    gateway_event,
+    percentile,
+    read_scenarios,
+    run_load,
+    write_scenarios,
+)
+from api_maker.utils.json_codec import dumps
+from api_maker.utils.request_validator import validate
+
+from test_fixtures import load_model  # noqa F401
+
+
+class CountedCursor(Cursor):
+    def execute(self, sql: str, params: dict, selection_results: dict) -> list[dict]:
+        return []
+
+
+class CountedConnection(Connection):
+    def commit(self):
+        pass
+
+
+@pytest.mark.unit
+class TestLoadTest:
+    def test_gateway_event(self):
+        event = gateway_event(
+            "PUT",
+            "/invoice/{invoice_id}/last_updated/{last_updated}",
+            path_parameters={"invoice_id": 5, "last_updated": "2024-01-01"},
+            body={"total": 1},
+        )
+        assert event["path"] == "/invoice/5/last_updated/2024-01-01"
+        assert event["pathParameters"] == {
+            "invoice_id": "5",
+            "last_updated": "2024-01-01",
+        }
+        assert event["body"] == '{"total": 1}'
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([3.0], 95) == 3.0
+        assert percentile([], 50) == 0.0
+
+    def test_run_load(self, load_model):  # noqa F811
+        adapter = GatewayAdapter()
+        operations = []
+
+        def handler(event, _):
+            # the generated events route to valid operations
+            operation = adapter.unmarshal(event)
+            validate(operation)
+            operations.append((operation.operation_id, operation.action))
+
+            cursor = CountedCursor()
+            cursor.execute("", {}, {})
+            if operation.action == "read":
+                return {"statusCode": 200, "body": "[]"}
+            CountedConnection({}).commit()
+            record = {
+                "invoice_id": 1,
+                "last_updated": "2024-03-17T00:00:00",
+                "media_type_id": 1,
+            }
+            return {"statusCode": 200, "body": dumps([record]).decode("utf-8")}
+
+        with count_round_trips(CountedCursor, CountedConnection) as counter:
+            summary = run_load(
+                handler, read_scenarios() + write_scenarios(), 4, 25, counter
+            )
+
+        assert summary["requests"] == len(operations)
+        assert summary["errors"] == 0
+        assert {"read", "create", "update", "delete"} <= {
+            action for _, action in operations
+        }
+        by_label = summary["requests_by_label"]
+        assert by_label["GET /invoice"]["round_trips_per_request"] == 1
+        assert by_label["POST /invoice"]["round_trips_per_request"] == 2
+        assert summary["p50_ms"] <= summary["p95_ms"] <= summary["p99_ms"]
+        assert "throughput" in format_summary(summary)
+        # the methods are restored
+        assert CountedCursor.execute.__name__ == "execute"
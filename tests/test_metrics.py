@@ -0,0 +1,159 @@
+import pytest
+
+from api_maker.adapters.gateway_adapter import GatewayAdapter
+from api_maker.connectors.connection import Connection, Cursor
+from api_maker.dao.operation_dao import OperationDAO
+from api_maker.iac import handler
+from api_maker.operation import Operation
+from api_maker.services import transactional_service
+from api_maker.services.transactional_service import TransactionalService
+from api_maker.utils import metrics
+from api_maker.utils.json_codec import loads
+
+from test_fixtures import load_model  # noqa F401
+
+
+class ListSink(metrics.MetricsSink):
+    def __init__(self):
+        self.records = []
+
+    def emit(self, record: dict):
+        self.records.append(record)
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    sink = ListSink()
+    previous = metrics.set_sink(sink)
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", True)
+    yield sink
+    metrics.set_sink(previous)
+
+
+class InvoiceCursor(Cursor):
+    def execute(self, sql: str, params: dict, selection_results: dict) -> list[dict]:
+        return [{name: None for name in selection_results} for _ in range(2)]
+
+    def stream(self, sql: str, params: dict, selection_results, batch_size: int):
+        for _ in range(2):
+            yield self.execute(sql, params, selection_results)
+
+    def close(self):
+        pass
+
+
+class InvoiceConnection(Connection):
+    def cursor(self) -> Cursor:
+        return InvoiceCursor()
+
+    def close(self):
+        pass
+
+
+@pytest.mark.unit
+class TestMetrics:
+    def test_emf_record(self):
+        request = metrics.RequestMetrics()
+        request.set_dimensions("invoice", "read")
+        request.add("rows", 2)
+        request.add("rows", 3)
+        request.add("payload_bytes", 10, "Bytes")
+
+        record = request.to_emf("test")
+        assert record["operation_id"] == "invoice"
+        assert record["action"] == "read"
+        assert record["rows"] == 5
+        directive = record["_aws"]["CloudWatchMetrics"][0]
+        assert directive["Namespace"] == "test"
+        assert directive["Dimensions"] == [["operation_id", "action"]]
+        assert directive["Metrics"] == [
+            {"Name": "rows", "Unit": "Count"},
+            {"Name": "payload_bytes", "Unit": "Bytes"},
+        ]
+
+    def test_disabled(self, sink):
+        with metrics.request_metrics(enabled=False) as request:
+            assert request is None
+            with metrics.timer("execute"):
+                metrics.add_metric("rows", 1)
+        assert sink.records == []
+
+    def test_handler_phases(self, load_model, sink, monkeypatch):  # noqa F811
+        monkeypatch.setattr(
+            transactional_service.connection_factory,
+            "get_connection",
+            lambda database: InvoiceConnection({"engine": "postgres"}),
+        )
+        monkeypatch.setattr(handler, "adapter", GatewayAdapter(TransactionalService()))
+
+        response = handler.lambda_handler(
+            {
+                "resource": "/invoice",
+                "httpMethod": "GET",
+                "headers": {},
+                "queryStringParameters": {"total": "gt::5"},
+            },
+            None,
+        )
+
+        assert response["statusCode"] == 200
+        assert len(loads(response["body"])) == 2
+        (record,) = sink.records
+        assert record["operation_id"] == "invoice"
+        assert record["action"] == "read"
+        for phase in [
+            "unmarshal",
+            "connection",
+            "sql_build",
+            "execute",
+            "marshal",
+            "serialize",
+        ]:
+            assert record[phase] >= 0
+        assert record["statements"] == 1
+        assert record["rows"] == 2
+        assert record["payload_bytes"] == len(response["body"])
+        assert record["process_peak_memory"] > 0
+        assert record["peak_memory_growth"] >= 0
+        assert "errors" not in record
+
+    def test_handler_error(self, load_model, sink):  # noqa F811
+        response = handler.lambda_handler(
+            {
+                "resource": "/invoice",
+                "httpMethod": "GET",
+                "headers": {},
+                "queryStringParameters": {"unknown": "1"},
+            },
+            None,
+        )
+
+        assert response["statusCode"] == 400
+        (record,) = sink.records
+        assert record["errors"] == 1
+        assert record["operation_id"] == "unknown"
+
+    def test_peak_memory_growth(self, sink, monkeypatch):
+        peaks = iter([1000, 1500])
+        monkeypatch.setattr(metrics, "peak_memory_kb", lambda: next(peaks))
+
+        with metrics.request_metrics():
+            pass
+
+        (record,) = sink.records
+        assert record["process_peak_memory"] == 1500
+        assert record["peak_memory_growth"] == 500
+
+    def test_stream_phases(self, load_model, sink):  # noqa F811
+        dao = OperationDAO(
+            Operation(operation_id="invoice", action="read", query_params={}),
+            "postgres",
+        )
+        with metrics.request_metrics():
+            batches = list(dao.stream(InvoiceCursor()))
+
+        assert [len(batch) for batch in batches] == [2, 2]
+        (record,) = sink.records
+        assert record["execute"] >= 0
+        assert record["statements"] == 1
+        assert record["rows"] == 4
@@ -1,12 +1,18 @@
+import pickle
 import pytest
+from collections import OrderedDict
+from datetime import date, datetime
 from unittest.mock import patch, MagicMock
 from api_maker.utils.app_exception import ApplicationException
+from api_maker.utils import model_factory, spec_handler
 from api_maker.utils.logger import logger
 from api_maker.utils.model_factory import (
     ModelFactory,
     SchemaObject,
     SchemaObjectProperty,
     OpenAPIElement,
+    camel_case,
+    snake_case,
 )
 
 log = logger(__name__)
@@ -100,3 +106,223 @@ def test_schema_object_property_conversion():
     assert db_value == "test_value"
     api_value = property_object.convert_to_api_value("test_value")
     assert api_value == "test_value"
+
+
+@pytest.mark.unit
+def test_compile_model(tmp_path):
+    api_spec_path = tmp_path / "api_spec.yaml"
+    api_spec_path.write_text(open("resources/chinook_api.yaml").read())
+
+    model_path = ModelFactory.compile_model(str(api_spec_path))
+    assert model_path == str(tmp_path / "api_spec.model.pickle")
+    compiled = ModelFactory.get_schema_object("invoice")
+
+    ModelFactory.set_spec({"openapi": "3.0.0"})
+    # the spec is not parsed when the model artifact is present
+    with patch.object(ModelFactory, "load_yaml", side_effect=AssertionError):
+        ModelFactory.load(str(api_spec_path))
+
+    schema_object = ModelFactory.get_schema_object("invoice")
+    assert schema_object is not compiled
+    assert ModelFactory.spec is None
+    assert schema_object.schema_object is None
+    assert list(schema_object.properties.keys()) == list(compiled.properties.keys())
+    assert schema_object.primary_key.name == "invoice_id"
+    relation = schema_object.get_relation("invoice_line_items")
+    assert relation.child_schema_object is ModelFactory.get_schema_object(
+        "invoice_line"
+    )
+
+
+@pytest.mark.unit
+def test_load_without_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(spec_handler, "_resolvers", OrderedDict())
+    api_spec_path = tmp_path / "api_spec.yaml"
+    api_spec_path.write_text(open("resources/chinook_api.yaml").read())
+
+    ModelFactory.load(str(api_spec_path))
+    assert ModelFactory.get_schema_object("invoice").table_name == "invoice"
+    # the resolved graph of the spec is released with the spec
+    assert ModelFactory.spec is None
+    assert len(spec_handler._resolvers) == 0
+
+
+@pytest.mark.unit
+def test_load_model_spec_changed(tmp_path, caplog):
+    api_spec_path = tmp_path / "api_spec.yaml"
+    api_spec = open("resources/chinook_api.yaml").read()
+    api_spec_path.write_text(api_spec)
+    ModelFactory.compile_model(str(api_spec_path))
+
+    # the deployed spec differs from the spec the model was compiled from
+    api_spec_path.write_text(api_spec + "# changed\n")
+    with patch.object(ModelFactory, "load_yaml") as load_yaml:
+        ModelFactory.load(str(api_spec_path))
+
+    load_yaml.assert_called_once_with(str(api_spec_path))
+    assert "compiled from a different API spec" in caplog.text
+
+
+@pytest.mark.unit
+def test_load_model_version_mismatch(tmp_path):
+    model_path = tmp_path / "api_spec.model.pickle"
+    model_path.write_bytes(pickle.dumps(-1) + pickle.dumps({}))
+
+    assert ModelFactory.load_model(str(model_path)) is False
+
+
+class StaleSchemaObjectKey:
+    """
+    A SchemaObjectKey of a version with a different class layout.
+    """
+
+    def __init__(self):
+        self.name = "invoice_id"
+
+
+@pytest.mark.unit
+def test_load_model_stale_layout(tmp_path, monkeypatch):
+    api_spec_path = tmp_path / "api_spec.yaml"
+    api_spec_path.write_text(open("resources/chinook_api.yaml").read())
+    model_path = tmp_path / "api_spec.model.pickle"
+
+    # pickled as the SchemaObjectKey class with an incompatible state
+    StaleSchemaObjectKey.__qualname__ = "SchemaObjectKey"
+    StaleSchemaObjectKey.__module__ = model_factory.__name__
+    with monkeypatch.context() as stale:
+        stale.setattr(model_factory, "SchemaObjectKey", StaleSchemaObjectKey)
+        model_path.write_bytes(
+            pickle.dumps(model_factory.MODEL_ARTIFACT_VERSION)
+            + pickle.dumps({"schema_objects": {"key": StaleSchemaObjectKey()}})
+        )
+
+    assert ModelFactory.load_model(str(model_path)) is False
+
+    # the spec is loaded instead
+    ModelFactory.load(str(api_spec_path))
+    assert ModelFactory.get_schema_object("invoice").primary_key.name == "invoice_id"
+
+
+def relation_spec(relation: dict) -> dict:
+    return {
+        "openapi": "3.0.0",
+        "components": {
+            "schemas": {
+                "customer": {
+                    "type": "object",
+                    "x-am-database": "chinook",
+                    "properties": {
+                        "customer_id": {"type": "integer", "x-am-primary-key": "auto"},
+                        "invoices": relation,
+                    },
+                },
+                "invoice": {
+                    "type": "object",
+                    "x-am-database": "chinook",
+                    "properties": {
+                        "invoice_id": {"type": "integer", "x-am-primary-key": "auto"},
+                        "customer_id": {"type": "integer"},
+                    },
+                },
+            }
+        },
+    }
+
+
+@pytest.mark.unit
+def test_relation_graph():
+    ModelFactory.set_spec(
+        relation_spec(
+            {
+                "type": "array",
+                "items": {
+                    "$ref": "#/components/schemas/invoice",
+                    "x-am-child-property": "customer_id",
+                },
+            }
+        )
+    )
+
+    customer = ModelFactory.get_schema_object("customer")
+    invoice = ModelFactory.get_schema_object("invoice")
+    relation = customer.get_relation("invoices")
+    assert relation.cardinality == "many"
+    assert relation.parent_schema_object is customer
+    assert relation.child_schema_object is invoice
+    assert relation.parent_property is customer.primary_key
+    assert relation.child_property is invoice.get_property("customer_id")
+    assert relation.join("c", "i") == (
+        "INNER JOIN invoice AS i ON c.customer_id = i.customer_id"
+    )
+    assert relation.subselect_condition == (
+        "FROM invoice WHERE customer_id IN ( SELECT customer_id "
+    )
+
+
+@pytest.mark.unit
+def test_relation_unresolved_ref():
+    with pytest.raises(ApplicationException) as error:
+        ModelFactory.set_spec(
+            relation_spec(
+                {"type": "array", "items": {"$ref": "#/components/schemas/missing"}}
+            )
+        )
+    assert error.value.status_code == 500
+    assert "Unresolved $ref" in error.value.message
+
+
+@pytest.mark.unit
+def test_relation_unknown_child_property():
+    with pytest.raises(ApplicationException) as error:
+        ModelFactory.set_spec(
+            relation_spec(
+                {
+                    "type": "array",
+                    "items": {
+                        "$ref": "#/components/schemas/invoice",
+                        "x-am-child-property": "owner_id",
+                    },
+                }
+            )
+        )
+    assert error.value.status_code == 500
+    assert "Cannot resolve child property" in error.value.message
+
+
+@pytest.mark.unit
+def test_case_names():
+    assert camel_case("invoice_line_id") == "invoiceLineId"
+    assert camel_case("_private_name") == "_privateName"
+    assert snake_case("invoiceLineId") == "invoice_line_id"
+
+    ModelFactory.set_spec(
+        relation_spec(
+            {
+                "type": "array",
+                "items": {
+                    "$ref": "#/components/schemas/invoice",
+                    "x-am-child-property": "customer_id",
+                },
+            }
+        )
+    )
+    customer = ModelFactory.get_schema_object("customer")
+    assert customer.snake_names == {
+        "customerId": "customer_id",
+        "invoices": "invoices",
+    }
+
+
+@pytest.mark.unit
+def test_api_value_converter_narrowing():
+    decoded_types = frozenset(["string", "number", "date", "date-time", "time"])
+    invoice_date = SchemaObjectProperty(
+        "invoice", "invoice_date", {"type": "string", "format": "date"}, None
+    )
+    total = SchemaObjectProperty("invoice", "total", {"type": "number"}, None)
+
+    # without x-am-column-type the column may be a timestamp
+    converter = invoice_date.api_value_converter(decoded_types)
+    assert converter(datetime(2024, 1, 2, 3, 4, 5)) == date(2024, 1, 2)
+    assert converter("2024-01-02") == "2024-01-02"
+    assert total.api_value_converter(decoded_types) is None
@@ -0,0 +1,230 @@
+import json
+
+import pytest
+
+from api_maker.adapters.gateway_adapter import GatewayAdapter
+from api_maker.iac import handler
+from api_maker.operation import Operation
+from api_maker.services import notification_publisher as publisher_module
+from api_maker.services.notification_publisher import NotificationPublisher
+from api_maker.services.service import MutationPublisher, ServiceAdapter
+
+from test_fixtures import load_model  # noqa F401
+
+TOPIC = "arn:aws:sns:us-east-1:000000000000:mutations.fifo"
+
+
+class LocalSNS:
+    """
+    Stands in for SNS, the outcome of each PublishBatch call can be scripted
+    with an exception or the ids of the entries to fail.
+    """
+
+    def __init__(self, outcomes: list = None):
+        self.outcomes = outcomes or []
+        self.calls = []
+        self.published = []
+
+    def publish_batch(self, TopicArn: str, PublishBatchRequestEntries: list):
+        entries = PublishBatchRequestEntries
+        assert 0 < len(entries) <= 10
+        assert len({entry["Id"] for entry in entries}) == len(entries)
+        self.calls.append(entries)
+
+        outcome = self.outcomes.pop(0) if self.outcomes else {}
+        if isinstance(outcome, Exception):
+            raise outcome
+        failed = [
+            {
+                "Id": entry["Id"],
+                "Code": "InternalError" if outcome[entry["Id"]] else "InvalidParameter",
+                "Message": "failed",
+                "SenderFault": not outcome[entry["Id"]],
+            }
+            for entry in entries
+            if entry["Id"] in outcome
+        ]
+        failed_ids = {failure["Id"] for failure in failed}
+        for entry in entries:
+            if entry["Id"] not in failed_ids:
+                self.published.append((TopicArn, entry))
+        return {
+            "Successful": [{"Id": entry["Id"]} for entry in entries],
+            "Failed": failed,
+        }
+
+
+class LocalSQS:
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, QueueUrl: str, MessageBody: str):
+        self.messages.append((QueueUrl, json.loads(MessageBody)))
+
+
+class RecordingService(ServiceAdapter):
+    def execute(self, operation):
+        return [{"invoice_id": 1}]
+
+
+class RecordingPublisher(MutationPublisher, RecordingService):
+    pass
+
+
+class NotifyingStreamService(ServiceAdapter):
+    def stream(self, operation):
+        handler.notification_publisher.add(TOPIC, entry(0))
+        yield [{"invoice_id": 1}]
+
+
+class ClosingStream:
+    """
+    Response stream recording the notifications published when it is
+    closed, the close fails like a dropped runtime connection.
+    """
+
+    def __init__(self, sns: LocalSNS):
+        self.sns = sns
+        self.published_at_close = None
+
+    def write(self, data: bytes):
+        pass
+
+    def close(self):
+        self.published_at_close = len(self.sns.published)
+        raise ConnectionError("runtime connection closed")
+
+
+@pytest.fixture
+def local_sns(monkeypatch):
+    sns = LocalSNS()
+    publisher = NotificationPublisher(sns_client=sns, retry_delay=0)
+    monkeypatch.setattr(publisher_module, "notification_publisher", publisher)
+    monkeypatch.setattr(handler, "notification_publisher", publisher)
+    monkeypatch.setattr("api_maker.services.service.notification_publisher", publisher)
+    monkeypatch.setenv("BROADCAST_TOPIC", TOPIC)
+    return sns
+
+
+def entry(index: int) -> dict:
+    return {"Message": f"message {index}", "MessageStructure": "json"}
+
+
+@pytest.mark.unit
+class TestNotificationPublisher:
+    def test_publish_buffers_mutations(self, local_sns):
+        service = RecordingPublisher()
+        for index in range(23):
+            service.execute(
+                Operation(
+                    operation_id="invoice",
+                    action="create",
+                    store_params={"total": index},
+                )
+            )
+        # nothing is sent while the request is processed
+        assert local_sns.calls == []
+
+        publisher_module.notification_publisher.flush_pending()
+
+        assert [len(call) for call in local_sns.calls] == [10, 10, 3]
+        topic, first = local_sns.published[0]
+        assert topic == TOPIC
+        assert first["MessageGroupId"] == "invoice"
+        assert len(first["MessageDeduplicationId"]) == 64
+        message = json.loads(json.loads(first["Message"])["default"])
+        assert message["store_params"] == {"total": 0}
+
+    def test_retry(self):
+        sns = LocalSNS([ConnectionError("reset"), {"1": True}, {}])
+        publisher = NotificationPublisher(sns_client=sns, retry_delay=0)
+        for index in range(3):
+            publisher.add(TOPIC, entry(index))
+
+        publisher.flush()
+
+        assert [len(call) for call in sns.calls] == [3, 3, 1]
+        assert sorted(e["Message"] for _, e in sns.published) == [
+            "message 0",
+            "message 1",
+            "message 2",
+        ]
+
+    def test_dead_letter(self):
+        sqs = LocalSQS()
+        sns = LocalSNS([{"0": False, "1": True}, {"1": True}, {"1": True}])
+        publisher = NotificationPublisher(
+            sns_client=sns, sqs_client=sqs, dead_letter_queue="dlq", retry_delay=0
+        )
+        publisher.add(TOPIC, entry(0))
+        publisher.add(TOPIC, entry(1))
+
+        publisher.flush()
+
+        # the invalid entry is not retried, the other one is retried
+        assert [len(call) for call in sns.calls] == [2, 1, 1]
+        assert [message["entry"]["Message"] for _, message in sqs.messages] == [
+            "message 0",
+            "message 1",
+        ]
+        assert sqs.messages[0][1]["topic_arn"] == TOPIC
+        assert sqs.messages[0][1]["error"] == "InvalidParameter: failed"
+
+    def test_dead_letter_logged(self, caplog):
+        publisher = NotificationPublisher(
+            sns_client=LocalSNS([RuntimeError("down")] * 2),
+            max_attempts=2,
+            retry_delay=0,
+        )
+        publisher.add(TOPIC, entry(0))
+
+        publisher.flush()
+
+        assert "notification not published" in caplog.text
+        assert "message 0" in caplog.text
+
+    def test_background_flush(self):
+        sns = LocalSNS()
+        publisher = NotificationPublisher(sns_client=sns)
+        publisher.add(TOPIC, entry(0))
+
+        publisher.flush_pending(background=True)
+        publisher.wait()
+
+        assert len(sns.published) == 1
+        assert publisher.pending == []
+
+    def test_handler_publishes_after_response(
+        self, load_model, local_sns, monkeypatch  # noqa F811
+    ):
+        monkeypatch.setattr(handler, "adapter", GatewayAdapter(RecordingPublisher()))
+
+        response = handler.lambda_handler(
+            {
+                "resource": "/invoice",
+                "httpMethod": "POST",
+                "headers": {},
+                "body": '{"total": 1}',
+            },
+            None,
+        )
+
+        assert response["statusCode"] == 200
+        assert len(local_sns.published) == 1
+
+    def test_stream_handler_publishes_after_close(
+        self, load_model, local_sns, monkeypatch  # noqa F811
+    ):
+        monkeypatch.setattr(
+            handler, "adapter", GatewayAdapter(NotifyingStreamService())
+        )
+        stream = ClosingStream(local_sns)
+
+        with pytest.raises(ConnectionError):
+            handler.stream_handler(
+                {"resource": "/invoice", "httpMethod": "GET", "headers": {}}, stream
+            )
+
+        assert stream.published_at_close == 0
+        assert len(local_sns.published) == 1
+        assert handler.notification_publisher.flushing is None
@@ -0,0 +1,317 @@
+import json
+
+import pytest
+
+from api_maker.iac import outbox_relay
+from api_maker.operation import Operation
+from api_maker.services import outbox
+from api_maker.services import transactional_service
+from api_maker.services.outbox import OutboxRelay, write_event
+from api_maker.services.transactional_service import TransactionalService
+
+from test_fixtures import load_model  # noqa F401
+from test_notification_publisher import LocalSNS, RecordingPublisher
+
+TOPIC = "arn:aws:sns:us-east-1:000000000000:mutations.fifo"
+
+
+class OutboxDatabase:
+    """
+    Stands in for a database with an outbox table, rows written by a
+    transaction are only visible once it is committed.
+    """
+
+    def __init__(self):
+        self.rows: list[dict] = []
+        self.pending: list[dict] = []
+        self.deleted: set[int] = set()
+        self.next_id = 1
+        self.commits = 0
+        self.rollbacks = 0
+
+    def connection(self) -> "OutboxConnection":
+        return OutboxConnection(self)
+
+
+class OutboxConnection:
+    def __init__(self, database: OutboxDatabase):
+        self.database = database
+        self.closed = False
+
+    def engine(self):
+        return "postgres"
+
+    def cursor(self):
+        return OutboxCursor(self.database)
+
+    def commit(self):
+        database = self.database
+        database.rows = [
+            row for row in database.rows if row["id"] not in database.deleted
+        ] + database.pending
+        database.pending, database.deleted = [], set()
+        database.commits += 1
+
+    def rollback(self):
+        self.database.pending, self.database.deleted = [], set()
+        self.database.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class OutboxCursor:
+    def __init__(self, database: OutboxDatabase):
+        self.database = database
+        self.statements = []
+
+    def execute(self, sql: str, params: dict, selection_results) -> list[dict]:
+        database = self.database
+        self.statements.append(sql)
+        if sql.startswith("INSERT INTO outbox"):
+            row = {
+                "id": database.next_id,
+                "operation_id": params["operation_id"],
+                "action": params["action"],
+                "payload": json.loads(params["payload"]),
+            }
+            database.next_id += 1
+            database.pending.append(row)
+            return [{"id": row["id"]}]
+        if sql.startswith("SELECT id, operation_id, payload FROM outbox"):
+            assert "ORDER BY id" in sql and "FOR UPDATE" in sql
+            return [
+                {key: row[key] for key in selection_results}
+                for row in database.rows[: params["limit"]]
+            ]
+        if sql.startswith("DELETE FROM outbox"):
+            database.deleted.update(params["ids"])
+            return [{"id": id} for id in params["ids"]]
+        raise AssertionError(f"unexpected statement: {sql}")
+
+    def close(self):
+        pass
+
+
+class StubDAO:
+    """
+    Stands in for OperationDAO, failing the operations with a 'fail'
+    store parameter.
+    """
+
+    def __init__(self, operation, engine):
+        self.operation = operation
+
+    def execute(self, cursor):
+        if self.operation.store_params.get("fail"):
+            raise ValueError("mutation failed")
+        return [{"invoice_id": 1}]
+
+
+def mutation(operation_id: str = "invoice", **store_params) -> Operation:
+    return Operation(
+        operation_id=operation_id,
+        action="update",
+        query_params={"invoice_id": "1"},
+        store_params=store_params,
+    )
+
+
+def add_events(database: OutboxDatabase, operation_ids: list[str]):
+    connection = database.connection()
+    cursor = connection.cursor()
+    for index, operation_id in enumerate(operation_ids):
+        write_event(cursor, mutation(operation_id, total=index), table="outbox")
+    connection.commit()
+
+
+@pytest.fixture
+def outbox_table(monkeypatch):
+    monkeypatch.setattr(outbox, "OUTBOX_TABLE", "outbox")
+    database = OutboxDatabase()
+    monkeypatch.setattr(
+        transactional_service.connection_factory,
+        "get_connection",
+        lambda _: database.connection(),
+    )
+    monkeypatch.setattr(transactional_service, "OperationDAO", StubDAO)
+    return database
+
+
+@pytest.mark.unit
+class TestOutboxWrite:
+    def test_event_committed_with_mutation(self, load_model, outbox_table):  # noqa F811
+        TransactionalService().execute(mutation(total=3))
+
+        assert outbox_table.commits == 1
+        assert len(outbox_table.rows) == 1
+        row = outbox_table.rows[0]
+        assert row["operation_id"] == "invoice"
+        assert row["action"] == "update"
+        assert row["payload"] == {
+            "entity": "invoice",
+            "action": "update",
+            "store_params": {"total": 3},
+            "query_params": {"invoice_id": "1"},
+        }
+
+    def test_read_writes_no_event(self, load_model, outbox_table):  # noqa F811
+        TransactionalService().execute(
+            Operation(operation_id="invoice", action="read", query_params={})
+        )
+        assert outbox_table.rows == [] and outbox_table.pending == []
+
+    def test_failed_mutation_writes_no_event(
+        self, load_model, outbox_table  # noqa F811
+    ):
+        with pytest.raises(ValueError):
+            TransactionalService().execute(mutation(fail=True))
+        assert outbox_table.commits == 0
+        assert outbox_table.rows == []
+
+    def test_batch_events_follow_the_transaction(
+        self, load_model, outbox_table  # noqa F811
+    ):
+        results = TransactionalService().execute_batch(
+            [mutation(total=1), mutation(total=2)]
+        )
+        assert [result["status"] for result in results] == [200, 200]
+        assert [row["payload"]["store_params"] for row in outbox_table.rows] == [
+            {"total": 1},
+            {"total": 2},
+        ]
+
+        results = TransactionalService().execute_batch(
+            [mutation(total=3), mutation(fail=True)]
+        )
+        assert [result["status"] for result in results] == [424, 500]
+        assert len(outbox_table.rows) == 2
+
+    def test_disabled_writes_nothing(self, monkeypatch):
+        monkeypatch.setattr(outbox, "OUTBOX_TABLE", None)
+        cursor = OutboxCursor(OutboxDatabase())
+        write_event(cursor, mutation())
+        assert cursor.statements == []
+
+    def test_publisher_defers_to_outbox(
+        self, load_model, outbox_table, monkeypatch  # noqa F811
+    ):
+        sns = LocalSNS()
+        monkeypatch.setenv("BROADCAST_TOPIC", TOPIC)
+        monkeypatch.setattr(
+            "api_maker.services.service.notification_publisher.add",
+            lambda topic_arn, entry: sns.published.append((topic_arn, entry)),
+        )
+        RecordingPublisher().execute(mutation())
+        assert sns.published == []
+
+
+@pytest.mark.unit
+class TestOutboxRelay:
+    def test_drain_publishes_in_order(self):
+        database = OutboxDatabase()
+        add_events(database, [f"entity_{index % 10}" for index in range(27)])
+        sns = LocalSNS()
+
+        published = OutboxRelay(
+            "chinook", TOPIC, table="outbox", batch_size=10, sns_client=sns
+        ).drain(database.connection())
+
+        assert published == 27
+        assert database.rows == []
+        assert [len(entries) for entries in sns.calls] == [10, 10, 7]
+        entries = [entry for _, entry in sns.published]
+        assert [entry["MessageDeduplicationId"] for entry in entries] == [
+            f"chinook-{id}" for id in range(1, 28)
+        ]
+        assert entries[0]["MessageGroupId"] == "entity_0"
+        message = json.loads(json.loads(entries[1]["Message"])["default"])
+        assert message["entity"] == "entity_1"
+        assert message["store_params"] == {"total": 1}
+
+    def test_events_of_an_operation_batched(self):
+        database = OutboxDatabase()
+        add_events(database, ["invoice"] * 12 + ["track"])
+        sns = LocalSNS()
+
+        OutboxRelay("chinook", TOPIC, table="outbox", sns_client=sns).drain(
+            database.connection()
+        )
+
+        assert [[entry["Id"] for entry in entries] for entries in sns.calls] == [
+            [str(id) for id in range(1, 11)],
+            ["11", "12", "13"],
+        ]
+        assert database.rows == []
+
+    def test_failure_holds_back_later_events_of_operation(self, monkeypatch):
+        monkeypatch.setattr(outbox, "PUBLISH_BATCH_SIZE", 2)
+        database = OutboxDatabase()
+        add_events(database, ["invoice", "invoice", "track", "invoice", "track"])
+        # the second invoice event fails with a service fault
+        sns = LocalSNS(outcomes=[{"2": True}])
+
+        published = OutboxRelay("chinook", TOPIC, table="outbox", sns_client=sns).drain(
+            database.connection()
+        )
+
+        assert published == 3
+        assert [row["id"] for row in database.rows] == [2, 4]
+        assert [[entry["Id"] for entry in entries] for entries in sns.calls] == [
+            ["1", "2"],
+            ["3", "5"],
+        ]
+
+        # the next run publishes the held back events in order
+        sns = LocalSNS()
+        OutboxRelay("chinook", TOPIC, table="outbox", sns_client=sns).drain(
+            database.connection()
+        )
+        assert database.rows == []
+        assert [entry["Id"] for _, entry in sns.published] == ["2", "4"]
+
+    def test_request_failure_keeps_events(self):
+        database = OutboxDatabase()
+        add_events(database, ["invoice", "track"])
+        sns = LocalSNS(outcomes=[ConnectionError("unreachable")])
+
+        published = OutboxRelay("chinook", TOPIC, table="outbox", sns_client=sns).drain(
+            database.connection()
+        )
+
+        assert published == 0
+        assert len(database.rows) == 2
+
+    def test_standard_topic_entries(self):
+        database = OutboxDatabase()
+        add_events(database, ["invoice"])
+        sns = LocalSNS()
+
+        OutboxRelay(
+            "chinook", "arn:aws:sns:us-east-1:000000000000:mutations", "outbox", 10, sns
+        ).drain(database.connection())
+
+        entry = sns.published[0][1]
+        assert "MessageGroupId" not in entry
+        assert "MessageDeduplicationId" not in entry
+
+    def test_lambda_handler_drains_each_database(self, monkeypatch):
+        monkeypatch.setattr(outbox, "OUTBOX_TABLE", "outbox")
+        monkeypatch.setenv("BROADCAST_TOPIC", TOPIC)
+        monkeypatch.setenv("OUTBOX_DATABASES", "chinook,missing")
+        database = OutboxDatabase()
+        add_events(database, ["invoice", "track"])
+        sns = LocalSNS()
+
+        def get_connection(name):
+            if name == "missing":
+                raise ValueError(f"Secret not found for database: {name}")
+            return database.connection()
+
+        monkeypatch.setattr(
+            outbox_relay.connection_factory, "get_connection", get_connection
+        )
+        monkeypatch.setattr(outbox, "get_client", lambda client_type: sns)
+
+        assert outbox_relay.lambda_handler({}, None) == {"published": {"chinook": 2}}
+        assert database.rows == []
@@ -0,0 +1,144 @@
+import json
+import time
+
+import pytest
+
+from api_maker.adapters.gateway_adapter import GatewayAdapter
+from api_maker.operation import Operation
+from api_maker.services.service import ServiceAdapter
+from api_maker.utils import profiler
+from api_maker.utils.app_exception import ApplicationException
+
+from test_fixtures import load_model  # noqa F401
+
+
+class SlowService(ServiceAdapter):
+    def __init__(self):
+        self.operations = []
+
+    def execute(self, operation):
+        self.operations.append(operation)
+        records = [{"invoice_id": index, "total": str(index)} for index in range(2000)]
+        time.sleep(0.05)
+        return records[:1]
+
+
+def invoice_event(query: dict) -> dict:
+    return {
+        "resource": "/invoice",
+        "httpMethod": "GET",
+        "headers": {},
+        "queryStringParameters": query,
+    }
+
+
+@pytest.mark.unit
+class TestProfiler:
+    def test_profile_not_allowed(self, load_model, monkeypatch):  # noqa F811
+        monkeypatch.delenv("ALLOW_PROFILE", raising=False)
+        with pytest.raises(ApplicationException) as error:
+            GatewayAdapter(SlowService()).process_event(
+                invoice_event({"__profile": "true"})
+            )
+        assert error.value.status_code == 403
+
+    def test_profile_requested(self, load_model, monkeypatch, tmp_path):  # noqa F811
+        monkeypatch.setenv("ALLOW_PROFILE", "true")
+        monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+        service = SlowService()
+
+        result = GatewayAdapter(service).process_event(
+            invoice_event({"__profile": "true", "total": "gt::5"})
+        )
+
+        assert result == [{"invoice_id": 0, "total": "0"}]
+        # the flag is not passed to the service
+        assert "profile" not in service.operations[0].metadata_params
+
+        (collapsed_file,) = tmp_path.glob("*-invoice-read.collapsed")
+        collapsed = collapsed_file.read_text()
+        assert "test_profiler:execute" in collapsed
+        stack, count = collapsed.splitlines()[0].rsplit(" ", 1)
+        assert int(count) > 0
+
+        (profile_file,) = tmp_path.glob("*-invoice-read.json")
+        profile = json.loads(profile_file.read_text())
+        assert profile["shape"] == {
+            "operation_id": "invoice",
+            "action": "read",
+            "query_params": ["total"],
+            "metadata_params": [],
+        }
+        assert profile["elapsed_ms"] >= 50
+        assert any(
+            "test_profiler.py" in site["site"] for site in profile["allocations"]
+        )
+
+    def test_profile_sampled(self, load_model, monkeypatch, caplog):  # noqa F811
+        monkeypatch.setattr(profiler, "PROFILE_SAMPLE_RATE", 1.0)
+        monkeypatch.setattr(profiler, "PROFILE_DIR", None)
+
+        with caplog.at_level("INFO", logger="api_maker.profile"):
+            GatewayAdapter(SlowService()).process_event(invoice_event({}))
+
+        (record,) = [r for r in caplog.records if r.name == "api_maker.profile"]
+        assert record.getMessage().startswith("profile: ")
+        profile = json.loads(record.getMessage()[len("profile: ") :])  # noqa E203
+        assert profile["shape"]["operation_id"] == "invoice"
+
+    def test_concurrent_profiles(self, load_model, monkeypatch):  # noqa F811
+        import tracemalloc
+
+        written = []
+        monkeypatch.setattr(profiler, "write_profile", written.append)
+        operation = Operation(operation_id="invoice", action="read")
+
+        first = profiler.RequestProfile(operation)
+        second = profiler.RequestProfile(operation)
+        first.__enter__()
+        second.__enter__()
+        # the profile that started tracing exits first
+        first.__exit__(None, None, None)
+        assert tracemalloc.is_tracing()
+        second.__exit__(None, None, None)
+
+        assert not tracemalloc.is_tracing()
+        assert len(written) == 2
+
+    def test_peak_of_request(self, load_model, monkeypatch):  # noqa F811
+        import tracemalloc
+
+        written = []
+        monkeypatch.setattr(profiler, "write_profile", written.append)
+        operation = Operation(operation_id="invoice", action="read")
+
+        tracemalloc.start()
+        try:
+            session = bytearray(4_000_000)
+            del session
+            with profiler.RequestProfile(operation):
+                pass
+            # tracing started before the profile is left running
+            assert tracemalloc.is_tracing()
+        finally:
+            tracemalloc.stop()
+        assert written[0]["peak_bytes"] < 4_000_000
+
+    def test_profile_failure_not_raised(
+        self, load_model, monkeypatch, tmp_path, caplog  # noqa F811
+    ):
+        monkeypatch.setenv("ALLOW_PROFILE", "true")
+        unwritable = tmp_path / "profiles"
+        unwritable.write_text("not a directory")
+        monkeypatch.setattr(profiler, "PROFILE_DIR", str(unwritable))
+
+        with caplog.at_level("WARNING", logger="api_maker.profile"):
+            result = GatewayAdapter(SlowService()).process_event(
+                invoice_event({"__profile": "true"})
+            )
+
+        assert result == [{"invoice_id": 0, "total": "0"}]
+        assert any(
+            record.getMessage().startswith("profile not written")
+            for record in caplog.records
+        )
@@ -0,0 +1,303 @@
+import pytest
+
+from api_maker.operation import Operation
+from api_maker.services import query_cache as cache_module
+from api_maker.services import transactional_service
+from api_maker.services.query_cache import InvalidationListener, QueryCache
+from api_maker.services.transactional_service import TransactionalService
+from api_maker.utils.model_factory import ModelFactory
+
+from test_fixtures import load_model  # noqa F401
+
+
+def read(operation_id: str = "invoice", **metadata_params) -> Operation:
+    return Operation(
+        operation_id=operation_id,
+        action="read",
+        query_params={"customer_id": "5"},
+        metadata_params=metadata_params,
+    )
+
+
+def update(operation_id: str = "invoice") -> Operation:
+    return Operation(
+        operation_id=operation_id,
+        action="update",
+        query_params={"invoice_id": "1"},
+        store_params={"total": 3},
+    )
+
+
+def cache_read(cache: QueryCache, operation: Operation, result: list):
+    api_object = ModelFactory.get_api_object(operation.operation_id, "read")
+    cache.put(operation, api_object, result, cache.generation)
+
+
+class RecordingCursor:
+    def __init__(self, statements: list):
+        self.statements = statements
+
+    def execute(self, sql: str, params: dict, selection_results) -> list[dict]:
+        self.statements.append((sql, params))
+        return [{"pg_notify": None}]
+
+    def close(self):
+        pass
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    def engine(self):
+        return "postgres"
+
+    def cursor(self):
+        return RecordingCursor(self.statements)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class CountingDAO:
+    executions = 0
+
+    def __init__(self, operation, engine):
+        self.operation = operation
+
+    def execute(self, cursor):
+        CountingDAO.executions += 1
+        return [{"invoice_id": CountingDAO.executions}]
+
+
+@pytest.fixture
+def cached_service(monkeypatch):
+    cache = QueryCache(ttl=60, size=16)
+    connection = RecordingConnection()
+    monkeypatch.setattr(transactional_service, "query_cache", cache)
+    monkeypatch.setattr(
+        transactional_service.connection_factory,
+        "get_connection",
+        lambda _: connection,
+    )
+    monkeypatch.setattr(transactional_service, "OperationDAO", CountingDAO)
+    CountingDAO.executions = 0
+    return cache, connection
+
+
+@pytest.mark.unit
+class TestQueryCache:
+    def test_disabled_by_default(self, load_model):  # noqa F811
+        cache = QueryCache(ttl=0)
+        cache_read(cache, read(), [{"invoice_id": 1}])
+        assert cache.get(read()) is None
+        assert cache.entries == {}
+
+    def test_hit_by_parameters(self, load_model):  # noqa F811
+        cache = QueryCache(ttl=60)
+        cache_read(cache, read(), [{"invoice_id": 1}])
+
+        assert cache.get(read()) == [{"invoice_id": 1}]
+        assert cache.get(read(properties="invoice_id")) is None
+        assert cache.get(update()) is None
+
+    def test_expired(self, load_model, monkeypatch):  # noqa F811
+        now = [1000.0]
+        monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+        cache = QueryCache(ttl=60)
+        cache_read(cache, read(), [{"invoice_id": 1}])
+
+        now[0] += 59
+        assert cache.get(read()) is not None
+        now[0] += 2
+        assert cache.get(read()) is None
+        assert cache.entries == {} and cache.dependents == {}
+
+    def test_least_recently_used_evicted(self, load_model):  # noqa F811
+        cache = QueryCache(ttl=60, size=2)
+        cache_read(cache, read("invoice"), [1])
+        cache_read(cache, read("customer"), [2])
+        cache.get(read("invoice"))
+        cache_read(cache, read("track"), [3])
+
+        assert cache.get(read("customer")) is None
+        assert cache.get(read("invoice")) == [1]
+        assert cache.get(read("track")) == [3]
+
+    def test_invalidate_by_dependency(self, load_model):  # noqa F811
+        cache = QueryCache(ttl=60)
+        cache_read(cache, read("invoice"), [1])
+        cache_read(cache, read("invoice", properties=".* customer:.*"), [2])
+        cache_read(cache, read("invoice", sort="customer.last_name"), [3])
+        cache_read(cache, read("customer"), [4])
+
+        cache.invalidate("customer")
+
+        assert cache.get(read("invoice")) == [1]
+        assert cache.get(read("invoice", properties=".* customer:.*")) is None
+        assert cache.get(read("invoice", sort="customer.last_name")) is None
+        assert cache.get(read("customer")) is None
+        assert set(cache.dependents) == {"invoice"}
+
+    def test_invalidate_by_relation_filter(self, load_model):  # noqa F811
+        cache = QueryCache(ttl=60)
+        filtered = Operation(
+            operation_id="invoice",
+            action="read",
+            query_params={"customer.country": "USA"},
+        )
+        cache_read(cache, filtered, [1])
+        cache_read(cache, read("invoice"), [2])
+
+        cache.invalidate("customer")
+
+        assert cache.get(filtered) is None
+        assert cache.get(read("invoice")) == [2]
+
+    def test_explain_not_cached(self, load_model):  # noqa F811
+        cache = QueryCache(ttl=60)
+        cache_read(cache, read(explain="true"), [{"plan": []}])
+        cache_read(cache, read(count="true"), [{"count": 2}])
+
+        assert cache.get(read(explain="true")) is None
+        assert cache.get(read(count="true")) == [{"count": 2}]
+        assert cache.get(read()) is None
+
+    def test_path_operation_mutation_clears(self, load_model):  # noqa F811
+        cache = QueryCache(ttl=60)
+        cache_read(cache, read("invoice"), [1])
+        cache.evict(ModelFactory.get_api_object("top_selling_albums", "read"))
+        assert cache.entries == {}
+
+    def test_read_overlapping_eviction_not_cached(self, load_model):  # noqa F811
+        cache = QueryCache(ttl=60)
+        generation = cache.generation
+        cache.invalidate("track")
+        cache.put(read(), ModelFactory.get_schema_object("invoice"), [1], generation)
+        assert cache.get(read()) is None
+
+    def test_path_operation_reads_not_cached(self, load_model):  # noqa F811
+        cache = QueryCache(ttl=60)
+        cache_read(cache, read("top_selling_albums"), [1])
+        assert cache.entries == {}
+
+
+@pytest.mark.unit
+class TestTransactionalServiceCache:
+    def test_read_served_from_cache(self, load_model, cached_service):  # noqa F811
+        cache, connection = cached_service
+
+        first = TransactionalService().execute(read())
+        second = TransactionalService().execute(read())
+
+        assert first == second == [{"invoice_id": 1}]
+        assert CountingDAO.executions == 1
+
+    def test_mutation_evicts(self, load_model, cached_service):  # noqa F811
+        cache, connection = cached_service
+        TransactionalService().execute(read())
+
+        TransactionalService().execute(update())
+        assert connection.commits == 1
+        assert connection.statements == []
+
+        assert TransactionalService().execute(read()) == [{"invoice_id": 3}]
+
+    def test_batch_mutation_evicts(self, load_model, cached_service):  # noqa F811
+        cache, connection = cached_service
+        TransactionalService().execute(read())
+
+        TransactionalService().execute_batch([update()])
+
+        assert cache.get(read()) is None
+
+    def test_mutation_notifies(
+        self, load_model, cached_service, monkeypatch  # noqa F811
+    ):
+        cache, connection = cached_service
+        monkeypatch.setattr(cache_module, "CACHE_NOTIFY", True)
+
+        TransactionalService().execute(update())
+        TransactionalService().execute(read())
+        TransactionalService().execute_batch([update("customer")])
+
+        assert connection.statements == [
+            (
+                "SELECT pg_notify(%(channel)s, %(action)s)",
+                {"channel": "api_maker_invoice", "action": "update"},
+            ),
+            (
+                "SELECT pg_notify(%(channel)s, %(action)s)",
+                {"channel": "api_maker_customer", "action": "update"},
+            ),
+        ]
+
+
+class ListeningConnection:
+    """
+    Yields the notifications once listening, calling listening first.
+    """
+
+    def __init__(self, notifications: list, listening=None):
+        self.notifications = notifications
+        self.listening = listening
+        self.channels = None
+
+    def listen(self, channels: list[str], timeout: float):
+        self.channels = channels
+        yield None
+        if self.listening:
+            self.listening()
+        yield from self.notifications
+
+
+@pytest.mark.unit
+class TestInvalidationListener:
+    def test_channels_of_database(self, load_model):  # noqa F811
+        listener = InvalidationListener("chinook", QueryCache(ttl=60))
+        assert listener.channels["api_maker"] is None
+        assert listener.channels["api_maker_invoice"] == "invoice"
+        assert len(listener.channels) == len(ModelFactory.schema_objects) + 1
+
+    def test_listening_clears_cache(self, load_model):  # noqa F811
+        cache = QueryCache(ttl=60)
+        cache_read(cache, read("invoice"), [1])
+        connection = ListeningConnection([])
+
+        InvalidationListener("chinook", cache).listen(connection)
+
+        assert cache.entries == {}
+        assert "api_maker_invoice" in connection.channels
+
+    def test_notifications_evict(self, load_model):  # noqa F811
+        cache = QueryCache(ttl=60)
+
+        def listening():
+            for operation_id in ["invoice", "customer", "track"]:
+                cache_read(cache, read(operation_id), [operation_id])
+
+        connection = ListeningConnection(
+            ["api_maker_customer", None, "api_maker_track"], listening
+        )
+        InvalidationListener("chinook", cache).listen(connection)
+
+        assert cache.get(read("invoice")) == ["invoice"]
+        assert cache.get(read("customer")) is None
+        assert cache.get(read("track")) is None
+
+    def test_prefix_channel_clears_cache(self, load_model):  # noqa F811
+        cache = QueryCache(ttl=60)
+        connection = ListeningConnection(
+            ["api_maker"], lambda: cache_read(cache, read("invoice"), [1])
+        )
+
+        InvalidationListener("chinook", cache).listen(connection)
+
+        assert cache.entries == {}
@@ -0,0 +1,65 @@
+import pytest
+
+from api_maker.operation import Operation
+from api_maker.utils.app_exception import ApplicationException
+from api_maker.utils.request_validator import validate
+
+from test_fixtures import load_model  # noqa F401
+
+
+def invoice_operation(action: str = "read", **kwargs) -> Operation:
+    return Operation(operation_id="invoice", action=action, **kwargs)
+
+
+@pytest.mark.unit
+class TestRequestValidator:
+    def test_valid_operations(self, load_model):  # noqa F811
+        for operation in [
+            invoice_operation(
+                query_params={
+                    "invoice_id": "lt::100",
+                    "total": "between::3,6",
+                    "billing_country": "ilike::us%",
+                    "invoice_date": "gt::2000-12-12T12:34:56Z",
+                    "customer.country": "USA",
+                },
+                metadata_params={"sort": "invoice_date:desc,customer.last_name"},
+            ),
+            invoice_operation(
+                "create", store_params={"customer_id": 2, "billing_city": "Boston"}
+            ),
+            invoice_operation(
+                metadata_params={
+                    "group_by": "billing_country",
+                    "aggregate": "sum:total",
+                    "sort": "sum_total:desc",
+                }
+            ),
+            # entities that are not in the model are not validated
+            Operation(operation_id="accounts", action="read", query_params={"x": 1}),
+        ]:
+            validate(operation)
+
+    @pytest.mark.parametrize(
+        "operation",
+        [
+            invoice_operation(query_params={"unknown": "1"}),
+            invoice_operation(query_params={"customer.unknown": "1"}),
+            invoice_operation(query_params={"invoice_id": "abc"}),
+            invoice_operation(query_params={"invoice_id": "in::1,x"}),
+            invoice_operation(query_params={"total": "between::3"}),
+            invoice_operation(query_params={"total": "like::3%"}),
+            invoice_operation(query_params={"invoice_id": "near::3"}),
+            invoice_operation(query_params={"invoice_date": "yesterday"}),
+            invoice_operation(query_params={"billing_postal_code": "0" * 11}),
+            invoice_operation(metadata_params={"sort": "invoice_line_items.quantity"}),
+            invoice_operation(metadata_params={"sort": "total:up"}),
+            invoice_operation(metadata_params={"limit": "ten"}),
+            invoice_operation("create", store_params={"unknown": 1}),
+            invoice_operation("update", store_params={"total": "a lot"}),
+        ],
+    )
+    def test_invalid_operations(self, load_model, operation):  # noqa F811
+        with pytest.raises(ApplicationException) as error:
+            validate(operation)
+        assert error.value.status_code == 400
@@ -1,5 +1,6 @@
 import pytest
 
+from api_maker.utils.app_exception import ApplicationException
 from api_maker.utils.spec_handler import SpecificationHandler
 from api_maker.utils.logger import logger
 
@@ -94,3 +95,91 @@ class TestSpecHandler:
         log.info(f"result: {result}")
         assert result
         assert result["album_id"] == {"type": "integer", "x-am-primary-key": "auto"}
+
+    def test_ref_resolved_once(self):
+        spec_handler = SpecificationHandler(spec)
+
+        items = spec_handler.traverse_spec(
+            spec,
+            ["components", "schemas", "artist", "properties", "album_items", "items"],
+        )
+        album = spec_handler.resolve_reference("#/components/schemas/album")
+
+        # the referenced component is shared, not copied per reference
+        assert items["properties"] is album["properties"]
+        assert items["$ref"] == "#/components/schemas/album"
+        assert items["x-am-child-property"] == "artist_id"
+        assert spec_handler.get(
+            spec["components"]["schemas"]["artist"]["properties"]["album_items"],
+            ["items", "x-am-child-property"],
+        )
+
+    def test_ref_sibling_precedence(self):
+        sibling_spec = {
+            "components": {
+                "schemas": {
+                    "base": {"type": "string", "maxLength": 10},
+                    "name": {"$ref": "#/components/schemas/base", "maxLength": 20},
+                }
+            }
+        }
+        spec_handler = SpecificationHandler(sibling_spec)
+        name = sibling_spec["components"]["schemas"]["name"]
+
+        assert spec_handler.get(name, "maxLength") == 20
+        assert spec_handler.get(name, "type") == "string"
+
+    def test_recursive_schema(self):
+        recursive_spec = {
+            "components": {
+                "schemas": {
+                    "invoice": {
+                        "type": "object",
+                        "properties": {
+                            "customer": {"$ref": "#/components/schemas/customer"}
+                        },
+                    },
+                    "customer": {
+                        "type": "object",
+                        "properties": {
+                            "invoices": {
+                                "type": "array",
+                                "items": {"$ref": "#/components/schemas/invoice"},
+                            }
+                        },
+                    },
+                }
+            }
+        }
+        spec_handler = SpecificationHandler(recursive_spec)
+
+        invoice = spec_handler.resolve_reference("#/components/schemas/invoice")
+        customer = spec_handler.get(invoice, ["properties", "customer"])
+        assert customer["type"] == "object"
+        assert (
+            customer["properties"]["invoices"]["items"]["properties"]
+            is invoice["properties"]
+        )
+
+    def test_circular_ref(self):
+        circular_spec = {
+            "components": {
+                "schemas": {
+                    "a": {"$ref": "#/components/schemas/b"},
+                    "b": {"$ref": "#/components/schemas/a"},
+                }
+            }
+        }
+        spec_handler = SpecificationHandler(circular_spec)
+
+        with pytest.raises(ApplicationException) as ae:
+            spec_handler.get(circular_spec["components"]["schemas"]["a"], "type")
+        assert ae.value.status_code == 500
+        assert "Circular $ref" in ae.value.message
+
+    def test_element_outside_spec(self):
+        spec_handler = SpecificationHandler(spec)
+
+        element = {"$ref": "#/components/schemas/album", "type": "object"}
+        assert spec_handler.get(element, "properties")["title"]["maxLength"] == 160
+        assert spec_handler.get(element, "missing", "default") == "default"
@@ -0,0 +1,60 @@
+import pytest
+
+from api_maker.scripts.sql_benchmark import (
+    find_regressions,
+    format_results,
+    run_benchmarks,
+)
+from api_maker.utils.model_factory import ModelFactory
+
+from test_fixtures import load_model  # noqa F401
+
+
+@pytest.mark.unit
+class TestSQLBenchmark:
+    def test_run_benchmarks(self, load_model):  # noqa F811
+        spec = ModelFactory.spec
+        results = run_benchmarks(min_time=0)
+
+        handlers = ["select", "subselect", "insert", "update", "delete", "custom"]
+        for handler in handlers:
+            for phase in ["build", "marshal"]:
+                result = results[f"chinook.{handler}.{phase}"]
+                assert result["ops_per_sec"] > 0
+                assert result["peak_bytes"] > 0
+        assert "synthetic.wide_select.marshal" in results
+        # the model in use is restored
+        assert ModelFactory.spec is spec
+        assert "chinook.select.build" in format_results(results, results)
+
+    def test_run_benchmarks_restores_released_model(
+        self, load_model, monkeypatch  # noqa F811
+    ):
+        # a compiled model is loaded without its spec
+        monkeypatch.setattr(ModelFactory, "spec", None)
+        schema_objects = ModelFactory.schema_objects
+        path_operations = ModelFactory.path_operations
+
+        run_benchmarks(min_time=0)
+
+        assert ModelFactory.spec is None
+        assert ModelFactory.schema_objects is schema_objects
+        assert ModelFactory.path_operations is path_operations
+
+    def test_find_regressions(self):
+        baseline = {
+            "a.build": {"ops_per_sec": 1000, "peak_bytes": 1000},
+            "b.build": {"ops_per_sec": 1000, "peak_bytes": 1000},
+            "c.build": {"ops_per_sec": 1000, "peak_bytes": 1000},
+        }
+        results = {
+            "a.build": {"ops_per_sec": 900, "peak_bytes": 1100},
+            "b.build": {"ops_per_sec": 500, "peak_bytes": 1000},
+            "c.build": {"ops_per_sec": 1000, "peak_bytes": 2000},
+            "d.build": {"ops_per_sec": 1, "peak_bytes": 1},
+        }
+
+        regressions = find_regressions(results, baseline)
+        assert len(regressions) == 2
+        assert regressions[0].startswith("b.build: 500 ops/sec")
+        assert regressions[1].startswith("c.build: 2000 peak bytes")
@@ -524,3 +524,199 @@ class TestSQLHandler:
 
         select_map = subselect_sql_generator.selection_result_map()
         log.info(f"select_map: {select_map}")
+
+    def test_text_search_condition(self, load_model):  # noqa F811
+        operation = Operation(
+            operation_id="invoice",
+            action="read",
+            query_params={
+                "billing_city": "starts::San_",
+                "billing_country": "ilike::%us%",
+                "billing_state": "like::F_",
+                "billing_address": "fts::main street",
+            },
+        )
+        schema_object = ModelFactory.get_schema_object("invoice")
+        sql_handler = SQLSelectSchemaQueryHandler(operation, schema_object, "postgres")
+
+        log.info(f"sql_handler: {sql_handler.sql}")
+        assert (
+            sql_handler.search_condition
+            == " WHERE i.billing_city LIKE %(i_billing_city)s AND i.billing_country ILIKE %(i_billing_country)s AND i.billing_state LIKE %(i_billing_state)s AND to_tsvector('english', i.billing_address) @@ plainto_tsquery('english', %(i_billing_address)s)"  # noqa E501
+        )
+        assert sql_handler.placeholders == {
+            "i_billing_city": "San\\_%",
+            "i_billing_country": "%us%",
+            "i_billing_state": "F_",
+            "i_billing_address": "main street",
+        }
+
+    def test_text_search_vector(self, load_model):  # noqa F811
+        property = SchemaObjectProperty(
+            operation_id="track",
+            name="name",
+            properties={"type": "string", "x-am-search-vector": "name_tsv"},
+            spec=ModelFactory.spec,
+        )
+        sql_handler = SQLSelectSchemaQueryHandler(
+            Operation(operation_id="track", action="read"),
+            ModelFactory.get_schema_object("track"),
+            "postgres",
+        )
+
+        (sql, placeholders) = sql_handler.search_value_assignment(
+            property, "fts::love song", "t"
+        )
+        assert sql == "t.name_tsv @@ plainto_tsquery('english', %(t_name)s)"
+        assert placeholders == {"t_name": "love song"}
+
+    def test_text_search_invalid_type(self, load_model):  # noqa F811
+        operation = Operation(
+            operation_id="invoice",
+            action="read",
+            query_params={"total": "like::5%"},
+        )
+        sql_handler = SQLSelectSchemaQueryHandler(
+            operation, ModelFactory.get_schema_object("invoice"), "postgres"
+        )
+
+        with pytest.raises(ApplicationException) as ae:
+            sql_handler.sql
+        assert ae.value.status_code == 400
+
+    def test_aggregate(self, load_model):  # noqa F811
+        operation = Operation(
+            operation_id="invoice",
+            action="read",
+            query_params={"total": "gt::1"},
+            metadata_params={
+                "group_by": "billing_country,customer.support_rep_id",
+                "aggregate": "sum:total,count_distinct:customer_id,count:*",
+                "having": "sum_total:gt::100",
+                "sort": "sum_total:desc",
+            },
+        )
+        sql_handler = SQLSelectSchemaQueryHandler(
+            operation, ModelFactory.get_schema_object("invoice"), "postgres"
+        )
+
+        log.info(f"sql: {sql_handler.sql}")
+        assert (
+            sql_handler.sql
+            == "SELECT i.billing_country, c.support_rep_id, SUM(i.total) AS sum_total, COUNT(DISTINCT i.customer_id) AS count_distinct_customer_id, COUNT(*) AS count FROM invoice AS i INNER JOIN customer AS c ON i.customer_id = c.customer_id WHERE i.total > %(i_total)s GROUP BY i.billing_country, c.support_rep_id HAVING SUM(i.total) > %(having_sum_total)s ORDER BY sum_total desc"  # noqa E501
+        )
+        assert sql_handler.placeholders == {"i_total": 1.0, "having_sum_total": 100.0}
+
+        record = dict(
+            zip(sql_handler.selection_results.keys(), ["USA", 3, 523.06, 13, 91])
+        )
+        assert sql_handler.marshal_record(record) == {
+            "billing_country": "USA",
+            "sum_total": 523.06,
+            "count_distinct_customer_id": 13,
+            "count": 91,
+            "customer": {"support_rep_id": 3},
+        }
+
+    def test_aggregate_without_group_by(self, load_model):  # noqa F811
+        sql_handler = SQLSelectSchemaQueryHandler(
+            Operation(
+                operation_id="invoice",
+                action="read",
+                metadata_params={"aggregate": "min:invoice_date,avg:total"},
+            ),
+            ModelFactory.get_schema_object("invoice"),
+            "postgres",
+        )
+
+        assert (
+            sql_handler.sql
+            == "SELECT MIN(i.invoice_date) AS min_invoice_date, AVG(i.total) AS avg_total FROM invoice AS i"  # noqa E501
+        )
+
+    def test_group_by_object_property(self, load_model):  # noqa F811
+        sql_handler = SQLSelectSchemaQueryHandler(
+            Operation(
+                operation_id="invoice",
+                action="read",
+                metadata_params={
+                    "group_by": "customer.country",
+                    "sort": "customer.country:desc",
+                },
+            ),
+            ModelFactory.get_schema_object("invoice"),
+            "postgres",
+        )
+
+        assert (
+            sql_handler.sql
+            == "SELECT c.country FROM invoice AS i INNER JOIN customer AS c ON i.customer_id = c.customer_id GROUP BY c.country ORDER BY c.country desc"  # noqa E501
+        )
+        record = dict(zip(sql_handler.selection_results.keys(), ["USA"]))
+        assert sql_handler.marshal_record(record) == {"customer": {"country": "USA"}}
+
+    def test_aggregate_invalid(self, load_model):  # noqa F811
+        for metadata_params in [
+            {"aggregate": "median:total"},
+            {"aggregate": "sum:*"},
+            {"group_by": "invoice_line_items.quantity"},
+            {"group_by": "billing_country", "having": "billing_country:USA"},
+            {"having": "count:gt::1"},
+            {"group_by": "billing_country", "sort": "total"},
+            {"aggregate": "sum:total", "sort": "customer.country"},
+        ]:
+            sql_handler = SQLSelectSchemaQueryHandler(
+                Operation(
+                    operation_id="invoice",
+                    action="read",
+                    metadata_params=metadata_params,
+                ),
+                ModelFactory.get_schema_object("invoice"),
+                "postgres",
+            )
+            with pytest.raises(ApplicationException) as ae:
+                sql_handler.sql
+            assert ae.value.status_code == 400, metadata_params
+
+    def test_marshal_decoded_types(self, load_model):  # noqa F811
+        sql_handler = SQLSelectSchemaQueryHandler(
+            Operation(
+                operation_id="invoice",
+                action="read",
+                metadata_params={"properties": "invoice_id total"},
+            ),
+            ModelFactory.get_schema_object("invoice"),
+            "postgres",
+        )
+        record = dict(zip(sql_handler.selection_results.keys(), ["7", "12.50"]))
+
+        assert sql_handler.marshal_record(record) == {
+            "invoice_id": 7,
+            "total": 12.5,
+        }
+        # values of decoded types are passed through as returned by the driver
+        assert sql_handler.marshal_record(record, frozenset(["number"])) == {
+            "invoice_id": 7,
+            "total": "12.50",
+        }
+
+    def test_marshal_camel_case(self, load_model):  # noqa F811
+        sql_handler = SQLSelectSchemaQueryHandler(
+            Operation(
+                operation_id="invoice",
+                action="read",
+                metadata_params={
+                    "properties": "invoice_id customer:.*",
+                    "case": "camel",
+                },
+            ),
+            ModelFactory.get_schema_object("invoice"),
+            "postgres",
+        )
+        columns = list(sql_handler.selection_results.keys())
+        record = dict(zip(columns, range(len(columns))))
+
+        result = sql_handler.marshal_record(record)
+        assert "invoiceId" in result
+        assert "supportRepId" in result["customer"]
+        assert "support_rep_id" not in result["customer"]
@@ -0,0 +1,284 @@
+import json
+import pytest
+
+from api_maker.adapters.gateway_adapter import GatewayAdapter
+from api_maker.connectors.connection import Cursor
+from api_maker.dao import operation_dao
+from api_maker.dao.operation_dao import OperationDAO
+from api_maker.iac import handler
+from api_maker.operation import Operation
+from api_maker.services import transactional_service
+from api_maker.services.service import Service
+from api_maker.services.transactional_service import TransactionalService
+from api_maker.utils.app_exception import ApplicationException
+from api_maker.utils.logger import logger
+
+from test_fixtures import load_model  # noqa F401
+
+log = logger(__name__)
+
+
+class BatchingCursor(Cursor):
+    def __init__(self, records: list[tuple]):
+        self.records = records
+        self.statements = []
+
+    def execute(self, sql: str, params: dict, result_columns) -> list[dict]:
+        self.statements.append(("execute", sql))
+        if "count" in result_columns:
+            return [{"count": len(self.records)}]
+        return []
+
+    def stream(self, sql: str, params: dict, result_columns, batch_size: int):
+        self.statements.append(("stream", sql))
+        for start in range(0, len(self.records), batch_size):
+            yield [
+                dict(zip(result_columns, record))
+                for record in self.records[start : start + batch_size]  # noqa E203
+            ]
+
+    def close(self):
+        pass
+
+
+class NamedCursor(BatchingCursor):
+    """
+    Server side cursor, like psycopg2 named cursors a single statement can
+    be executed and explains can not be declared.
+    """
+
+    def execute(self, sql: str, params: dict, result_columns) -> list[dict]:
+        self.check(sql)
+        return super().execute(sql, params, result_columns)
+
+    def stream(self, sql: str, params: dict, result_columns, batch_size: int):
+        self.check(sql)
+        yield from super().stream(sql, params, result_columns, batch_size)
+
+    def check(self, sql: str):
+        if self.statements:
+            raise AssertionError(
+                "can't call .execute() on named cursors more than once"
+            )
+        if sql.lstrip().upper().startswith("EXPLAIN"):
+            raise AssertionError("can't declare a cursor for an explain")
+
+
+class StreamingConnection:
+    def __init__(self, records: list[tuple]):
+        self.records = records
+        self.cursors = []
+
+    def engine(self):
+        return "postgres"
+
+    def cursor(self):
+        self.cursors.append(BatchingCursor(self.records))
+        return self.cursors[-1]
+
+    def stream_cursor(self):
+        self.cursors.append(NamedCursor(self.records))
+        return self.cursors[-1]
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class MockStreamingService(Service):
+    def __init__(self, batches=None, error=None):
+        self.batches = batches or []
+        self.error = error
+
+    def stream(self, operation):
+        if self.error:
+            raise self.error
+        yield from self.batches
+
+
+class RecordingStream:
+    def __init__(self):
+        self.data = b""
+        self.closed = False
+
+    def write(self, data: bytes):
+        self.data += data
+
+    def close(self):
+        self.closed = True
+
+    def split(self):
+        prelude, body = self.data.split(handler.STREAM_PRELUDE_DELIMITER, 1)
+        return json.loads(prelude), body.decode("utf-8")
+
+
+def gateway_event(accept: str = "*/*") -> dict:
+    return {
+        "resource": "/album",
+        "httpMethod": "GET",
+        "headers": {"Accept": accept},
+        "queryStringParameters": None,
+        "pathParameters": {},
+        "body": "",
+    }
+
+
+@pytest.mark.unit
+class TestStreaming:
+    def test_dao_stream_batches(self, load_model):  # noqa F811
+        cursor = BatchingCursor([(i, f"title {i}", 1) for i in range(5)])
+        batches = list(
+            OperationDAO(
+                Operation(operation_id="album", action="read"), "postgres"
+            ).stream(cursor, batch_size=2)
+        )
+
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert batches[0][0] == {"album_id": 0, "title": "title 0", "artist_id": 1}
+        assert [kind for kind, _ in cursor.statements] == ["stream"]
+
+    def test_dao_stream_count(self, load_model):  # noqa F811
+        cursor = BatchingCursor([(1, "title", 1)])
+        batches = list(
+            OperationDAO(
+                Operation(
+                    operation_id="album",
+                    action="read",
+                    metadata_params={"count": True},
+                ),
+                "postgres",
+            ).stream(cursor)
+        )
+
+        assert batches == [[{"count": 1}]]
+        assert [kind for kind, _ in cursor.statements] == ["execute"]
+
+    def test_dao_streams_array_relations(self, load_model, monkeypatch):  # noqa F811
+        # deciding whether to stream does not build the subselect handlers
+        monkeypatch.setattr(operation_dao, "SQLSubselectSchemaQueryHandler", None)
+
+        def dao(operation_id: str, properties: str) -> OperationDAO:
+            return OperationDAO(
+                Operation(
+                    operation_id=operation_id,
+                    action="read",
+                    metadata_params={"properties": properties},
+                ),
+                "postgres",
+            )
+
+        assert dao("invoice_line", ".* invoice:.*").streams
+        assert not dao("invoice", ".* invoice_line_items:.*").streams
+
+    def test_service_stream_cursor(self, load_model, monkeypatch):  # noqa F811
+        connection = StreamingConnection([(1, "title", 1)])
+        monkeypatch.setattr(
+            transactional_service.connection_factory,
+            "get_connection",
+            lambda _: connection,
+        )
+        monkeypatch.setenv("ALLOW_EXPLAIN", "true")
+
+        operations = [
+            ({}, NamedCursor),
+            ({"properties": ".* track_items:.*"}, BatchingCursor),
+            ({"count": True}, BatchingCursor),
+            ({"explain": "true"}, BatchingCursor),
+        ]
+        for metadata_params, cursor_type in operations:
+            list(
+                TransactionalService().stream(
+                    Operation(
+                        operation_id="album",
+                        action="read",
+                        metadata_params=metadata_params,
+                    )
+                )
+            )
+            assert type(connection.cursors[-1]) is cursor_type
+
+        # an array property selection executes a statement per relation
+        assert len(connection.cursors[1].statements) == 2
+
+    def test_stream_handler_ndjson(self, monkeypatch):
+        monkeypatch.setattr(
+            handler,
+            "adapter",
+            GatewayAdapter(
+                MockStreamingService(
+                    [[{"album_id": 1}, {"album_id": 2}], [{"album_id": 3}]]
+                )
+            ),
+        )
+        stream = RecordingStream()
+        handler.stream_handler(gateway_event(handler.NDJSON), stream)
+
+        prelude, body = stream.split()
+        assert prelude == {
+            "statusCode": 200,
+            "headers": {"Content-Type": handler.NDJSON},
+        }
+        assert [json.loads(line) for line in body.splitlines()] == [
+            {"album_id": 1},
+            {"album_id": 2},
+            {"album_id": 3},
+        ]
+        assert stream.closed
+
+    def test_stream_handler_json_array(self, monkeypatch):
+        monkeypatch.setattr(
+            handler,
+            "adapter",
+            GatewayAdapter(
+                MockStreamingService([[{"album_id": 1}], [], [{"album_id": 2}]])
+            ),
+        )
+        stream = RecordingStream()
+        handler.stream_handler(gateway_event(), stream)
+
+        prelude, body = stream.split()
+        assert prelude["headers"]["Content-Type"] == "application/json"
+        assert json.loads(body) == [{"album_id": 1}, {"album_id": 2}]
+
+    def test_stream_handler_empty(self, monkeypatch):
+        monkeypatch.setattr(
+            handler, "adapter", GatewayAdapter(MockStreamingService([]))
+        )
+        stream = RecordingStream()
+        handler.stream_handler(gateway_event(), stream)
+
+        prelude, body = stream.split()
+        assert prelude["statusCode"] == 200
+        assert json.loads(body) == []
+
+    def test_stream_handler_error(self, monkeypatch):
+        monkeypatch.setattr(
+            handler,
+            "adapter",
+            GatewayAdapter(
+                MockStreamingService(error=ApplicationException(400, "bad request"))
+            ),
+        )
+        stream = RecordingStream()
+        handler.stream_handler(gateway_event(handler.NDJSON), stream)
+
+        prelude, body = stream.split()
+        assert prelude["statusCode"] == 400
+        assert "bad request" in json.loads(body)["message"]
+        assert stream.closed
+
+    def test_lambda_handler_ndjson(self, monkeypatch):
+        monkeypatch.setattr(
+            handler,
+            "adapter",
+            GatewayAdapter(
+                MockStreamingService([[{"album_id": 1}], [{"album_id": 2}]])
+            ),
+        )
+        response = handler.lambda_handler(gateway_event(handler.NDJSON), None)
+
+        assert response["statusCode"] == 200
+        assert response["headers"]["Content-Type"] == handler.NDJSON
+        assert response["body"] == '{"album_id":1}\n{"album_id":2}\n'
@@ -0,0 +1,128 @@
+import pytest
+
+from api_maker.adapters.gateway_adapter import GatewayAdapter
+from api_maker.connectors.connection import Connection, Cursor
+from api_maker.connectors.connection_factory import ConnectionFactory
+from api_maker.dao.operation_dao import OperationDAO
+from api_maker.iac import handler
+from api_maker.operation import Operation
+from api_maker.services.service import MutationPublisher
+from api_maker.services.transactional_service import TransactionalService
+from api_maker.utils import tracing
+
+from test_fixtures import load_model  # noqa F401
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+class InvoiceCursor(Cursor):
+    def execute(self, sql: str, params: dict, selection_results: dict) -> list[dict]:
+        return [{name: None for name in selection_results} for _ in range(2)]
+
+    def close(self):
+        pass
+
+
+class FailingCursor(InvoiceCursor):
+    def execute(self, sql: str, params: dict, selection_results: dict) -> list[dict]:
+        raise Exception(400, "syntax error")
+
+
+class InvoiceConnection(Connection):
+    def cursor(self) -> Cursor:
+        return InvoiceCursor()
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing, "_tracer", provider.get_tracer("api_maker"))
+    yield exporter
+    tracing.reset_tracer()
+
+
+@pytest.mark.unit
+class TestTracing:
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr(tracing, "TRACING_ENABLED", False)
+        tracing.reset_tracer()
+
+        with tracing.span("unmarshal") as span:
+            assert span is None
+        with tracing.request_span({"headers": {}}) as span:
+            assert span is None
+        assert tracing.get_tracer() is False
+
+    def test_request_spans(self, load_model, spans, monkeypatch):  # noqa F811
+        monkeypatch.setattr(
+            ConnectionFactory,
+            "_ConnectionFactory__connect",
+            lambda self, database: InvoiceConnection({"engine": "postgres"}),
+        )
+        monkeypatch.setattr(handler, "adapter", GatewayAdapter(TransactionalService()))
+
+        response = handler.lambda_handler(
+            {
+                "resource": "/invoice",
+                "httpMethod": "GET",
+                "headers": {"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"},
+                "queryStringParameters": {"total": "gt::5"},
+            },
+            None,
+        )
+        assert response["statusCode"] == 200
+
+        finished = {span.name: span for span in spans.get_finished_spans()}
+        assert set(finished) == {
+            "GET /invoice",
+            "unmarshal",
+            "connection",
+            "dao.execute",
+            "fetch_record_set",
+            "marshal",
+        }
+        request = finished["GET /invoice"]
+        # the trace continues the trace of the request headers
+        assert format(request.context.trace_id, "032x") == TRACE_ID
+        assert request.attributes["http.status_code"] == 200
+        assert finished["connection"].attributes["db.name"] == "chinook"
+
+        fetch = finished["fetch_record_set"]
+        assert fetch.parent.span_id == finished["dao.execute"].context.span_id
+        assert fetch.attributes["db.rows"] == 2
+        assert fetch.attributes["db.statement"].startswith("SELECT i.invoice_id")
+        assert "%(i_total)s" in fetch.attributes["db.statement"]
+
+    def test_failed_statement_span(self, load_model, spans):  # noqa F811
+        with pytest.raises(Exception):
+            OperationDAO(
+                Operation(operation_id="invoice", action="read"), "postgres"
+            ).execute(FailingCursor())
+
+        finished = {span.name: span for span in spans.get_finished_spans()}
+        fetch = finished["fetch_record_set"]
+        assert not fetch.status.is_ok
+        assert fetch.attributes["db.statement"].startswith("SELECT i.invoice_id")
+        assert "db.rows" not in fetch.attributes
+
+    def test_publish_notification_span(self, spans, monkeypatch):
+        monkeypatch.delenv("BROADCAST_TOPIC", raising=False)
+        MutationPublisher().publish_notification(
+            Operation(operation_id="invoice", action="create")
+        )
+
+        (span,) = spans.get_finished_spans()
+        assert span.name == "publish_notification"
+        assert span.attributes["api_maker.action"] == "create"